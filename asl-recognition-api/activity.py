@@ -0,0 +1,118 @@
+"""
+In-memory last-activity tracking for authenticated users.
+
+Requests only record a timestamp in memory; a background thread writes the
+newest timestamp per user to ``users.last_activity_at`` in one batched
+UPDATE every ``flush_interval_s`` seconds.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from sqlalchemy import update
+
+from models import db, User
+
+logger = logging.getLogger(__name__)
+
+
+class ActivityTracker:
+    """Newest activity timestamp per user id, persisted periodically."""
+
+    def __init__(self, app, flush_interval_s: float = 30.0, retain: timedelta = timedelta(days=1)):
+        self.app = app
+        self.flush_interval_s = max(1.0, float(flush_interval_s))
+        self.retain = retain
+        self._last_seen: dict[int, datetime] = {}
+        self._dirty: set[int] = set()
+        # Taken out of _dirty by a flush that has not committed yet
+        self._writing: set[int] = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+        self.flushes = 0
+        self.rows_written = 0
+
+    def touch(self, user_id: int, when: Optional[datetime] = None) -> None:
+        if self._thread is None:
+            self.start()
+        when = when or datetime.utcnow()
+        with self._lock:
+            prev = self._last_seen.get(user_id)
+            if prev is None or when > prev:
+                self._last_seen[user_id] = when
+                self._dirty.add(user_id)
+
+    def last_seen(self, user_id: int) -> Optional[datetime]:
+        with self._lock:
+            return self._last_seen.get(user_id)
+
+    def unflushed_active_ids(self, since: datetime) -> set[int]:
+        """Ids of users seen after ``since`` whose timestamp is not in the table yet."""
+        with self._lock:
+            return {uid for uid in self._dirty | self._writing if self._last_seen.get(uid, since) > since}
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="activity-tracker", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(5.0)
+            self._thread = None
+        self.flush()
+
+    def flush(self) -> int:
+        """Write dirty timestamps in one executemany UPDATE; returns rows written."""
+        with self._lock:
+            if not self._dirty:
+                return 0
+            params = [{"id": uid, "last_activity_at": self._last_seen[uid]} for uid in self._dirty]
+            self._writing = self._dirty
+            self._dirty = set()
+            # Forget users idle for longer than the retention window
+            cutoff = datetime.utcnow() - self.retain
+            for uid in [uid for uid, ts in self._last_seen.items() if ts < cutoff]:
+                del self._last_seen[uid]
+        with self.app.app_context():
+            try:
+                db.session.execute(update(User), params)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Failed to flush last-activity timestamps: {e}")
+                with self._lock:
+                    # Retry on the next flush
+                    self._dirty.update(p["id"] for p in params if p["id"] in self._last_seen)
+                    self._writing = set()
+                return 0
+            with self._lock:
+                self._writing = set()
+        self.flushes += 1
+        self.rows_written += len(params)
+        return len(params)
+
+    def _run(self) -> None:
+        while not self._stopping.wait(self.flush_interval_s):
+            self.flush()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            tracked = len(self._last_seen)
+            dirty = len(self._dirty)
+        return {
+            "tracked_users": tracked,
+            "pending_writes": dirty,
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+        }
@@ -1,38 +1,78 @@
 """
 ASL Recognition API
 Provides REST endpoints for ASL sign language recognition using MobileNetV2 model
+(served through Keras, TFLite or ONNX Runtime; see backends.py)
 
 Extended backend features:
 - JWT authentication (signup/login/me)
 - User management (list, update status/role)
-- Prediction logging with latency
-- Dashboard stats summary
-- Prediction logs querying with filters
+- Prediction logging with latency (buffered, bulk-inserted in the background)
+- Dashboard stats summary from incrementally maintained rollups
+- Prediction logs querying with filters and keyset (cursor) pagination
+- Streaming bulk export of prediction logs (NDJSON / CSV / Parquet)
+- Log retention with archival to compressed day-partitioned files
+- SQLite WAL/pragma tuning and PostgreSQL connection pooling (db_config.py)
+- Dynamic micro-batching of concurrent /api/predict calls
+- Content-addressed prediction cache for repeated frames
+- Binary (raw bytes / multipart) upload endpoints
+- WebSocket streaming recognition with server-side hold/commit
+- Background model loading with separate liveness/readiness checks
+- Prefork inference workers over shared memory (serve.py)
+- Per-stage latency tracing with a Prometheus /metrics endpoint
 """
 
-from flask import Flask, request, jsonify, g
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 import numpy as np
-import cv2
-import base64
-from tensorflow.keras.models import load_model
+import atexit
+import io
+import json
 import logging
 import os
 import time
+# The same class as the builtin TimeoutError from Python 3.11 on
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from datetime import datetime
 
+PROCESS_START = time.perf_counter()
+
 from flask_jwt_extended import (
     JWTManager,
     create_access_token,
     jwt_required,
     get_jwt_identity,
-    get_jwt,
     verify_jwt_in_request,
+    decode_token,
 )
 
-from passlib.hash import bcrypt
-
-from models import db, User, PredictionLog, get_summary_stats
+try:
+    from flask_sock import Sock, ConnectionClosed
+except ImportError:  # optional: streaming endpoint
+    Sock = None
+    ConnectionClosed = Exception
+
+from models import db, User, PredictionLog, ensure_indexes, get_summary_stats
+from db_config import init_db, describe as describe_db
+from backends import backend_from_env
+from model_loader import ModelLoader
+from worker_pool import WorkerPool, WorkerUnavailable
+from batching import MicroBatcher, BatcherOverloaded
+from hand_crop import HandCropper, NoHandFound, nothing_probs
+from preprocessing import PreprocessPool, thread_buffer, top_k
+from log_writer import PredictionLogWriter
+from activity import ActivityTracker
+from user_cache import UserStateCache
+from password_hasher import HasherBusy, PasswordHasher
+from rate_limit import RateLimiter
+from tracing import Tracer
+from metrics import PROMETHEUS_CONTENT_TYPE, PrometheusWriter
+from result_cache import PredictionCache, model_version
+from motion_gate import SMOOTHING_MODES, MotionGate, ProbabilitySmoother
+from streaming import RecognitionSession, SessionRegistry
+from pagination import TOTAL_MODES, count_rows, decode_cursor, encode_cursor, keyset_page
+from rollups import ensure_rollups, parse_window
+from export import EXPORT_FORMATS, ExportError, check_format, export_stream
+from retention import RetentionManager, archived_to_dict
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -42,17 +82,24 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 CORS(app)  # Enable CORS for frontend communication
 
+# Behind a reverse proxy, trust this many X-Forwarded-For hops for remote_addr
+# (auth rate limits are keyed on it)
+TRUST_PROXY_HOPS = int(os.environ.get("TRUST_PROXY_HOPS", "0"))
+if TRUST_PROXY_HOPS:
+    from werkzeug.middleware.proxy_fix import ProxyFix
+
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUST_PROXY_HOPS)
+
 # App/DB/Auth configuration
-app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:///asl.db")
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 app.config["JWT_SECRET_KEY"] = os.environ.get("JWT_SECRET_KEY", "dev-secret-change-me")
 
-db.init_app(app)
+# DATABASE_URL, with SQLite pragmas / PostgreSQL pooling (see db_config.py)
+init_db(app)
 jwt = JWTManager(app)
 
 # Model configuration
-MODEL_PATH = "asl_mobilenetv2.h5"
-IMG_SIZE = (224, 224)
+MODEL_PATH = os.environ.get("MODEL_PATH", "asl_mobilenetv2.h5")
 
 # Label mapping
 LABEL_MAP = {
@@ -62,92 +109,277 @@ LABEL_MAP = {
     27: 'nothing', 28: 'space'
 }
 
-# Load model at startup
-logger.info("Loading ASL recognition model...")
-try:
-    model = load_model(MODEL_PATH)
-    logger.info("✅ Model loaded successfully")
-except Exception as e:
-    logger.error(f"❌ Failed to load model: {e}")
-    model = None
+# The model is loaded and warmed up in the background (see model_loader.py);
+# `model` stays None until it is ready to serve.
+model = None
+
+# Micro-batching configuration
+PREDICT_MAX_BATCH_SIZE = int(os.environ.get("PREDICT_MAX_BATCH_SIZE", "16"))
+PREDICT_MAX_WAIT_MS = float(os.environ.get("PREDICT_MAX_WAIT_MS", "2"))
+PREDICT_QUEUE_SIZE = int(os.environ.get("PREDICT_QUEUE_SIZE", "256"))
+PREDICT_TIMEOUT_S = float(os.environ.get("PREDICT_TIMEOUT_S", "10"))
+# Max rows per forward pass on /api/predict-batch
+PREDICT_BATCH_CHUNK = int(os.environ.get("PREDICT_BATCH_CHUNK", "32"))
+# Max images per /api/predict-batch request (larger requests get 413)
+PREDICT_BATCH_MAX_IMAGES = int(os.environ.get("PREDICT_BATCH_MAX_IMAGES", "256"))
+# Prefork serving: run the model in this many pinned worker processes fed
+# over shared memory instead of in-process (see worker_pool.py / serve.py)
+INFERENCE_WORKERS = int(os.environ.get("INFERENCE_WORKERS", "0"))
+
+batcher = MicroBatcher(
+    lambda batch: model.predict(batch),
+    max_batch_size=PREDICT_MAX_BATCH_SIZE,
+    max_wait_ms=PREDICT_MAX_WAIT_MS,
+    max_queue_size=PREDICT_QUEUE_SIZE,
+    max_inflight=max(1, INFERENCE_WORKERS),
+)
+atexit.register(batcher.stop)
+
+# Per-stage latency histograms for every prediction path (/metrics)
+tracer = Tracer()
+# Attach stage timings to every prediction response (else only with ?timings=true)
+TRACE_RESPONSE_TIMINGS = os.environ.get("TRACE_RESPONSE_TIMINGS", "0").lower() in ("1", "true", "yes")
+# Optional bearer token required to scrape /metrics
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN") or None
+
+# Preprocessing (decode/resize) thread pool; rows stay uint8 and are scaled by the backend
+PREPROCESS_WORKERS = int(os.environ.get("PREPROCESS_WORKERS", "0")) or None
+# Decode large JPEGs at 1/2, 1/4 or 1/8 scale when that still covers 224x224
+PREPROCESS_REDUCED_DECODE = os.environ.get("PREPROCESS_REDUCED_DECODE", "1").lower() in ("1", "true", "yes")
+# Crop to the skin-coloured hand region first; frames without one are answered 'nothing' without inference
+HAND_CROP = os.environ.get("HAND_CROP", "0").lower() in ("1", "true", "yes")
+hand_cropper = HandCropper(
+    min_area=float(os.environ.get("HAND_CROP_MIN_AREA", "0.02")),
+    margin=float(os.environ.get("HAND_CROP_MARGIN", "0.25")),
+) if HAND_CROP else None
+NOTHING_PROBS = nothing_probs(len(LABEL_MAP), next(i for i, label in LABEL_MAP.items() if label == 'nothing'))
+preprocess_pool = PreprocessPool(PREPROCESS_WORKERS, reduced_decode=PREPROCESS_REDUCED_DECODE,
+                                 cropper=hand_cropper)
+atexit.register(preprocess_pool.shutdown)
+
+# Buffered prediction log writer
+log_writer = PredictionLogWriter(
+    app,
+    max_queue=int(os.environ.get("LOG_QUEUE_SIZE", "10000")),
+    flush_size=int(os.environ.get("LOG_FLUSH_SIZE", "500")),
+    flush_interval_s=float(os.environ.get("LOG_FLUSH_INTERVAL_S", "1.0")),
+    policy=os.environ.get("LOG_BACKPRESSURE", "drop"),
+    sample_rate=float(os.environ.get("LOG_SAMPLE_RATE", "0.1")),
+)
+atexit.register(log_writer.stop)
+
+# Last-activity timestamps, flushed to the users table in batches
+activity_tracker = ActivityTracker(
+    app, flush_interval_s=float(os.environ.get("ACTIVITY_FLUSH_INTERVAL_S", "30"))
+)
+atexit.register(activity_tracker.stop)
+
+# Role / active / blocked per user, re-read at most every USER_CACHE_TTL_S
+user_states = UserStateCache(app, ttl_s=float(os.environ.get("USER_CACHE_TTL_S", "5")))
+
+# Content-addressed cache of model outputs (PREDICTION_CACHE_ENTRIES=0 disables)
+prediction_cache = PredictionCache(
+    max_entries=int(os.environ.get("PREDICTION_CACHE_ENTRIES", "4096")),
+    max_bytes=int(float(os.environ.get("PREDICTION_CACHE_MB", "16")) * 1024 * 1024),
+    disk_path=os.environ.get("PREDICTION_CACHE_DISK") or None,
+)
+atexit.register(prediction_cache.close)
+
+# Retention: archive logs older than RETENTION_DAYS (0 keeps everything)
+log_retention = RetentionManager(
+    app,
+    archive_dir=os.environ.get("RETENTION_ARCHIVE_DIR") or os.path.join(app.instance_path, "archive"),
+    retention_days=int(os.environ.get("RETENTION_DAYS", "0")),
+    archive_format=os.environ.get("RETENTION_ARCHIVE_FORMAT") or None,
+    chunk_rows=int(os.environ.get("RETENTION_CHUNK_ROWS", "5000")),
+    interval_s=float(os.environ.get("RETENTION_INTERVAL_S", "3600")),
+)
+atexit.register(log_retention.stop)
+
+
+def _on_model_ready(backend):
+    global model
+    model = backend
+    # Cached outputs are only valid for the model and preprocessing that produced them
+    prediction_cache.set_version(model_version(backend.path, preprocess_pool.config()))
+
+
+def _load_model():
+    if INFERENCE_WORKERS > 0:
+        pool = WorkerPool(
+            MODEL_PATH,
+            workers=INFERENCE_WORKERS,
+            max_batch_size=max(PREDICT_MAX_BATCH_SIZE, PREDICT_BATCH_CHUNK),
+        )
+        atexit.register(pool.stop)
+        pool.start()
+        return pool
+    return backend_from_env(MODEL_PATH)
+
+
+# Background model loading (INFERENCE_BACKEND selects keras / tflite / onnx)
+model_loader = ModelLoader(
+    _load_model,
+    warmup_shapes=(1, PREDICT_MAX_BATCH_SIZE),
+    retry_interval_s=float(os.environ.get("MODEL_RETRY_INTERVAL_S", "30")),
+    process_start=PROCESS_START,
+)
+model_loader.on_ready(_on_model_ready)
+atexit.register(model_loader.stop)
+# Spawned inference workers re-import this module as __mp_main__ when app.py
+# is run directly; only the serving process loads the model and runs retention.
+if __name__ != '__mp_main__':
+    logger.info("Loading ASL recognition model in the background...")
+    model_loader.start()
+    log_retention.start()
+
+# Rows fetched per server-side cursor round trip in /api/predictions/export
+EXPORT_CHUNK_ROWS = int(os.environ.get("EXPORT_CHUNK_ROWS", "5000"))
+
+# Streaming (WebSocket) recognition sessions
+STREAM_HOLD_TIME = float(os.environ.get("STREAM_HOLD_TIME", "1.5"))
+STREAM_MIN_CONFIDENCE = float(os.environ.get("STREAM_MIN_CONFIDENCE", "0.7"))
+# Reuse the last prediction while the frame barely changes (0 disables), and smooth over time
+STREAM_MOTION_THRESHOLD = float(os.environ.get("STREAM_MOTION_THRESHOLD", "2.0"))
+STREAM_MOTION_MAX_SKIP = int(os.environ.get("STREAM_MOTION_MAX_SKIP", "15"))
+STREAM_SMOOTHING = os.environ.get("STREAM_SMOOTHING", "ema").lower()
+if STREAM_SMOOTHING not in SMOOTHING_MODES:
+    logger.warning(f"Unknown STREAM_SMOOTHING={STREAM_SMOOTHING!r}; using 'ema'")
+    STREAM_SMOOTHING = "ema"
+STREAM_SMOOTHING_ALPHA = float(os.environ.get("STREAM_SMOOTHING_ALPHA", "0.5"))
+STREAM_SMOOTHING_WINDOW = int(os.environ.get("STREAM_SMOOTHING_WINDOW", "5"))
+stream_sessions = SessionRegistry()
+
+
+# Password hashing on a bounded pool, behind per-IP / per-email rate limits
+password_hasher = PasswordHasher(
+    rounds=int(os.environ.get("BCRYPT_ROUNDS", "12")),
+    workers=int(os.environ.get("AUTH_HASH_WORKERS", "2")),
+    max_pending=int(os.environ.get("AUTH_HASH_QUEUE", "64")),
+)
+atexit.register(password_hasher.shutdown)
+auth_ip_limiter = RateLimiter(float(os.environ.get("AUTH_RATE_PER_IP", "30")))
+login_email_limiter = RateLimiter(float(os.environ.get("AUTH_RATE_PER_EMAIL", "10")))
 
 
 def hash_password(plain: str) -> str:
-    return bcrypt.hash(plain)
+    return password_hasher.hash(plain)
 
 
-def verify_password(plain: str, hashed: str) -> bool:
-    try:
-        return bcrypt.verify(plain, hashed)
-    except Exception:
-        return False
+def verify_password(plain: str, hashed) -> bool:
+    return password_hasher.verify(plain, hashed)
 
 
-def preprocess_image(image_data):
-    """
-    Preprocess image for model prediction
-    
-    Args:
-        image_data: Base64 encoded image string or numpy array
-        
-    Returns:
-        Preprocessed numpy array ready for model input
-    """
-    try:
-        # If base64 string, decode it
-        if isinstance(image_data, str):
-            # Remove data:image/jpeg;base64, prefix if present
-            if ',' in image_data:
-                image_data = image_data.split(',')[1]
-            
-            # Decode base64
-            img_bytes = base64.b64decode(image_data)
-            nparr = np.frombuffer(img_bytes, np.uint8)
-            img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        else:
-            img = image_data
-        
-        # Resize to model input size
-        img_resized = cv2.resize(img, IMG_SIZE)
-        
-        # Normalize pixel values to [0, 1]
-        img_normalized = img_resized.astype("float32") / 255.0
-        
-        # Add batch dimension
-        img_batch = np.expand_dims(img_normalized, axis=0)
-        
-        return img_batch
-    except Exception as e:
-        logger.error(f"Error in preprocessing: {e}")
+def _auth_rate_limited(email: str = None):
+    """429 response if this client (or attempts on ``email``) is over its auth budget."""
+    retry_after = auth_ip_limiter.hit(request.remote_addr or 'unknown')
+    if not retry_after and email:
+        retry_after = login_email_limiter.hit(email)
+    if not retry_after:
         return None
+    resp = jsonify({'success': False, 'error': 'Too many attempts, try again later'})
+    resp.headers['Retry-After'] = str(max(1, int(retry_after + 0.999)))
+    return resp, 429
+
+
+def _auth_busy():
+    resp = jsonify({'success': False, 'error': 'Authentication service busy, try again shortly'})
+    resp.headers['Retry-After'] = '1'
+    return resp, 503
+
+
+# Served regardless of who the token belongs to: logging in as another account,
+# health probes and public metadata must not fail on a stale or blocked token
+# or on a user-cache outage.
+USER_CHECK_EXEMPT_ENDPOINTS = frozenset({
+    'health_check', 'health_live', 'health_ready',
+    'signup', 'login',
+    'get_labels', 'prometheus_metrics', 'static',
+})
 
 
 @app.before_request
-def update_last_activity_if_authenticated():
-    """If a valid JWT is present, update user's last activity timestamp."""
+def check_user_and_record_activity():
+    """If a valid JWT is present, reject blocked users and record activity.
+
+    The user's status comes from the in-process user-state cache, so a
+    block takes effect within USER_CACHE_TTL_S rather than at token expiry.
+    Timestamps are written to ``users.last_activity_at`` in batches by the
+    activity tracker instead of a commit per request. Endpoints in
+    ``USER_CHECK_EXEMPT_ENDPOINTS`` are skipped.
+    """
+    if request.endpoint is None or request.endpoint in USER_CHECK_EXEMPT_ENDPOINTS:
+        return None
     try:
         verify_jwt_in_request(optional=True)
         uid = get_jwt_identity()
-        if uid:
-            user = db.session.get(User, uid)
-            if user:
-                user.last_activity_at = datetime.utcnow()
-                db.session.commit()
-                g.current_user = user
     except Exception:
-        # No valid JWT or other issue; ignore
-        pass
+        # No valid JWT or other issue; the route decides
+        return None
+    if not uid:
+        return None
+    try:
+        state = user_states.get(uid)
+    except Exception as e:
+        logger.error(f"❌ User status lookup failed: {e}")
+        return jsonify({'success': False, 'error': 'User status unavailable'}), 503
+    if state is None:
+        return jsonify({'success': False, 'error': 'User not found'}), 401
+    if not state.allowed:
+        return jsonify({'success': False, 'error': 'Account inactive or blocked'}), 403
+    activity_tracker.touch(uid)
+    return None
+
+
+def current_role():
+    """Role of the JWT's user as of the user-state cache (not the login-time claim)."""
+    state = user_states.get(get_jwt_identity())
+    return state.role if state else None
+
+
+def user_to_dict(user: User) -> dict:
+    """Serialize a user, overlaying the newest in-memory activity timestamp."""
+    data = user.to_dict()
+    seen = activity_tracker.last_seen(user.id)
+    if seen and (user.last_activity_at is None or seen > user.last_activity_at):
+        data['last_activity_at'] = seen.isoformat()
+    return data
+
+
+def _model_ready() -> bool:
+    """Model loaded, and (in prefork mode) no inference worker given up on."""
+    return model is not None and getattr(model, 'healthy', True)
 
 
 @app.route('/health', methods=['GET'])
 def health_check():
-    """Health check endpoint"""
+    """Health check endpoint: liveness plus model readiness and startup timings"""
     return jsonify({
         'status': 'healthy',
-        'model_loaded': model is not None
+        'live': True,
+        'ready': _model_ready(),
+        'model_loaded': model is not None,
+        'model': model_loader.status(),
+        'startup': {
+            'app_import_ms': APP_IMPORT_MS,
+            'model_ready_after_ms': model_loader.ready_after_ms,
+        },
     }), 200
 
 
+@app.route('/health/live', methods=['GET'])
+def health_live():
+    """Liveness: the process is up and serving requests"""
+    return jsonify({'live': True}), 200
+
+
+@app.route('/health/ready', methods=['GET'])
+def health_ready():
+    """Readiness: 200 once the model is loaded and warmed up, 503 before"""
+    ready = _model_ready()
+    return jsonify({'ready': ready, 'state': model_loader.state}), (200 if ready else 503)
+
+
 # -----------------------
 # Auth & User Management
 # -----------------------
@@ -160,6 +392,9 @@ def signup():
     password = data.get('password') or ''
     if not email or not password:
         return jsonify({'success': False, 'error': 'Email and password are required'}), 400
+    limited = _auth_rate_limited()
+    if limited:
+        return limited
 
     # Check if exists
     if db.session.query(User).filter_by(email=email).first():
@@ -170,9 +405,14 @@ def signup():
     if db.session.query(User).count() == 0:
         role = 'admin'
 
+    try:
+        password_hash = hash_password(password)
+    except (HasherBusy, FutureTimeoutError):
+        return _auth_busy()
+
     user = User(
         email=email,
-        password_hash=hash_password(password),
+        password_hash=password_hash,
         role=role,
         active=True,
         blocked=False,
@@ -192,17 +432,28 @@ def login():
     if not email or not password:
         return jsonify({'success': False, 'error': 'Email and password are required'}), 400
 
+    limited = _auth_rate_limited(email)
+    if limited:
+        return limited
+
     user = db.session.query(User).filter_by(email=email).first()
-    if not user or not verify_password(password, user.password_hash):
-        return jsonify({'success': False, 'error': 'Invalid credentials'}), 401
+    try:
+        # Unknown emails are checked against a dummy hash so timing doesn't reveal them
+        if not verify_password(password, user.password_hash if user else None):
+            return jsonify({'success': False, 'error': 'Invalid credentials'}), 401
+        if password_hasher.needs_update(user.password_hash):
+            # Upgrade hashes made with a different BCRYPT_ROUNDS
+            user.password_hash = hash_password(password)
+            db.session.commit()
+    except (HasherBusy, FutureTimeoutError):
+        return _auth_busy()
     if not user.active or user.blocked:
         return jsonify({'success': False, 'error': 'Account inactive or blocked'}), 403
 
-    user.last_activity_at = datetime.utcnow()
-    db.session.commit()
+    activity_tracker.touch(user.id)
 
     token = create_access_token(identity=user.id, additional_claims={'role': user.role})
-    return jsonify({'success': True, 'access_token': token, 'user': user.to_dict()}), 200
+    return jsonify({'success': True, 'access_token': token, 'user': user_to_dict(user)}), 200
 
 
 @app.get('/api/auth/me')
@@ -212,14 +463,12 @@ def me():
     user = db.session.get(User, uid)
     if not user:
         return jsonify({'success': False, 'error': 'User not found'}), 404
-    return jsonify({'success': True, 'user': user.to_dict()}), 200
+    return jsonify({'success': True, 'user': user_to_dict(user)}), 200
 
 
 def require_admin() -> tuple[bool, tuple]:
     """Helper to check admin role within a protected route."""
-    claims = get_jwt()
-    role = claims.get('role')
-    if role != 'admin':
+    if current_role() != 'admin':
         return False, (jsonify({'success': False, 'error': 'Admin access required'}), 403)
     return True, ()
 
@@ -231,7 +480,7 @@ def list_users():
     if not ok:
         return resp
     users = db.session.query(User).order_by(User.created_at.desc()).all()
-    return jsonify({'success': True, 'users': [u.to_dict() for u in users]}), 200
+    return jsonify({'success': True, 'users': [user_to_dict(u) for u in users]}), 200
 
 
 @app.patch('/api/users/<int:user_id>')
@@ -251,7 +500,170 @@ def update_user(user_id: int):
     if 'role' in data:
         user.role = str(data['role'])
     db.session.commit()
-    return jsonify({'success': True, 'user': user.to_dict()}), 200
+    user_states.invalidate(user_id)
+    return jsonify({'success': True, 'user': user_to_dict(user)}), 200
+
+
+def _file_buffer(file_storage):
+    """Zero-copy view of an uploaded file when werkzeug kept it in memory."""
+    stream = file_storage.stream
+    if isinstance(stream, io.BytesIO):
+        return stream.getbuffer()
+    return stream.read()
+
+
+def _infer(image_data, trace=None) -> np.ndarray:
+    """Probability row for one image payload via the cache, preprocessing pool and batcher.
+
+    Stages are marked on ``trace`` when given. Raises ``ValueError`` for
+    undecodable images, ``BatcherOverloaded`` when the inference queue
+    is full and ``TimeoutError`` when no result arrives within
+    ``PREDICT_TIMEOUT_S``.
+    """
+    # Identical frames are answered from the cache (other payload types fail in preprocessing)
+    cacheable = prediction_cache.enabled and isinstance(image_data, (str, bytes, memoryview))
+    cache_key = prediction_cache.key_for(image_data) if cacheable else None
+    predictions = prediction_cache.get(cache_key) if cache_key else None
+    if trace is not None:
+        trace.mark('cache')
+    if predictions is not None:
+        return predictions
+
+    timings = {} if trace is not None else None
+    try:
+        # The batcher copies the row when it dispatches, so this thread's buffer can be reused
+        img_array = preprocess_pool.preprocess(image_data, timings, out=thread_buffer())
+    except NoHandFound:
+        img_array = None
+    if trace is not None:
+        trace.mark('preprocess')
+        trace.merge('preprocess', timings)
+        timings = {}
+    if img_array is None:
+        # No hand in the frame: answer 'nothing' without a forward pass
+        if cache_key:
+            prediction_cache.put(cache_key, NOTHING_PROBS)
+        return NOTHING_PROBS
+    # Make prediction (batched with concurrent requests)
+    predictions = batcher.predict(img_array, timeout=PREDICT_TIMEOUT_S, timings=timings)
+    if cache_key:
+        prediction_cache.put(cache_key, predictions)
+    if trace is not None:
+        trace.mark('model')
+        trace.merge('model', timings)
+    return predictions
+
+
+def _wants_timings() -> bool:
+    return TRACE_RESPONSE_TIMINGS or request.args.get('timings', '').lower() in ('1', 'true')
+
+
+def _traced_response(trace, body: dict):
+    """Serialize ``body`` and close ``trace``; stage timings are attached on request.
+
+    ``timings_ms`` in the body covers the stages before serialization; the
+    ``Server-Timing`` header also has ``serialize`` and ``total``.
+    """
+    include = _wants_timings()
+    if include:
+        body['timings_ms'] = dict(trace.stages)
+    response = jsonify(body)
+    trace.mark('serialize')
+    tracer.finish(trace)
+    if include:
+        response.headers['Server-Timing'] = trace.server_timing()
+    return response, 200
+
+
+def _inference_busy(message: str):
+    """503 for a full or too-slow inference queue; clients should back off briefly."""
+    resp = jsonify({'success': False, 'error': message})
+    resp.headers['Retry-After'] = '1'
+    return resp, 503
+
+
+def _predict_single(image_data, trace):
+    """Classify one image payload (base64 string or raw bytes) and log it.
+
+    Shared by the JSON and binary single-image endpoints; returns a Flask
+    response tuple.
+    """
+    current_user_id = get_jwt_identity()
+
+    try:
+        predictions = _infer(image_data, trace)
+    except ValueError as prep_err:
+        logger.error(f"Error in preprocessing: {prep_err}")
+        return jsonify({'success': False, 'error': 'Failed to preprocess image'}), 400
+    except BatcherOverloaded:
+        return _inference_busy('Server busy, try again')
+    except WorkerUnavailable:
+        return _inference_busy('No inference worker available, try again')
+    except FutureTimeoutError:
+        logger.warning(f"Prediction timed out after {PREDICT_TIMEOUT_S:g} s in the inference queue")
+        return _inference_busy('Inference timed out, try again')
+
+    # Get top prediction
+    pred_idx = np.argmax(predictions)
+    pred_label = LABEL_MAP[pred_idx]
+    confidence = float(predictions[pred_idx])
+
+    # Get top 5 predictions
+    top_5_indices = np.argsort(predictions)[-5:][::-1]
+    top_5_predictions = {LABEL_MAP[idx]: float(predictions[idx]) for idx in top_5_indices}
+
+    logger.info(f"Prediction: {pred_label} (confidence: {confidence:.2f})")
+    trace.mark('postprocess')
+
+    latency_ms = trace.elapsed_ms()
+
+    # Log prediction (buffered; flushed in bulk by the background writer)
+    log_writer.write(
+        user_id=current_user_id,
+        timestamp=datetime.utcnow(),
+        label=pred_label,
+        confidence=confidence,
+        latency_ms=latency_ms,
+        success=True,
+        error_message=None,
+        client_ip=request.headers.get('X-Forwarded-For', request.remote_addr),
+        top_predictions=top_5_predictions,
+    )
+    trace.mark('log')
+
+    return _traced_response(trace, {
+        'success': True,
+        'prediction': pred_label,
+        'confidence': confidence,
+        'top_predictions': top_5_predictions,
+        'latency_ms': latency_ms
+    })
+
+
+def _prediction_failed(e: Exception):
+    """Log a failed prediction and build the 500 response."""
+    logger.error(f"Prediction error: {e}")
+    # Attempt to log failure
+    try:
+        verify_jwt_in_request(optional=True)
+        current_user_id = get_jwt_identity()
+    except Exception:
+        current_user_id = None
+    log_writer.write(
+        user_id=current_user_id,
+        timestamp=datetime.utcnow(),
+        label=None,
+        confidence=None,
+        latency_ms=None,
+        success=False,
+        error_message=str(e),
+        client_ip=request.headers.get('X-Forwarded-For', request.remote_addr),
+        top_predictions=None,
+    )
+    return jsonify({
+        'success': False,
+        'error': str(e)
+    }), 500
 
 
 @app.route('/api/predict', methods=['POST'])
@@ -276,100 +688,159 @@ def predict():
         return jsonify({
             'success': False,
             'error': 'Model not loaded'
-        }), 500
+        }), 503
     
     try:
-        start_t = time.perf_counter()
+        trace = tracer.start('predict')
 
         # Attach JWT user if present (optional)
         verify_jwt_in_request(optional=True)
-        current_user_id = get_jwt_identity()
 
         # Get image from request
         data = request.get_json() or {}
         if 'image' not in data:
             return jsonify({'success': False, 'error': 'No image provided'}), 400
+        trace.mark('parse')
 
-        # Preprocess image
-        img_array = preprocess_image(data['image'])
-        if img_array is None:
-            return jsonify({'success': False, 'error': 'Failed to preprocess image'}), 400
+        return _predict_single(data['image'], trace)
 
-        # Make prediction
-        predictions = model.predict(img_array, verbose=0)[0]
+    except Exception as e:
+        return _prediction_failed(e)
 
-        # Get top prediction
-        pred_idx = np.argmax(predictions)
-        pred_label = LABEL_MAP[pred_idx]
-        confidence = float(predictions[pred_idx])
 
-        # Get top 5 predictions
-        top_5_indices = np.argsort(predictions)[-5:][::-1]
-        top_5_predictions = {LABEL_MAP[idx]: float(predictions[idx]) for idx in top_5_indices}
+@app.route('/api/predict/raw', methods=['POST'])
+def predict_raw():
+    """
+    Predict ASL sign from a binary image upload (no base64/JSON)
+
+    Request body is either the raw JPEG/PNG bytes
+    (Content-Type: image/jpeg, image/png or application/octet-stream)
+    or multipart/form-data with an "image" file field.
 
-        logger.info(f"Prediction: {pred_label} (confidence: {confidence:.2f})")
+    Response: same as /api/predict
+    """
+    if model is None:
+        return jsonify({
+            'success': False,
+            'error': 'Model not loaded'
+        }), 503
 
-        latency_ms = (time.perf_counter() - start_t) * 1000.0
+    try:
+        trace = tracer.start('predict_raw')
+        verify_jwt_in_request(optional=True)
 
-        # Log prediction
-        try:
-            log = PredictionLog(
-                user_id=current_user_id,
-                timestamp=datetime.utcnow(),
-                label=pred_label,
-                confidence=confidence,
-                latency_ms=latency_ms,
-                success=True,
-                error_message=None,
-                client_ip=request.headers.get('X-Forwarded-For', request.remote_addr),
-                top_predictions=top_5_predictions,
-            )
-            db.session.add(log)
-            # Update user last activity if logged in
-            if current_user_id:
-                u = db.session.get(User, current_user_id)
-                if u:
-                    u.last_activity_at = datetime.utcnow()
-            db.session.commit()
-        except Exception as log_err:
-            logger.error(f"Failed to log prediction: {log_err}")
+        if request.mimetype == 'multipart/form-data':
+            upload = request.files.get('image') or next(iter(request.files.values()), None)
+            payload = _file_buffer(upload) if upload is not None else b''
+        else:
+            # Decoded straight from the request buffer with np.frombuffer
+            payload = request.get_data(cache=False)
+        if not len(payload):
+            return jsonify({'success': False, 'error': 'No image provided'}), 400
+        trace.mark('parse')
 
-        return jsonify({
-            'success': True,
-            'prediction': pred_label,
-            'confidence': confidence,
-            'top_predictions': top_5_predictions,
-            'latency_ms': latency_ms
-        }), 200
+        return _predict_single(payload, trace)
 
     except Exception as e:
-        logger.error(f"Prediction error: {e}")
-        # Attempt to log failure
-        try:
-            verify_jwt_in_request(optional=True)
-            current_user_id = get_jwt_identity()
-        except Exception:
-            current_user_id = None
-        try:
-            log = PredictionLog(
-                user_id=current_user_id,
-                timestamp=datetime.utcnow(),
-                label=None,
-                confidence=None,
-                latency_ms=None,
-                success=False,
-                error_message=str(e),
-                client_ip=request.headers.get('X-Forwarded-For', request.remote_addr),
-                top_predictions=None,
-            )
-            db.session.add(log)
-            db.session.commit()
-        except Exception:
-            pass
-        return jsonify({
-            'success': False,
-            'error': str(e)
-        }), 500
+        return _prediction_failed(e)
+
+
+def _predict_many(images: list, trace) -> list:
+    """Classify many image payloads with one forward pass; returns per-image results."""
+    current_user_id = get_jwt_identity()
+
+    # Serve repeated images from the cache; only the rest need inference
+    probs = np.empty((len(images), len(LABEL_MAP)), dtype=np.float32)
+    keys = [None] * len(images)
+    misses = []
+    for i, img_data in enumerate(images):
+        if prediction_cache.enabled and isinstance(img_data, (str, bytes, memoryview)):
+            keys[i] = prediction_cache.key_for(img_data)
+            cached = prediction_cache.get(keys[i])
+            if cached is not None:
+                probs[i] = cached
+                continue
+        misses.append(i)
+    trace.mark('cache')
+
+    # Decode/resize every uncached image into one preallocated (N, 224, 224, 3) array
+    timings = {}
+    batch, miss_errors, miss_valid = preprocess_pool.preprocess_batch([images[i] for i in misses], timings,
+                                                                      dtype=np.uint8)
+    trace.mark('preprocess')
+    trace.merge('preprocess', timings)
+    errors = [None] * len(images)
+    for j, err in enumerate(miss_errors):
+        errors[misses[j]] = err
+    missed_rows = [misses[j] for j in miss_valid]
+    if hand_cropper is not None and len(miss_valid) + sum(e is not None for e in miss_errors) < len(misses):
+        # Decoded fine but no hand: 'nothing' without inference
+        in_batch = set(miss_valid)
+        for j, err in enumerate(miss_errors):
+            if err is None and j not in in_batch:
+                probs[misses[j]] = NOTHING_PROBS
+                if keys[misses[j]]:
+                    prediction_cache.put(keys[misses[j]], NOTHING_PROBS)
+
+    # One (chunked) forward pass over all decodable images
+    if missed_rows:
+        miss_probs = model.predict(batch[:len(missed_rows)], batch_size=PREDICT_BATCH_CHUNK)
+        probs[missed_rows] = miss_probs
+        for row, i in enumerate(missed_rows):
+            if keys[i]:
+                prediction_cache.put(keys[i], miss_probs[row])
+    trace.mark('model')
+
+    valid = [i for i in range(len(images)) if errors[i] is None]
+    probs = probs[valid]
+
+    # Vectorized argmax/top-k for all rows
+    top_idx, top_scores = top_k(probs, 5)
+
+    results = [None] * len(images)
+    for row, i in enumerate(valid):
+        results[i] = {
+            'prediction': LABEL_MAP[int(top_idx[row, 0])],
+            'confidence': float(top_scores[row, 0]),
+            'top_predictions': {
+                LABEL_MAP[int(idx)]: float(score)
+                for idx, score in zip(top_idx[row], top_scores[row])
+            },
+        }
+    for i, err in enumerate(errors):
+        if err is not None:
+            results[i] = {
+                'prediction': None,
+                'confidence': 0.0,
+                'error': f'Failed to preprocess: {err}'
+            }
+    trace.mark('postprocess')
+
+    # Log, with the request's end-to-end time amortized per image
+    latency_ms = trace.elapsed_ms() / len(valid) if valid else 0.0
+    client_ip = request.headers.get('X-Forwarded-For', request.remote_addr)
+    timestamp = datetime.utcnow()
+    for i in valid:
+        log_writer.write(
+            user_id=current_user_id,
+            timestamp=timestamp,
+            label=results[i]['prediction'],
+            confidence=results[i]['confidence'],
+            latency_ms=latency_ms,
+            success=True,
+            error_message=None,
+            client_ip=client_ip,
+            top_predictions=results[i]['top_predictions'],
+        )
+    trace.mark('log')
+    return results
+
+
+def _batch_too_large():
+    return jsonify({
+        'success': False,
+        'error': f'Too many images (max {PREDICT_BATCH_MAX_IMAGES} per request)'
+    }), 413
 
 
 @app.route('/api/predict-batch', methods=['POST'])
@@ -386,66 +857,72 @@ def predict_batch():
         return jsonify({
             'success': False,
             'error': 'Model not loaded'
-        }), 500
+        }), 503
     
     try:
+        trace = tracer.start('predict_batch')
         verify_jwt_in_request(optional=True)
-        current_user_id = get_jwt_identity()
-        data = request.get_json()
-        
+        data = request.get_json() or {}
+
         if 'images' not in data:
             return jsonify({
                 'success': False,
                 'error': 'No images provided'
             }), 400
         
-        results = []
-        for img_data in data['images']:
-            img_array = preprocess_image(img_data)
-            if img_array is not None:
-                start_t = time.perf_counter()
-                predictions = model.predict(img_array, verbose=0)[0]
-                latency_ms = (time.perf_counter() - start_t) * 1000.0
-                pred_idx = np.argmax(predictions)
-                pred_label = LABEL_MAP[pred_idx]
-                conf = float(predictions[pred_idx])
-                results.append({
-                    'prediction': pred_label,
-                    'confidence': conf
-                })
-                # Log
-                try:
-                    db.session.add(PredictionLog(
-                        user_id=current_user_id,
-                        timestamp=datetime.utcnow(),
-                        label=pred_label,
-                        confidence=conf,
-                        latency_ms=latency_ms,
-                        success=True,
-                        error_message=None,
-                        client_ip=request.headers.get('X-Forwarded-For', request.remote_addr),
-                        top_predictions=None,
-                    ))
-                except Exception as log_err:
-                    logger.error(f"Failed to log batch prediction: {log_err}")
-            else:
-                results.append({
-                    'prediction': None,
-                    'confidence': 0.0,
-                    'error': 'Failed to preprocess'
-                })
-        # Commit logs once
-        try:
-            if results:
-                db.session.commit()
-        except Exception:
-            db.session.rollback()
+        images = data['images']
+        if not isinstance(images, list):
+            return jsonify({'success': False, 'error': 'images must be a list'}), 400
+        if len(images) > PREDICT_BATCH_MAX_IMAGES:
+            return _batch_too_large()
+        trace.mark('parse')
+
+        return _traced_response(trace, {
+            'success': True,
+            'results': _predict_many(images, trace)
+        })
+        
+    except Exception as e:
+        logger.error(f"Batch prediction error: {e}")
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
 
+
+@app.route('/api/predict-batch/multipart', methods=['POST'])
+def predict_batch_multipart():
+    """
+    Predict ASL signs from many binary frames in one multipart/form-data upload
+
+    Every file part (conventionally named "images") is one JPEG/PNG frame;
+    results keep the upload order. Response: same as /api/predict-batch
+    """
+    if model is None:
         return jsonify({
+            'success': False,
+            'error': 'Model not loaded'
+        }), 503
+
+    try:
+        trace = tracer.start('predict_batch_multipart')
+        verify_jwt_in_request(optional=True)
+        files = [f for _, f in request.files.items(multi=True)]
+        if len(files) > PREDICT_BATCH_MAX_IMAGES:
+            return _batch_too_large()
+        images = [_file_buffer(f) for f in files]
+        if not images:
+            return jsonify({
+                'success': False,
+                'error': 'No images provided'
+            }), 400
+        trace.mark('parse')
+
+        return _traced_response(trace, {
             'success': True,
-            'results': results
-        }), 200
-        
+            'results': _predict_many(images, trace)
+        })
+
     except Exception as e:
         logger.error(f"Batch prediction error: {e}")
         return jsonify({
@@ -454,6 +931,124 @@ def predict_batch():
         }), 500
 
 
+def _stream_user_id():
+    """Optional JWT for a WebSocket handshake (Authorization header or ?token=)."""
+    token = request.args.get('token')
+    if not token:
+        auth = request.headers.get('Authorization', '')
+        token = auth[7:] if auth.startswith('Bearer ') else None
+    if not token:
+        return None
+    try:
+        return decode_token(token).get('sub')
+    except Exception:
+        return None
+
+
+def _stream_infer(frame) -> np.ndarray:
+    trace = tracer.start('stream')
+    probs = _infer(frame, trace)
+    tracer.finish(trace)
+    return probs
+
+
+def _stream_user_allowed(uid) -> bool:
+    state = user_states.get(uid)
+    return state is not None and state.allowed
+
+
+def stream_recognition(ws):
+    """
+    Streaming recognition over a WebSocket (GET /api/stream, upgraded)
+
+    Client -> server:
+        binary message: one JPEG/PNG frame
+        text message:   {"image": "base64..."} or {"type": "reset"}
+
+    Server -> client, per processed frame:
+        {"type": "prediction", "frame": 12, "prediction": "A", "confidence": 0.93,
+         "committed": "A" | null, "text": "HELLO", "progress": 0.4,
+         "dropped": 3, "skipped": false, "latency_ms": 21.5}
+
+    Frames that arrive while the previous one is still being classified
+    replace it (latest frame wins) and are counted in "dropped". Frames
+    nearly identical to the last classified one reuse its (smoothed)
+    prediction and have "skipped": true.
+    """
+    if model is None:
+        ws.send(json.dumps({'type': 'error', 'error': 'Model not loaded'}))
+        return
+
+    current_user_id = _stream_user_id()
+    if current_user_id and not _stream_user_allowed(current_user_id):
+        ws.send(json.dumps({'type': 'error', 'error': 'Account inactive or blocked'}))
+        return
+    client_ip = request.headers.get('X-Forwarded-For', request.remote_addr)
+    if current_user_id:
+        activity_tracker.touch(current_user_id)
+
+    def log_frame(label, confidence, latency_ms):
+        log_writer.write(
+            user_id=current_user_id,
+            timestamp=datetime.utcnow(),
+            label=label,
+            confidence=confidence,
+            latency_ms=latency_ms,
+            success=True,
+            error_message=None,
+            client_ip=client_ip,
+            top_predictions=None,
+        )
+
+    session = RecognitionSession(
+        _stream_infer,
+        LABEL_MAP,
+        send=lambda message: ws.send(json.dumps(message)),
+        hold_time=STREAM_HOLD_TIME,
+        min_confidence=STREAM_MIN_CONFIDENCE,
+        on_prediction=log_frame,
+        gate=MotionGate(STREAM_MOTION_THRESHOLD, STREAM_MOTION_MAX_SKIP),
+        smoother=ProbabilitySmoother(STREAM_SMOOTHING, STREAM_SMOOTHING_ALPHA, STREAM_SMOOTHING_WINDOW),
+    )
+    stream_sessions.add(session)
+    session.start()
+    try:
+        while True:
+            message = ws.receive()
+            if message is None:
+                break
+            # Cached lookup, so a block also ends sessions that are already open
+            if current_user_id and not _stream_user_allowed(current_user_id):
+                ws.send(json.dumps({'type': 'error', 'error': 'Account inactive or blocked'}))
+                break
+            if isinstance(message, (bytes, bytearray)):
+                session.push(message)
+                continue
+            try:
+                data = json.loads(message)
+            except ValueError:
+                ws.send(json.dumps({'type': 'error', 'error': 'Invalid JSON message'}))
+                continue
+            if not isinstance(data, dict):
+                ws.send(json.dumps({'type': 'error', 'error': 'Message must be a JSON object'}))
+                continue
+            if data.get('type') == 'reset':
+                session.reset()
+            elif 'image' in data:
+                session.push(data['image'])
+    except ConnectionClosed:
+        pass
+    finally:
+        session.close()
+        stream_sessions.remove(session)
+
+
+if Sock is not None:
+    Sock(app).route('/api/stream')(stream_recognition)
+else:
+    logger.warning("flask-sock not installed; /api/stream WebSocket endpoint disabled")
+
+
 @app.route('/api/labels', methods=['GET'])
 def get_labels():
     """Get all available ASL labels"""
@@ -466,115 +1061,274 @@ def get_labels():
 @app.get('/api/stats/summary')
 @jwt_required()
 def stats_summary():
+    """Dashboard stats, optionally for a time window.
+    Query params:
+      - window: trailing window such as 15m, 6h, 7d
+      - start, end (ISO8601): explicit window (overrides window)
+    """
     ok, resp = require_admin()
     if not ok:
         return resp
-    return jsonify({'success': True, 'stats': get_summary_stats()}), 200
+    args = request.args
+    start = end = None
+    try:
+        if args.get('window'):
+            start = datetime.utcnow() - parse_window(args['window'])
+        if args.get('start'):
+            start = datetime.fromisoformat(args['start'])
+        if args.get('end'):
+            end = datetime.fromisoformat(args['end'])
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Invalid window: {e}'}), 400
+    return jsonify({'success': True, 'stats': get_summary_stats(activity_tracker, start, end)}), 200
+
+
+@app.get('/metrics')
+def prometheus_metrics():
+    """Prometheus text exposition of stage timings and pipeline counters.
+
+    Unauthenticated unless METRICS_TOKEN is set (then ``Authorization: Bearer <token>``).
+    """
+    if METRICS_TOKEN and request.headers.get('Authorization', '') != f'Bearer {METRICS_TOKEN}':
+        return jsonify({'success': False, 'error': 'Unauthorized'}), 401
+
+    w = PrometheusWriter('asl_')
+    w.histogram('stage_duration_ms', 'Prediction request time per stage (stage="total" is end to end).',
+                tracer.items())
+    w.histogram('preprocess_stage_ms', 'Preprocessing time per image and stage.',
+                [({'stage': stage}, h) for stage, h in preprocess_pool.stage_ms.items()])
+    if hand_cropper is not None:
+        crops = hand_cropper.stats()
+        w.scalar('hand_crop_frames_total', 'counter', 'Frames by hand-crop outcome (no_hand skips inference).', [
+            ({'outcome': key}, crops[key]) for key in ('found', 'full_frame', 'no_hand')
+        ])
+    w.histogram('batcher_batch_size', 'Rows per micro-batched forward pass.', [(None, batcher.batch_sizes)])
+    w.histogram('batcher_queue_wait_ms', 'Time requests wait for their micro-batch.', [(None, batcher.wait_ms)])
+    w.histogram('batcher_inference_ms', 'Forward pass time per micro-batch.', [(None, batcher.inference_ms)])
+    w.scalar('batcher_queue_depth', 'gauge', 'Requests waiting for inference.', [(None, batcher.stats()['queue_depth'])])
+    w.scalar('batcher_rejected_total', 'counter', 'Requests rejected with a full queue.', [(None, batcher.rejected)])
+    w.histogram('log_flush_ms', 'Prediction log flush (bulk insert, rollups, commit).', [(None, log_writer.flush_ms)])
+    w.scalar('log_records_total', 'counter', 'Prediction log records by outcome.', [
+        ({'outcome': key}, getattr(log_writer, key)) for key in ('enqueued', 'flushed', 'dropped', 'sampled_out')
+    ])
+    cache = prediction_cache.stats()
+    w.scalar('prediction_cache_lookups_total', 'counter', 'Prediction cache lookups by result.', [
+        ({'result': 'hit'}, cache['hits']), ({'result': 'disk_hit'}, cache['disk_hits']),
+        ({'result': 'miss'}, cache['misses']),
+    ])
+    w.histogram('auth_hash_queue_wait_ms', 'Time password hashes wait for a hashing thread.',
+                [(None, password_hasher.wait_ms)])
+    w.histogram('auth_hash_ms', 'bcrypt hash/verify time.', [(None, password_hasher.hash_ms)])
+    w.scalar('auth_rejected_total', 'counter', 'Auth attempts turned away.', [
+        ({'reason': 'hash_queue_full'}, password_hasher.rejected),
+        ({'reason': 'rate_limit_ip'}, auth_ip_limiter.limited),
+        ({'reason': 'rate_limit_email'}, login_email_limiter.limited),
+    ])
+    streaming = stream_sessions.stats()
+    w.scalar('stream_sessions', 'gauge', 'Open WebSocket recognition sessions.', [(None, streaming['active'])])
+    w.scalar('stream_frames_total', 'counter', 'Streamed frames by outcome.', [
+        ({'outcome': key}, streaming[key]) for key in ('received', 'processed', 'dropped', 'skipped', 'errors')
+    ])
+    w.scalar('model_ready', 'gauge', '1 once the model is loaded and warmed up.', [(None, int(model is not None))])
+    return Response(w.render(), mimetype=None, content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@app.get('/api/stats/inference')
+@jwt_required()
+def stats_inference():
+    """Inference pipeline metrics: micro-batching and preprocessing stage timings."""
+    ok, resp = require_admin()
+    if not ok:
+        return resp
+    return jsonify({
+        'success': True,
+        'batcher': batcher.stats(),
+        'workers': model.stats() if isinstance(model, WorkerPool) else None,
+        'preprocessing': preprocess_pool.stats(),
+        'log_writer': log_writer.stats(),
+        'cache': prediction_cache.stats(),
+        'streaming': stream_sessions.stats(),
+        'retention': log_retention.stats(),
+        'user_cache': user_states.stats(),
+        'stages': tracer.stats(),
+        'auth': {
+            'hasher': password_hasher.stats(),
+            'rate_limit_ip': auth_ip_limiter.stats(),
+            'rate_limit_email': login_email_limiter.stats(),
+        },
+        'database': describe_db(),
+    }), 200
 
 
-@app.get('/api/predictions')
-@jwt_required()
-def list_predictions():
-    """List prediction logs with filters. Admin: all; User: own only.
-    Query params:
-      - start (ISO8601), end (ISO8601)
-      - user_id, email
-      - label
-      - min_confidence, max_confidence
-      - success (true/false)
-      - page (default 1), page_size (default 25)
+def _prediction_filters(args, role, uid) -> dict:
+    """Normalize the /api/predictions query-string filters (and role scoping).
+
+    Invalid values are ignored, as before.
     """
-    claims = get_jwt()
-    role = claims.get('role')
-    uid = get_jwt_identity()
+    def parse_float(value):
+        try:
+            return float(value) if value else None
+        except ValueError:
+            return None
 
-    q = db.session.query(PredictionLog)
+    def parse_iso(dt_str):
+        try:
+            return datetime.fromisoformat(dt_str) if dt_str else None
+        except Exception:
+            return None
 
-    # Filters
-    args = request.args
-    start = args.get('start')
-    end = args.get('end')
-    user_id = args.get('user_id')
-    email = args.get('email')
-    label = args.get('label')
-    min_conf = args.get('min_confidence')
-    max_conf = args.get('max_confidence')
-    success = args.get('success')
+    filters = {
+        'user_id': None,
+        'label': args.get('label') or None,
+        'min_confidence': parse_float(args.get('min_confidence')),
+        'max_confidence': parse_float(args.get('max_confidence')),
+        'success': None,
+        'start': parse_iso(args.get('start')),
+        'end': parse_iso(args.get('end')),
+    }
 
     # Restrict by role
     if role != 'admin':
-        q = q.filter(PredictionLog.user_id == uid)
+        filters['user_id'] = uid
     else:
+        user_id = args.get('user_id')
+        email = args.get('email')
         if user_id:
             try:
-                q = q.filter(PredictionLog.user_id == int(user_id))
+                filters['user_id'] = int(user_id)
             except ValueError:
                 pass
         if email:
             u = db.session.query(User).filter(User.email == email.lower()).first()
-            if u:
-                q = q.filter(PredictionLog.user_id == u.id)
-            else:
-                q = q.filter(PredictionLog.user_id == -1)  # no results
-
-    if label:
-        q = q.filter(PredictionLog.label == label)
-    if min_conf:
-        try:
-            q = q.filter(PredictionLog.confidence >= float(min_conf))
-        except ValueError:
-            pass
-    if max_conf:
-        try:
-            q = q.filter(PredictionLog.confidence <= float(max_conf))
-        except ValueError:
-            pass
+            filters['user_id'] = u.id if u else -1  # -1: no results
+
+    success = args.get('success')
     if success is not None:
         if success.lower() in ('true', '1'):
-            q = q.filter(PredictionLog.success.is_(True))
+            filters['success'] = True
         elif success.lower() in ('false', '0'):
-            q = q.filter(PredictionLog.success.is_(False))
+            filters['success'] = False
+    return filters
+
+
+def _filter_predictions(q, filters: dict):
+    """Apply normalized filters (see _prediction_filters) to a PredictionLog query."""
+    if filters['user_id'] is not None:
+        q = q.filter(PredictionLog.user_id == filters['user_id'])
+    if filters['label']:
+        q = q.filter(PredictionLog.label == filters['label'])
+    if filters['min_confidence'] is not None:
+        q = q.filter(PredictionLog.confidence >= filters['min_confidence'])
+    if filters['max_confidence'] is not None:
+        q = q.filter(PredictionLog.confidence <= filters['max_confidence'])
+    if filters['success'] is not None:
+        q = q.filter(PredictionLog.success.is_(filters['success']))
+    if filters['start']:
+        q = q.filter(PredictionLog.timestamp >= filters['start'])
+    if filters['end']:
+        q = q.filter(PredictionLog.timestamp <= filters['end'])
+    return q
 
-    # Date range
-    def parse_iso(dt_str: str):
-        try:
-            return datetime.fromisoformat(dt_str)
-        except Exception:
-            return None
 
-    if start:
-        sdt = parse_iso(start)
-        if sdt:
-            q = q.filter(PredictionLog.timestamp >= sdt)
-    if end:
-        edt = parse_iso(end)
-        if edt:
-            q = q.filter(PredictionLog.timestamp <= edt)
+@app.get('/api/predictions')
+@jwt_required()
+def list_predictions():
+    """List prediction logs with filters. Admin: all; User: own only.
+    Query params:
+      - start (ISO8601), end (ISO8601)
+      - user_id, email
+      - label
+      - min_confidence, max_confidence
+      - success (true/false)
+      - cursor (from the previous page's next_cursor), page_size (default 25)
+      - total (none | estimate | exact; default none, exact with page)
+      - page: legacy OFFSET pagination, slow on deep pages
+      - include_archive (true/false): continue into archived logs once the
+        hot table is exhausted (cursor mode only; totals cover the hot table)
+    """
+    args = request.args
+    filters = _prediction_filters(args, current_role(), get_jwt_identity())
+    q = _filter_predictions(db.session.query(PredictionLog), filters)
 
     # Pagination
-    try:
-        page = max(int(args.get('page', 1)), 1)
-    except ValueError:
-        page = 1
     try:
         page_size = min(max(int(args.get('page_size', 25)), 1), 200)
     except ValueError:
         page_size = 25
-    total = q.count()
-    items = (
-        q.order_by(PredictionLog.timestamp.desc())
-        .offset((page - 1) * page_size)
-        .limit(page_size)
-        .all()
+    total_mode = args.get('total', 'exact' if 'page' in args else 'none')
+    if total_mode not in TOTAL_MODES:
+        return jsonify({'success': False, 'error': f"total must be one of {', '.join(TOTAL_MODES)}"}), 400
+
+    response = {'success': True, 'page_size': page_size}
+    response.update(count_rows(q, total_mode))
+
+    if 'page' in args:
+        try:
+            page = max(int(args.get('page', 1)), 1)
+        except ValueError:
+            page = 1
+        items = (
+            q.order_by(PredictionLog.timestamp.desc(), PredictionLog.id.desc())
+            .offset((page - 1) * page_size)
+            .limit(page_size)
+            .all()
+        )
+        response['page'] = page
+        response['next_cursor'] = (
+            encode_cursor(items[-1].timestamp, items[-1].id) if len(items) == page_size else None
+        )
+    else:
+        try:
+            items, response['next_cursor'] = keyset_page(q, page_size, args.get('cursor'))
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+
+    items = [i.to_dict() for i in items]
+    if args.get('include_archive', '').lower() in ('true', '1') and 'page' not in args \
+            and response['next_cursor'] is None:
+        # Hot rows ran out on this page; fill the rest from the archive
+        before = decode_cursor(args['cursor']) if args.get('cursor') else None
+        if items:
+            before = (datetime.fromisoformat(items[-1]['timestamp']), items[-1]['id'])
+        archived = log_retention.query(filters, page_size - len(items) + 1, before)
+        items.extend(archived_to_dict(r) for r in archived)
+        if len(items) > page_size:
+            items = items[:page_size]
+            last = items[-1]
+            response['next_cursor'] = encode_cursor(datetime.fromisoformat(last['timestamp']), last['id'])
+
+    response['items'] = items
+    return jsonify(response), 200
+
+
+@app.get('/api/predictions/export')
+@jwt_required()
+def export_predictions():
+    """Stream every matching prediction log (admin only).
+    Query params: the /api/predictions filters, plus
+      - format: ndjson (default) | csv | parquet (needs pyarrow)
+    """
+    ok, resp = require_admin()
+    if not ok:
+        return resp
+    fmt = request.args.get('format', 'ndjson').lower()
+    try:
+        check_format(fmt)
+    except ExportError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    filters = _prediction_filters(request.args, 'admin', get_jwt_identity())
+    q = _filter_predictions(db.session.query(PredictionLog), filters)
+    filename = f"predictions-{datetime.utcnow():%Y%m%dT%H%M%S}.{fmt}"
+    return Response(
+        stream_with_context(export_stream(q, fmt, chunk=EXPORT_CHUNK_ROWS)),
+        mimetype=EXPORT_FORMATS[fmt],
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'},
     )
 
-    return jsonify({
-        'success': True,
-        'total': total,
-        'page': page,
-        'page_size': page_size,
-        'items': [i.to_dict() for i in items]
-    }), 200
+
+APP_IMPORT_MS = (time.perf_counter() - PROCESS_START) * 1000.0
+logger.info(f"App ready to serve in {APP_IMPORT_MS:.0f} ms (model loading continues in background)")
 
 
 if __name__ == '__main__':
@@ -584,4 +1338,6 @@ if __name__ == '__main__':
     # Initialize database tables
     with app.app_context():
         db.create_all()
+        ensure_indexes()
+        ensure_rollups()
     app.run(host='0.0.0.0', port=5001, debug=True)
@@ -0,0 +1,202 @@
+"""
+Pluggable inference backends.
+
+The same classifier can be served from the original Keras ``.h5`` file, a
+converted TFLite flatbuffer or an ONNX graph (optionally post-training INT8
+quantized; see ``convert_model.py``). Every backend takes a
+``(N, 224, 224, 3)`` batch, either uint8 pixels or float32 in [0, 1], and
+returns ``(N, 29)`` probabilities. uint8 batches (what the API sends: a
+quarter of the bytes through the batcher and worker shared memory) are
+scaled one ``batch_size`` chunk at a time right before the forward pass.
+Heavy runtimes are imported only when their backend is selected.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from typing import Optional
+
+import numpy as np
+
+from preprocessing import PIXEL_SCALE
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("keras", "tflite", "onnx")
+_EXTENSIONS = {"keras": ".h5", "tflite": ".tflite", "onnx": ".onnx"}
+
+
+def artifact_path(kind: str, keras_path: str, int8: bool = False) -> str:
+    """Conventional artifact path for ``kind`` next to the Keras model.
+
+    ``asl_mobilenetv2.h5`` -> ``asl_mobilenetv2.tflite`` / ``asl_mobilenetv2_int8.onnx`` ...
+    """
+    if kind == "keras":
+        return keras_path
+    stem, _ = os.path.splitext(keras_path)
+    return f"{stem}{'_int8' if int8 else ''}{_EXTENSIONS[kind]}"
+
+
+class InferenceBackend:
+    """Base class: subclasses implement :meth:`_predict` for one batch."""
+
+    name = "base"
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _predict(self, batch: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    @staticmethod
+    def _prepare(batch: np.ndarray) -> np.ndarray:
+        """float32 in [0, 1]: uint8 pixels are scaled, float input passes through."""
+        if batch.dtype == np.uint8:
+            return np.multiply(batch, PIXEL_SCALE, dtype=np.float32)
+        return np.asarray(batch, dtype=np.float32)
+
+    def predict(self, batch: np.ndarray, batch_size: Optional[int] = None) -> np.ndarray:
+        """Run inference, splitting into chunks of at most ``batch_size`` rows."""
+        batch = np.asarray(batch)
+        if not batch_size or len(batch) <= batch_size:
+            return self._predict(self._prepare(batch))
+        first = self._predict(self._prepare(batch[:batch_size]))
+        out = np.empty((len(batch),) + first.shape[1:], dtype=first.dtype)
+        out[:batch_size] = first
+        for start in range(batch_size, len(batch), batch_size):
+            out[start:start + batch_size] = self._predict(self._prepare(batch[start:start + batch_size]))
+        return out
+
+    def describe(self) -> dict:
+        return {"backend": self.name, "path": self.path}
+
+
+class KerasBackend(InferenceBackend):
+    name = "keras"
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        from tensorflow.keras.models import load_model
+
+        self.model = load_model(path)
+
+    def _predict(self, batch: np.ndarray) -> np.ndarray:
+        return np.asarray(self.model.predict(batch, verbose=0))
+
+
+class TFLiteBackend(InferenceBackend):
+    """TFLite interpreter (``tflite_runtime`` if installed, else ``tf.lite``).
+
+    Handles quantized (int8/uint8) input and output tensors transparently.
+    """
+
+    name = "tflite"
+
+    def __init__(self, path: str, num_threads: Optional[int] = None):
+        super().__init__(path)
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            from tensorflow.lite import Interpreter
+
+        self.interpreter = Interpreter(model_path=path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch = int(self._input["shape"][0])
+
+    def _resize(self, n: int) -> None:
+        if n == self._batch:
+            return
+        shape = list(self._input["shape"])
+        shape[0] = n
+        self.interpreter.resize_tensor_input(self._input["index"], shape)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]
+        self._output = self.interpreter.get_output_details()[0]
+        self._batch = n
+
+    def _predict(self, batch: np.ndarray) -> np.ndarray:
+        self._resize(len(batch))
+        dtype = self._input["dtype"]
+        if dtype != np.float32:
+            scale, zero_point = self._input["quantization"]
+            batch = np.clip(np.round(batch / scale + zero_point), np.iinfo(dtype).min, np.iinfo(dtype).max)
+        self.interpreter.set_tensor(self._input["index"], batch.astype(dtype, copy=False))
+        self.interpreter.invoke()
+        out = self.interpreter.get_tensor(self._output["index"])
+        if self._output["dtype"] != np.float32:
+            scale, zero_point = self._output["quantization"]
+            out = (out.astype(np.float32) - zero_point) * scale
+        return out.copy()
+
+
+class OnnxBackend(InferenceBackend):
+    name = "onnx"
+
+    def __init__(self, path: str, num_threads: Optional[int] = None):
+        super().__init__(path)
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+        self._input_name = self.session.get_inputs()[0].name
+
+    def _predict(self, batch: np.ndarray) -> np.ndarray:
+        return self.session.run(None, {self._input_name: batch})[0]
+
+
+def load_backend(kind: str = "keras", path: Optional[str] = None, keras_path: str = "asl_mobilenetv2.h5",
+                 int8: bool = False, num_threads: Optional[int] = None) -> InferenceBackend:
+    """Instantiate a backend by name.
+
+    ``path`` defaults to the conventional artifact next to ``keras_path``
+    (see :func:`artifact_path`).
+    """
+    kind = (kind or "keras").lower()
+    if kind not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{kind}' (expected one of {', '.join(BACKENDS)})")
+    path = path or artifact_path(kind, keras_path, int8)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Model artifact not found: {path}")
+    if kind == "keras":
+        return KerasBackend(path)
+    if kind == "tflite":
+        return TFLiteBackend(path, num_threads=num_threads)
+    return OnnxBackend(path, num_threads=num_threads)
+
+
+def _int8_from_env() -> bool:
+    return os.environ.get("INFERENCE_INT8", "").lower() in ("1", "true", "yes")
+
+
+def shared_backend_kind(keras_path: str) -> str:
+    """Default backend for several processes serving the same model.
+
+    The TFLite interpreter memory-maps its flatbuffer, so processes share the
+    weights through the page cache; Keras and ONNX Runtime copy them into
+    each process. Uses TFLite when its artifact exists next to ``keras_path``
+    and neither ``INFERENCE_BACKEND`` nor ``INFERENCE_MODEL_PATH`` is set.
+    """
+    if os.environ.get("INFERENCE_BACKEND") or os.environ.get("INFERENCE_MODEL_PATH"):
+        return os.environ.get("INFERENCE_BACKEND") or "keras"
+    if os.path.exists(artifact_path("tflite", keras_path, _int8_from_env())):
+        return "tflite"
+    return "keras"
+
+
+def backend_from_env(keras_path: str, default: str = "keras") -> InferenceBackend:
+    """Backend selected by ``INFERENCE_BACKEND`` (else ``default``) /
+    ``INFERENCE_MODEL_PATH`` / ``INFERENCE_INT8`` / ``INFERENCE_THREADS``."""
+    threads = int(os.environ.get("INFERENCE_THREADS", "0")) or None
+    return load_backend(
+        os.environ.get("INFERENCE_BACKEND") or default,
+        path=os.environ.get("INFERENCE_MODEL_PATH") or None,
+        keras_path=keras_path,
+        int8=_int8_from_env(),
+        num_threads=threads,
+    )
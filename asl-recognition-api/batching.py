@@ -0,0 +1,250 @@
+"""
+Dynamic micro-batching for model inference.
+
+Concurrent requests submit single preprocessed tensors; a worker thread
+collects them into one batch (bounded by ``max_batch_size`` and
+``max_wait_ms``), runs a single forward pass and hands every caller its own
+row of the output. Requests whose caller timed out are cancelled and left
+out of the batch, so they neither use a batch slot nor read a buffer the
+caller has since reused.
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+from metrics import Histogram, LATENCY_BUCKETS_MS
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+class BatcherOverloaded(RuntimeError):
+    """Raised when the pending-request queue is full."""
+
+
+class _Pending:
+    __slots__ = ("tensor", "future", "copied", "enqueued_at", "dispatched_at", "finished_at")
+
+    def __init__(self, tensor: np.ndarray):
+        self.tensor = tensor
+        self.future: Future = Future()
+        # Set once ``tensor`` has been copied into a batch and may be reused by the caller
+        self.copied = threading.Event()
+        self.enqueued_at = time.perf_counter()
+        self.dispatched_at = 0.0
+        self.finished_at = 0.0
+
+
+class MicroBatcher:
+    """Combine concurrent single-image predictions into batched forward passes.
+
+    Args:
+        predict_fn: Callable taking an ``(N, H, W, C)`` array and returning
+            an ``(N, num_classes)`` array.
+        max_batch_size: Upper bound on rows per forward pass.
+        max_wait_ms: How long the first queued request may wait for others
+            to join its batch.
+        max_queue_size: Pending requests allowed before ``submit`` rejects.
+        max_inflight: Batches allowed in flight at once. ``1`` runs each
+            forward pass on the scheduler thread; higher values suit a
+            ``predict_fn`` backed by several worker processes.
+    """
+
+    def __init__(
+        self,
+        predict_fn: Callable[[np.ndarray], np.ndarray],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 2.0,
+        max_queue_size: int = 256,
+        max_inflight: int = 1,
+    ):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queue: "queue.Queue[_Pending]" = queue.Queue(maxsize=max(1, int(max_queue_size)))
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._buffer: Optional[np.ndarray] = None
+        self.max_inflight = max(1, int(max_inflight))
+        self._dispatch: Optional[ThreadPoolExecutor] = None
+        self._inflight = threading.BoundedSemaphore(self.max_inflight)
+
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.wait_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.inference_ms = Histogram(LATENCY_BUCKETS_MS)
+        self.peak_queue_depth = 0
+        self.rejected = 0
+        self.cancelled = 0
+        self.batches = 0
+
+    # ----- public API -----
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            if self.max_inflight > 1 and self._dispatch is None:
+                self._dispatch = ThreadPoolExecutor(self.max_inflight, thread_name_prefix="batch-dispatch")
+            self._thread = threading.Thread(target=self._run, name="micro-batcher", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._dispatch is not None:
+            self._dispatch.shutdown(wait=True)
+            self._dispatch = None
+        # Fail anything still waiting so callers don't hang
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item.future.set_running_or_notify_cancel():
+                item.future.set_exception(RuntimeError("Micro-batcher stopped"))
+
+    def submit(self, tensor: np.ndarray) -> Future:
+        """Queue one ``(H, W, C)`` tensor; the future resolves to its output row."""
+        return self._submit(tensor).future
+
+    def _submit(self, tensor: np.ndarray) -> _Pending:
+        if self._thread is None:
+            self.start()
+        item = _Pending(tensor)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.rejected += 1
+            raise BatcherOverloaded("Inference queue is full")
+        depth = self._queue.qsize()
+        if depth > self.peak_queue_depth:
+            self.peak_queue_depth = depth
+        return item
+
+    def predict(self, tensor: np.ndarray, timeout: Optional[float] = None,
+                timings: Optional[dict] = None) -> np.ndarray:
+        """Blocking convenience wrapper around :meth:`submit`.
+
+        ``timings`` receives this request's ``queue_wait`` and ``inference``
+        milliseconds (the latter is its batch's forward pass).
+        """
+        item = self._submit(tensor)
+        try:
+            result = item.future.result(timeout=timeout)
+        except FutureTimeoutError:
+            if not item.future.cancel():
+                # Already taken into a batch: wait for the copy so the caller can reuse its buffer
+                item.copied.wait()
+            raise
+        if timings is not None:
+            timings["queue_wait"] = (item.dispatched_at - item.enqueued_at) * 1000.0
+            timings["inference"] = (item.finished_at - item.dispatched_at) * 1000.0
+        return result
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "max_inflight": self.max_inflight,
+            "queue_depth": self._queue.qsize(),
+            "peak_queue_depth": self.peak_queue_depth,
+            "rejected": self.rejected,
+            "cancelled": self.cancelled,
+            "batches": self.batches,
+            "batch_size": self.batch_sizes.snapshot(),
+            "queue_wait_ms": self.wait_ms.snapshot(),
+            "inference_ms": self.inference_ms.snapshot(),
+        }
+
+    # ----- worker -----
+
+    def _collect(self, first: _Pending) -> list[_Pending]:
+        batch = [first]
+        deadline = first.enqueued_at + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining <= 0:
+                    # Past the deadline: only take what is already waiting
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _stack(self, batch: list[_Pending]) -> np.ndarray:
+        first = batch[0].tensor
+        shape = (self.max_batch_size,) + first.shape
+        if self._buffer is None or self._buffer.shape != shape or self._buffer.dtype != first.dtype:
+            self._buffer = np.empty(shape, dtype=first.dtype)
+        for i, item in enumerate(batch):
+            self._buffer[i] = item.tensor
+        return self._buffer[: len(batch)]
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                first = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            batch = self._collect(first)
+            # Drop requests whose caller already gave up; the rest can no longer be cancelled
+            live = [item for item in batch if item.future.set_running_or_notify_cancel()]
+            self.cancelled += len(batch) - len(live)
+            if not live:
+                continue
+            batch = live
+
+            dispatched_at = time.perf_counter()
+            for item in batch:
+                item.dispatched_at = dispatched_at
+                self.wait_ms.observe((dispatched_at - item.enqueued_at) * 1000.0)
+            self.batch_sizes.observe(len(batch))
+            self.batches += 1
+
+            if self._dispatch is None:
+                tensors = self._stack(batch)
+            else:
+                # The shared stacking buffer is busy while other batches run
+                self._inflight.acquire()
+                tensors = np.stack([item.tensor for item in batch])
+            for item in batch:
+                item.copied.set()
+            if self._dispatch is None:
+                self._execute(batch, tensors, dispatched_at)
+            else:
+                self._dispatch.submit(self._execute, batch, tensors, dispatched_at, True)
+
+    def _execute(self, batch: list[_Pending], tensors: np.ndarray, dispatched_at: float,
+                 release: bool = False) -> None:
+        try:
+            outputs = self.predict_fn(tensors)
+        except Exception as e:
+            logger.error(f"Batched inference failed: {e}")
+            for item in batch:
+                item.future.set_exception(e)
+            return
+        finally:
+            finished_at = time.perf_counter()
+            self.inference_ms.observe((finished_at - dispatched_at) * 1000.0)
+            if release:
+                self._inflight.release()
+
+        for i, item in enumerate(batch):
+            item.finished_at = finished_at
+            item.future.set_result(outputs[i])
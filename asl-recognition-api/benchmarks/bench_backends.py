@@ -0,0 +1,78 @@
+"""
+CPU latency/throughput of every available inference backend.
+
+Artifacts are looked up next to the Keras model (create them with
+``convert_model.py convert ...``); missing ones are skipped.
+
+Usage:
+    python benchmarks/bench_backends.py --model asl_mobilenetv2.h5 --threads 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+import common  # noqa: F401  (puts the API modules on sys.path)
+
+from backends import artifact_path, load_backend
+
+
+def bench(backend, single_iters: int, batch: int, batch_iters: int) -> dict:
+    rng = np.random.default_rng(0)
+    one = rng.random((1, 224, 224, 3), dtype=np.float32)
+    many = rng.random((batch, 224, 224, 3), dtype=np.float32)
+    backend.predict(one)
+    backend.predict(many)
+
+    latencies = []
+    for _ in range(single_iters):
+        t0 = time.perf_counter()
+        backend.predict(one)
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+
+    t0 = time.perf_counter()
+    for _ in range(batch_iters):
+        backend.predict(many)
+    elapsed = time.perf_counter() - t0
+
+    return {
+        "batch1_ms": common.percentiles(latencies),
+        "batch1_images_per_s": 1000.0 / float(np.mean(latencies)),
+        f"batch{batch}_images_per_s": batch * batch_iters / elapsed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="asl_mobilenetv2.h5", help="Keras model (stand-in used if missing)")
+    parser.add_argument("--threads", type=int, default=None, help="Intra-op threads for TFLite/ONNX")
+    parser.add_argument("--iters", type=int, default=100, help="Batch-1 iterations")
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--batch-iters", type=int, default=10)
+    args = parser.parse_args()
+
+    keras_path = args.model if os.path.exists(args.model) else common.standin_model_file()
+    candidates = [("keras", False), ("tflite", False), ("tflite", True), ("onnx", False), ("onnx", True)]
+    report = {}
+    for kind, int8 in candidates:
+        path = artifact_path(kind, keras_path, int8)
+        name = f"{kind}{'_int8' if int8 else ''}"
+        if not os.path.exists(path):
+            report[name] = {"skipped": f"{path} not found"}
+            continue
+        try:
+            backend = load_backend(kind, path, num_threads=args.threads)
+        except ImportError as e:
+            report[name] = {"skipped": f"runtime not installed ({e})"}
+            continue
+        report[name] = bench(backend, args.iters, args.batch, args.batch_iters)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Compare base64/JSON uploads with raw-bytes and multipart uploads.
+
+Reports bytes on the wire and server CPU time per frame for:
+  - POST /api/predict           (base64 inside JSON)
+  - POST /api/predict/raw       (raw JPEG body)
+  - POST /api/predict-batch     (base64 list inside JSON)
+  - POST /api/predict-batch/multipart
+
+The prediction cache is disabled so every frame is decoded and classified.
+
+Usage:
+    python benchmarks/bench_binary_upload.py --frames 64
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import time
+
+from common import import_app, synthetic_jpegs
+
+
+def multipart_body(frames: list[bytes], boundary: str = "asl-bench-boundary") -> tuple[bytes, str]:
+    parts = []
+    for i, frame in enumerate(frames):
+        parts.append(
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="images"; filename="f{i}.jpg"\r\n'
+            "Content-Type: image/jpeg\r\n\r\n".encode() + frame + b"\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+def measure(client, requests: list[tuple[str, bytes, str]], frames: int) -> dict:
+    wire = sum(len(body) for _, body, _ in requests)
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    for url, body, content_type in requests:
+        resp = client.post(url, data=body, content_type=content_type)
+        assert resp.status_code == 200, resp.get_data(as_text=True)
+    cpu, wall = time.process_time() - cpu0, time.perf_counter() - wall0
+    return {
+        "bytes_on_wire": wire,
+        "bytes_per_frame": wire / frames,
+        "cpu_ms_per_frame": cpu * 1000.0 / frames,
+        "wall_ms_per_frame": wall * 1000.0 / frames,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="asl_mobilenetv2.h5", help="Keras model (stand-in used if missing)")
+    parser.add_argument("--frames", type=int, default=64)
+    parser.add_argument("--batch", type=int, default=16, help="Frames per batch request")
+    parser.add_argument("--database-url", help="Log to this database instead of a throwaway SQLite file")
+    args = parser.parse_args()
+
+    app_module = import_app(args.model, database_url=args.database_url, PREDICTION_CACHE_ENTRIES="0")
+    client = app_module.app.test_client()
+
+    frames = synthetic_jpegs(args.frames)
+    b64 = [base64.b64encode(f).decode() for f in frames]
+    chunks = [range(i, min(i + args.batch, args.frames)) for i in range(0, args.frames, args.batch)]
+
+    modes = {
+        "json_base64": [
+            ("/api/predict", json.dumps({"image": s}).encode(), "application/json") for s in b64
+        ],
+        "raw_bytes": [("/api/predict/raw", f, "image/jpeg") for f in frames],
+        "batch_json_base64": [
+            ("/api/predict-batch", json.dumps({"images": [b64[i] for i in c]}).encode(), "application/json")
+            for c in chunks
+        ],
+        "batch_multipart": [
+            ("/api/predict-batch/multipart",) + multipart_body([frames[i] for i in c]) for c in chunks
+        ],
+    }
+
+    # Warm up the model and request path
+    for requests in modes.values():
+        measure(client, requests[:1], 1)
+
+    report = {name: measure(client, requests, args.frames) for name, requests in modes.items()}
+    report["wire_savings_single"] = 1 - report["raw_bytes"]["bytes_on_wire"] / report["json_base64"]["bytes_on_wire"]
+    report["wire_savings_batch"] = 1 - report["batch_multipart"]["bytes_on_wire"] / report["batch_json_base64"]["bytes_on_wire"]
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Mixed predict/log-query load against SQLite (default vs tuned) and PostgreSQL.
+
+Writer threads replay what the prediction path commits (a small bulk insert
+of log records plus the rollup upserts, as ``log_writer`` does per flush);
+reader threads page through a user's history and read dashboard stats. Each
+configuration gets its own freshly seeded database, since WAL mode persists
+in the file. Reports throughput, latency percentiles and "database is
+locked" errors per operation.
+
+Usage:
+    python benchmarks/bench_db_concurrency.py --duration 20 --writers 8 --readers 16
+    python benchmarks/bench_db_concurrency.py --postgres-url postgresql+psycopg://localhost/asl_bench
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import common
+
+from sqlalchemy import insert
+from sqlalchemy.exc import OperationalError
+
+from db_config import describe
+from models import db, PredictionLog, ensure_indexes
+from pagination import keyset_page
+from rollups import apply_rollups, rebuild_rollups, rollup_summary
+
+LABELS = [chr(ord('A') + i) for i in range(26)] + ['del', 'nothing', 'space']
+
+
+def write_op(rng: random.Random, users: int, batch: int) -> None:
+    now = datetime.utcnow()
+    records = [
+        {
+            "user_id": rng.randint(1, users),
+            "timestamp": now,
+            "label": rng.choice(LABELS),
+            "confidence": rng.random(),
+            "latency_ms": rng.gammavariate(2.0, 10.0),
+            "success": True,
+        }
+        for _ in range(batch)
+    ]
+    db.session.execute(insert(PredictionLog), records)
+    apply_rollups(records)
+    db.session.commit()
+
+
+def history_op(rng: random.Random, users: int) -> None:
+    q = db.session.query(PredictionLog).filter(PredictionLog.user_id == rng.randint(1, users))
+    _, cursor = keyset_page(q, 25)
+    if cursor:
+        keyset_page(q, 25, cursor)
+    db.session.rollback()
+
+
+def stats_op(rng: random.Random, users: int) -> None:
+    rollup_summary(datetime.utcnow() - timedelta(hours=24))
+    db.session.rollback()
+
+
+def run_config(name: str, url: str, tuned: bool, args) -> dict:
+    app = common.db_app(url, tuned=tuned)
+    with app.app_context():
+        ensure_indexes()
+    common.generate_prediction_logs(app, args.rows, users=args.users, days=7)
+    with app.app_context():
+        rebuild_rollups()
+        settings = describe()
+
+    samples: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, int] = defaultdict(int)
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def worker(op: str, fn, seed: int) -> None:
+        rng = random.Random(seed)
+        local: list[float] = []
+        failed = 0
+        with app.app_context():
+            while not stop.is_set():
+                t0 = time.perf_counter()
+                try:
+                    fn(rng)
+                except OperationalError:
+                    db.session.rollback()
+                    failed += 1
+                    continue
+                local.append((time.perf_counter() - t0) * 1000.0)
+            db.session.remove()
+        with lock:
+            samples[op].extend(local)
+            errors[op] += failed
+
+    threads = [threading.Thread(target=worker, args=("write", lambda r: write_op(r, args.users, args.batch), i))
+               for i in range(args.writers)]
+    for i in range(args.readers):
+        op, fn = ("history", history_op) if i % 2 == 0 else ("stats", stats_op)
+        threads.append(threading.Thread(target=worker, args=(op, lambda r, fn=fn: fn(r, args.users), 1000 + i)))
+
+    for t in threads:
+        t.start()
+    time.sleep(args.duration)
+    stop.set()
+    for t in threads:
+        t.join()
+
+    result = {"database": settings, "operations": {}}
+    for op in ("write", "history", "stats"):
+        done = samples.get(op, [])
+        result["operations"][op] = {
+            "ops_per_s": len(done) / args.duration,
+            "errors": errors.get(op, 0),
+            **common.percentiles(done),
+        }
+    print(name, json.dumps(result["operations"]))
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds per configuration")
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--batch", type=int, default=5, help="Log records per write transaction")
+    parser.add_argument("--rows", type=int, default=200_000, help="Rows seeded before the run")
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--postgres-url", help="Also run against this (empty) PostgreSQL database")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="asl-dbbench-")
+    configs = [
+        ("sqlite-default", f"sqlite:///{workdir}/default.db", False),
+        ("sqlite-tuned", f"sqlite:///{workdir}/tuned.db", True),
+    ]
+    if args.postgres_url:
+        configs.append(("postgres-tuned", args.postgres_url, True))
+
+    results = {name: run_config(name, url, tuned, args) for name, url, tuned in configs}
+    print(json.dumps({
+        "writers": args.writers, "readers": args.readers, "batch": args.batch,
+        "seed_rows": args.rows, "duration_s": args.duration, "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
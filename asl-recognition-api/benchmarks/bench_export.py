@@ -0,0 +1,104 @@
+"""
+Memory use of /api/predictions/export while streaming millions of rows.
+
+Reuses (or generates) the SQLite log table from ``bench_pagination.py`` and
+drains the export stream for each format, sampling the process RSS. Peak
+RSS growth should stay flat as ``--rows`` grows; the ``to_dict`` baseline
+(how /api/predictions builds responses) is run on ``--baseline-rows`` rows
+for comparison.
+
+Usage:
+    python benchmarks/bench_export.py --rows 5000000 --db /tmp/asl-pagination.db
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import threading
+import time
+
+import common
+
+from export import EXPORT_FORMATS, ExportError, check_format, export_stream
+from models import db, PredictionLog
+
+
+def rss_mb() -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024.0
+    return 0.0
+
+
+def measure(fn) -> dict:
+    """Run ``fn`` while sampling RSS; returns elapsed time and peak growth."""
+    base = rss_mb()
+    peak = [base]
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(0.02):
+            peak[0] = max(peak[0], rss_mb())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    t0 = time.perf_counter()
+    out = fn()
+    elapsed = time.perf_counter() - t0
+    done.set()
+    sampler.join()
+    return {"seconds": elapsed, "rss_start_mb": base, "rss_peak_growth_mb": max(peak[0], rss_mb()) - base, **out}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--db", default="/tmp/asl-pagination.db", help="SQLite file (reused if already populated)")
+    parser.add_argument("--chunk", type=int, default=5000, help="Rows per yield_per chunk")
+    parser.add_argument("--baseline-rows", type=int, default=500_000)
+    args = parser.parse_args()
+
+    app = common.db_app(f"sqlite:///{os.path.abspath(args.db)}")
+    with app.app_context():
+        existing = db.session.query(PredictionLog).count()
+    if existing < args.rows:
+        print(f"Generating {args.rows - existing} rows into {args.db} ...")
+        common.generate_prediction_logs(app, args.rows - existing, seed=existing)
+
+    results = {}
+    with app.app_context():
+        q = db.session.query(PredictionLog).filter(PredictionLog.id <= args.rows)
+        for fmt in EXPORT_FORMATS:
+            try:
+                check_format(fmt)
+            except ExportError as e:
+                print(f"{fmt}: skipped ({e})")
+                continue
+
+            def drain():
+                size = 0
+                for part in export_stream(q, fmt, chunk=args.chunk):
+                    size += len(part)
+                return {"bytes": size}
+
+            results[fmt] = measure(drain)
+            results[fmt]["rows_per_s"] = args.rows / results[fmt]["seconds"]
+            print(fmt, json.dumps(results[fmt]))
+
+        if args.baseline_rows:
+            baseline_q = db.session.query(PredictionLog).filter(PredictionLog.id <= args.baseline_rows)
+            results["to_dict_baseline"] = measure(
+                lambda: {"bytes": len(json.dumps([i.to_dict() for i in baseline_q.all()]))}
+            )
+            results["to_dict_baseline"]["rows"] = args.baseline_rows
+            db.session.expunge_all()
+            print("to_dict_baseline", json.dumps(results["to_dict_baseline"]))
+
+    print(json.dumps({"rows": args.rows, "chunk": args.chunk, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Effect of the hand-crop stage (``hand_crop.py``) on accuracy, latency and skipped frames.
+
+Every image is classified two ways:
+
+    full   the whole frame resized to 224x224 (the /api/predict default)
+    crop   the skin-coloured hand region, cropped and resized; frames
+           without one are answered 'nothing' without a forward pass
+
+With ``--dataset`` (one sub-directory per label, e.g. the ASL Alphabet
+test set: ``A/``, ``B/``, ..., ``nothing/``, ``space/``), accuracy is
+reported for both modes, overall and on 'nothing' frames. Without it,
+synthetic frames are used: half contain a skin-toned hand shape and half
+are background only. These give the skip rate and the share of hand
+frames wrongly skipped, but no accuracy. Latency is per frame, including
+the hand search and the forward pass if one runs.
+
+Usage:
+    python benchmarks/bench_hand_crop.py --dataset asl_alphabet_test/ --model asl_mobilenetv2.h5
+    python benchmarks/bench_hand_crop.py --frames 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+import common
+
+from hand_crop import HandCropper, nothing_probs
+from preprocessing import IMG_SIZE
+
+LABELS = [chr(ord('A') + i) for i in range(26)] + ['del', 'nothing', 'space']
+NOTHING = LABELS.index('nothing')
+
+
+def load_dataset(root: str, limit: int) -> list[tuple[np.ndarray, int]]:
+    samples = []
+    for label in sorted(os.listdir(root)):
+        folder = os.path.join(root, label)
+        if label not in LABELS or not os.path.isdir(folder):
+            continue
+        for name in sorted(os.listdir(folder))[:limit]:
+            img = cv2.imread(os.path.join(folder, name), cv2.IMREAD_COLOR)
+            if img is not None:
+                samples.append((img, LABELS.index(label)))
+    return samples
+
+
+def synthetic_frames(n: int, seed: int = 0) -> list[tuple[np.ndarray, int]]:
+    """Background-only frames (label 'nothing') and frames with a hand-like blob (label -1: unknown)."""
+    rng = np.random.default_rng(seed)
+    samples = []
+    for i in range(n):
+        bg = cv2.GaussianBlur(rng.integers(0, 120, (480, 640, 3), dtype=np.uint8), (21, 21), 0)
+        bg[..., 1] = np.maximum(bg[..., 1], bg[..., 2])  # keep the background out of the skin range
+        if i % 2:
+            center = (int(rng.integers(150, 490)), int(rng.integers(150, 330)))
+            skin = tuple(int(v) for v in rng.integers((90, 120, 170), (140, 170, 230)))
+            cv2.ellipse(bg, center, (int(rng.integers(40, 80)), int(rng.integers(70, 120))),
+                        float(rng.integers(0, 180)), 0, 360, skin, -1)
+            samples.append((bg, -1))
+        else:
+            samples.append((bg, NOTHING))
+    return samples
+
+
+def run(model, samples, cropper=None) -> dict:
+    row = np.empty((1, IMG_SIZE[1], IMG_SIZE[0], 3), dtype=np.uint8)
+    nothing = nothing_probs(len(LABELS), NOTHING)
+    latencies, predictions, skipped = [], [], []
+    for img, _ in samples:
+        t0 = time.perf_counter()
+        region = img if cropper is None else cropper.crop(img)
+        if region is None:
+            probs = nothing
+        else:
+            cv2.resize(region, IMG_SIZE, dst=row[0])
+            probs = model.predict(row)[0]
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+        predictions.append(int(np.argmax(probs)))
+        skipped.append(region is None)
+
+    labels = np.array([label for _, label in samples])
+    predictions = np.array(predictions)
+    skipped = np.array(skipped)
+    known = labels >= 0
+    report = {
+        "latency_ms": common.percentiles(latencies),
+        "skip_rate": float(skipped.mean()),
+        "skipped_with_hand": float(skipped[labels != NOTHING].mean()) if (labels != NOTHING).any() else None,
+    }
+    if known.any() and (labels[known] != NOTHING).any():
+        report["accuracy"] = float((predictions[known] == labels[known]).mean())
+    if (labels == NOTHING).any():
+        report["nothing_accuracy"] = float((predictions[labels == NOTHING] == NOTHING).mean())
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset", help="Directory with one sub-directory of images per label")
+    parser.add_argument("--per-label", type=int, default=100, help="Images per label from --dataset")
+    parser.add_argument("--frames", type=int, default=200, help="Synthetic frames without --dataset")
+    parser.add_argument("--model", default="asl_mobilenetv2.h5", help="Keras model (stand-in used if missing)")
+    parser.add_argument("--min-area", type=float, default=0.02)
+    parser.add_argument("--margin", type=float, default=0.25)
+    args = parser.parse_args()
+
+    from backends import backend_from_env
+
+    model = backend_from_env(args.model if os.path.exists(args.model) else common.standin_model_file())
+    samples = load_dataset(args.dataset, args.per_label) if args.dataset else synthetic_frames(args.frames)
+    if not samples:
+        raise SystemExit("No images found")
+    run(model, samples[:5])  # warm-up
+
+    report = {
+        "frames": len(samples),
+        "full": run(model, samples),
+        "crop": run(model, samples, HandCropper(min_area=args.min_area, margin=args.margin)),
+    }
+    for mode in ("full", "crop"):
+        r = report[mode]
+        accuracy = f"accuracy {r['accuracy']:.3f}  " if "accuracy" in r else ""
+        hand_skips = f"{r['skipped_with_hand']:.3f}" if r['skipped_with_hand'] is not None else "n/a"
+        print(f"{mode:<5} p50 {r['latency_ms']['p50']:7.2f} ms  mean {r['latency_ms']['mean']:7.2f} ms  "
+              f"{accuracy}skipped {r['skip_rate']:.3f} (with hand {hand_skips})")
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
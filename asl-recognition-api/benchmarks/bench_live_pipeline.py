@@ -0,0 +1,96 @@
+"""
+Headless FPS / latency benchmark for the webcam loop in ``inf.py``.
+
+Replays a video file (``--video``, or a generated clip of held "signs"
+separated by motion) at its native frame rate through both loops:
+
+    sequential   capture -> infer -> render on one thread (the original loop)
+    pipeline     capture, inference and render threads joined by
+                 latest-frame-wins slots
+
+and reports rendered and classified FPS, frames the loop fell too far
+behind to read, forward passes, and capture-to-result / capture-to-display
+latency percentiles. Rendering draws the overlays but opens no window.
+
+Usage:
+    python benchmarks/bench_live_pipeline.py --seconds 20
+    python benchmarks/bench_live_pipeline.py --video clip.mp4 --model asl_mobilenetv2.h5
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+
+import cv2
+import numpy as np
+
+import common
+
+
+def synthetic_clip(path: str, seconds: float, fps: float = 30.0, size: tuple[int, int] = (640, 480),
+                   hold_s: float = 2.0, move_s: float = 0.5, seed: int = 0) -> str:
+    """Write an MJPG clip alternating held scenes (with sensor noise) and moving ones."""
+    rng = np.random.default_rng(seed)
+    width, height = size
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, size)
+    scene = None
+    for i in range(int(seconds * fps)):
+        t = (i / fps) % (hold_s + move_s)
+        if scene is None or t < 1.0 / fps:
+            # A new "sign" to hold
+            scene = cv2.GaussianBlur(rng.integers(0, 256, (height, width, 3), dtype=np.uint8), (31, 31), 0)
+        frame = scene.copy()
+        if t >= hold_s:
+            # Hand moving between signs
+            x = int((t - hold_s) / move_s * (width - 120))
+            cv2.circle(frame, (x + 60, height // 2), 60, (200, 170, 150), -1)
+        noise = rng.integers(-2, 3, frame.shape, dtype=np.int16)
+        writer.write(np.clip(frame.astype(np.int16) + noise, 0, 255).astype(np.uint8))
+    writer.release()
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--video", help="Video file to replay (default: generated clip)")
+    parser.add_argument("--seconds", type=float, default=20.0, help="Length of the generated clip")
+    parser.add_argument("--model", help="Keras model (default: MobileNetV2 stand-in)")
+    parser.add_argument("--modes", default="sequential,pipeline")
+    parser.add_argument("--out", help="Write results JSON here")
+    args = parser.parse_args()
+
+    from backends import backend_from_env
+    import inf
+
+    model_path = args.model if args.model and os.path.exists(args.model) else common.standin_model_file()
+    model = backend_from_env(model_path)
+    video = args.video or synthetic_clip(os.path.join(tempfile.gettempdir(), "asl_live_bench.avi"), args.seconds)
+
+    runners = {"sequential": inf.run_sequential, "pipeline": inf.run_pipeline}
+    report = {}
+    for mode in (m.strip() for m in args.modes.split(",") if m.strip()):
+        source = inf.FrameSource(video)
+        if not source.opened():
+            raise SystemExit(f"Could not open {video}")
+        try:
+            report[mode] = runners[mode](source, inf.Recognition(model), headless=True)
+        finally:
+            source.release()
+        r = report[mode]
+        print(f"{mode:<11} render {r['render_fps']:6.1f} FPS  classify {r['inference_fps']:6.1f} FPS  "
+              f"missed {r['frames_missed']:5d}  forward passes {r['forward_passes']:5d}  "
+              f"display p50/p95 {r['display_latency_ms']['p50']:6.1f}/{r['display_latency_ms']['p95']:6.1f} ms  "
+              f"result p50/p95 {r['inference_latency_ms']['p50']:6.1f}/{r['inference_latency_ms']['p95']:6.1f} ms")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
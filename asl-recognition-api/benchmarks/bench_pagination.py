@@ -0,0 +1,84 @@
+"""
+/api/predictions query cost: OFFSET + COUNT versus keyset cursors.
+
+Generates (or reuses) a SQLite prediction_logs table with ``--rows`` rows,
+then times the first page and a deep page (``--depth`` of the way through the
+result set) for several filter combinations, plus exact vs estimated totals.
+
+Usage:
+    python benchmarks/bench_pagination.py --rows 5000000 --db /tmp/asl-pagination.db
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+
+import common
+
+from models import db, PredictionLog, ensure_indexes
+from pagination import count_rows, encode_cursor, keyset_page
+
+PAGE_SIZE = 25
+
+SCENARIOS = {
+    "all": lambda q: q,
+    "user": lambda q: q.filter(PredictionLog.user_id == 42),
+    "label": lambda q: q.filter(PredictionLog.label == "A"),
+    "failed": lambda q: q.filter(PredictionLog.success.is_(False)),
+}
+
+
+def offset_page(q, offset: int):
+    total = q.count()
+    items = q.order_by(PredictionLog.timestamp.desc(), PredictionLog.id.desc()).offset(offset).limit(PAGE_SIZE).all()
+    return total, items
+
+
+def ms(durations: list[float]) -> float:
+    return min(durations) * 1000.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--db", default="/tmp/asl-pagination.db", help="SQLite file (reused if already populated)")
+    parser.add_argument("--depth", type=float, default=0.8, help="Fraction of the result set for the deep page")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    app = common.db_app(f"sqlite:///{os.path.abspath(args.db)}")
+    with app.app_context():
+        ensure_indexes()
+        existing = db.session.query(PredictionLog).count()
+    if existing < args.rows:
+        print(f"Generating {args.rows - existing} rows into {args.db} ...")
+        common.generate_prediction_logs(app, args.rows - existing, seed=existing)
+
+    results = {}
+    with app.app_context():
+        for name, apply in SCENARIOS.items():
+            q = apply(db.session.query(PredictionLog))
+            matching = q.count()
+            depth = int(matching * args.depth)
+            # Cursor of the row just before the deep page (found once, outside the timing)
+            anchor = q.order_by(PredictionLog.timestamp.desc(), PredictionLog.id.desc()).offset(max(depth - 1, 0)).first()
+            cursor = encode_cursor(anchor.timestamp, anchor.id) if anchor else None
+
+            results[name] = {
+                "matching_rows": matching,
+                "offset_first_page_ms": ms(common.time_it(lambda: offset_page(q, 0), args.repeat)),
+                "offset_deep_page_ms": ms(common.time_it(lambda: offset_page(q, depth), args.repeat)),
+                "keyset_first_page_ms": ms(common.time_it(lambda: keyset_page(q, PAGE_SIZE), args.repeat)),
+                "keyset_deep_page_ms": ms(common.time_it(lambda: keyset_page(q, PAGE_SIZE, cursor), args.repeat)),
+                "count_exact_ms": ms(common.time_it(lambda: count_rows(q, "exact"), args.repeat)),
+                "count_estimate_ms": ms(common.time_it(lambda: count_rows(q, "estimate"), args.repeat)),
+            }
+            print(name, json.dumps(results[name]))
+
+    print(json.dumps({"rows": max(existing, args.rows), "page_size": PAGE_SIZE, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
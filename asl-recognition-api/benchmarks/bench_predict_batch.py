@@ -0,0 +1,69 @@
+"""
+Compare /api/predict-batch throughput: per-image loop vs vectorized batch.
+
+Usage:
+    python benchmarks/bench_predict_batch.py --images 64 --model asl_mobilenetv2.h5
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+
+import cv2
+import numpy as np
+
+from common import load_or_build_model, synthetic_jpegs, time_it
+
+from preprocessing import preprocess_batch, top_k
+
+IMG_SIZE = (224, 224)
+
+
+def legacy_loop(model, images: list[str]) -> list:
+    """The original implementation: preprocess + predict one image at a time."""
+    results = []
+    for image_data in images:
+        img = cv2.imdecode(np.frombuffer(base64.b64decode(image_data), np.uint8), cv2.IMREAD_COLOR)
+        arr = np.expand_dims(cv2.resize(img, IMG_SIZE).astype("float32") / 255.0, axis=0)
+        preds = model.predict(arr, verbose=0)[0]
+        results.append(int(np.argmax(preds)))
+    return results
+
+
+def vectorized(model, images: list[str], chunk: int) -> list:
+    batch, errors, valid = preprocess_batch(images)
+    probs = model.predict(batch[:len(valid)], batch_size=chunk, verbose=0)
+    idx, _ = top_k(probs, 5)
+    return idx[:, 0].tolist()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="asl_mobilenetv2.h5", help="Keras model (stand-in used if missing)")
+    parser.add_argument("--images", type=int, default=64, help="Images per request")
+    parser.add_argument("--chunk", type=int, default=32, help="Rows per forward pass")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    model = load_or_build_model(args.model)
+    images = [base64.b64encode(b).decode() for b in synthetic_jpegs(args.images)]
+
+    report = {}
+    for name, fn in (
+        ("loop", lambda: legacy_loop(model, images)),
+        ("vectorized", lambda: vectorized(model, images, args.chunk)),
+    ):
+        durations = time_it(fn, repeat=args.repeat)
+        best = min(durations)
+        report[name] = {
+            "best_s": best,
+            "images_per_s": args.images / best,
+        }
+    report["speedup"] = report["vectorized"]["images_per_s"] / report["loop"]["images_per_s"]
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Per-frame cost of the preprocessing path: legacy vs fused.
+
+    legacy        imdecode at full size, resize, astype("float32") / 255,
+                  expand_dims (the original /api/predict code)
+    fused_float   reduced-scale JPEG decode, resize into a per-thread uint8
+                  buffer, scale in place into a preallocated float32 row
+    fused_uint8   reduced-scale decode, resize straight into a preallocated
+                  uint8 row (what the API now sends to the model)
+
+For each frame size the script reports milliseconds per frame and, from
+``tracemalloc``, the peak bytes each frame allocates on top of what was
+already live (NumPy and OpenCV output arrays are traced). It also prints
+the largest difference between the legacy and fused outputs, which comes
+from decoding at reduced scale.
+
+Usage:
+    python benchmarks/bench_preprocess.py --frames 200 --sizes 640x480,1920x1080
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from common import synthetic_jpegs
+
+from preprocessing import IMG_SIZE, PIXEL_SCALE, preprocess_into
+
+
+def legacy(image_data: str, out: np.ndarray) -> np.ndarray:
+    img = cv2.imdecode(np.frombuffer(base64.b64decode(image_data), np.uint8), cv2.IMREAD_COLOR)
+    return np.expand_dims(cv2.resize(img, IMG_SIZE).astype("float32") / 255.0, axis=0)
+
+
+def fused(image_data: str, out: np.ndarray) -> np.ndarray:
+    preprocess_into(out, image_data)
+    return out
+
+
+def measure(fn, images: list[str], out: np.ndarray) -> dict:
+    fn(images[0], out)  # warm the per-thread buffer and OpenCV's caches
+    t0 = time.perf_counter()
+    for image_data in images:
+        fn(image_data, out)
+    ms = (time.perf_counter() - t0) * 1000.0 / len(images)
+
+    # Traced separately: tracemalloc slows every allocation down
+    tracemalloc.start()
+    transient = []
+    for image_data in images:
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        result = fn(image_data, out)
+        _, peak = tracemalloc.get_traced_memory()
+        transient.append(peak - current)
+        del result
+    tracemalloc.stop()
+    return {
+        "ms_per_frame": ms,
+        "peak_bytes_per_frame": int(np.mean(transient)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--frames", type=int, default=200, help="Frames per size")
+    parser.add_argument("--sizes", default="640x480,1920x1080", help="Comma-separated WIDTHxHEIGHT")
+    args = parser.parse_args()
+
+    shape = (IMG_SIZE[1], IMG_SIZE[0], 3)
+    report = {}
+    for size in args.sizes.split(","):
+        width, height = (int(v) for v in size.lower().split("x"))
+        # A handful of distinct frames, cycled, keeps encoding time down
+        distinct = [base64.b64encode(f).decode() for f in synthetic_jpegs(min(args.frames, 16), (height, width))]
+        images = [distinct[i % len(distinct)] for i in range(args.frames)]
+
+        runs = {
+            "legacy": measure(legacy, images, np.empty(shape, np.float32)),
+            "fused_float": measure(fused, images, np.empty(shape, np.float32)),
+            "fused_uint8": measure(fused, images, np.empty(shape, np.uint8)),
+        }
+        reference = legacy(distinct[0], None)[0]
+        row = np.empty(shape, np.uint8)
+        preprocess_into(row, distinct[0])
+        runs["max_abs_diff"] = float(np.abs(reference - row * PIXEL_SCALE).max())
+        report[size] = runs
+
+        base = runs["legacy"]
+        print(f"{size}:")
+        for name in ("legacy", "fused_float", "fused_uint8"):
+            r = runs[name]
+            print(f"  {name:<12} {r['ms_per_frame']:7.3f} ms/frame ({base['ms_per_frame'] / r['ms_per_frame']:4.1f}x)  "
+                  f"{r['peak_bytes_per_frame'] / 1024:9.1f} KiB allocated/frame")
+        print(f"  max |legacy - fused| = {runs['max_abs_diff']:.4f}")
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Benchmarks are run from the ``asl-recognition-api`` directory, e.g.
+``python benchmarks/bench_predict_batch.py``; this module puts the API
+modules on ``sys.path`` so they can be imported directly.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import time
+from typing import Callable, Optional
+
+import cv2
+import numpy as np
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if API_DIR not in sys.path:
+    sys.path.insert(0, API_DIR)
+
+NUM_CLASSES = 29
+INPUT_SHAPE = (224, 224, 3)
+
+
+def load_or_build_model(model_path: Optional[str] = None):
+    """Load the real model if available, else a stand-in with the same I/O shape."""
+    from tensorflow.keras.models import load_model
+
+    if model_path and os.path.exists(model_path):
+        return load_model(model_path)
+    return build_standin_model()
+
+
+def build_standin_model():
+    """Untrained MobileNetV2 with the production input/output shape."""
+    from tensorflow.keras.applications import MobileNetV2
+
+    return MobileNetV2(input_shape=INPUT_SHAPE, weights=None, classes=NUM_CLASSES)
+
+
+def build_small_standin_model():
+    """Tiny untrained CNN with the production input/output shape.
+
+    Cheap enough that load tests measure the serving path rather than the
+    forward pass.
+    """
+    from tensorflow.keras import layers, models
+
+    return models.Sequential([
+        layers.Input(shape=INPUT_SHAPE),
+        layers.Conv2D(8, 3, strides=4, activation="relu"),
+        layers.GlobalAveragePooling2D(),
+        layers.Dense(NUM_CLASSES, activation="softmax"),
+    ])
+
+
+def synthetic_jpegs(n: int, size: tuple[int, int] = (480, 640), seed: int = 0) -> list[bytes]:
+    """Random JPEG-encoded frames of a typical webcam resolution."""
+    rng = np.random.default_rng(seed)
+    frames = []
+    for _ in range(n):
+        img = rng.integers(0, 256, size=(size[0], size[1], 3), dtype=np.uint8)
+        # Smooth the noise so the JPEG size resembles a real frame
+        img = cv2.GaussianBlur(img, (15, 15), 0)
+        ok, buf = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, 85])
+        frames.append(buf.tobytes())
+    return frames
+
+
+def percentiles(samples_ms: list[float]) -> dict[str, float]:
+    if not samples_ms:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "mean": 0.0}
+    arr = np.asarray(samples_ms)
+    return {
+        "p50": float(np.percentile(arr, 50)),
+        "p95": float(np.percentile(arr, 95)),
+        "p99": float(np.percentile(arr, 99)),
+        "mean": float(arr.mean()),
+    }
+
+
+def time_it(fn: Callable[[], object], repeat: int = 5, warmup: int = 1) -> list[float]:
+    """Run ``fn`` and return wall-clock durations in seconds."""
+    for _ in range(warmup):
+        fn()
+    durations = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - t0)
+    return durations
+
+
+def standin_model_file(directory: Optional[str] = None) -> str:
+    """Save the stand-in model to an .h5 file (reused across runs) and return its path."""
+    import tempfile
+
+    directory = directory or tempfile.gettempdir()
+    path = os.path.join(directory, "asl_standin_mobilenetv2.h5")
+    if not os.path.exists(path):
+        build_standin_model().save(path)
+    return path
+
+
+def small_standin_model_file(directory: Optional[str] = None) -> str:
+    """Save the small stand-in model to an .h5 file (reused across runs) and return its path."""
+    import tempfile
+
+    directory = directory or tempfile.gettempdir()
+    path = os.path.join(directory, "asl_small_standin.h5")
+    if not os.path.exists(path):
+        build_small_standin_model().save(path)
+    return path
+
+
+def import_app(model_path: Optional[str] = None, database_url: Optional[str] = None, **env: str):
+    """Import the Flask app in-process against a throwaway SQLite database.
+
+    Uses ``model_path`` if it exists, otherwise the stand-in model. An
+    inherited ``DATABASE_URL`` is ignored, since benchmarks seed synthetic
+    users and logs; pass ``database_url`` to use a real database on
+    purpose. Extra keyword arguments are set as environment variables
+    before import.
+    """
+    import tempfile
+
+    if not (model_path and os.path.exists(model_path)):
+        model_path = standin_model_file()
+    if database_url is None:
+        database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='asl-bench-'), 'bench.db')}"
+    os.environ["MODEL_PATH"] = model_path
+    os.environ["DATABASE_URL"] = database_url
+    for key, value in env.items():
+        os.environ[key] = str(value)
+
+    import app as app_module
+
+    with app_module.app.app_context():
+        app_module.db.create_all()
+    # The model loads in the background; benchmarks measure the warm path
+    if not app_module.model_loader.wait(timeout=600):
+        raise RuntimeError(f"Model did not load: {app_module.model_loader.error}")
+    return app_module
+
+
+def db_app(database_url: Optional[str] = None, tuned: bool = True):
+    """Minimal Flask app bound to the models' ``db`` (no model, no endpoints).
+
+    Defaults to a throwaway SQLite file. ``tuned=False`` skips the
+    db_config pragmas and pool settings.
+    """
+    import tempfile
+
+    from flask import Flask
+
+    from db_config import init_db
+    from models import db
+
+    if database_url is None:
+        database_url = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='asl-bench-'), 'bench.db')}"
+    app = Flask("asl-bench")
+    init_db(app, database_url, tuned=tuned)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def generate_prediction_logs(app, rows: int, users: int = 500, days: int = 90,
+                             chunk: int = 50_000, seed: int = 0) -> None:
+    """Bulk-insert ``rows`` synthetic prediction logs spread over ``days``."""
+    from datetime import datetime, timedelta
+
+    from sqlalchemy import insert
+
+    from models import db, PredictionLog, User
+
+    labels = [chr(ord('A') + i) for i in range(26)] + ['del', 'nothing', 'space']
+    rng = np.random.default_rng(seed)
+    start = datetime.utcnow() - timedelta(days=days)
+    span_s = days * 86400
+    with app.app_context():
+        if db.session.query(User).count() < users:
+            db.session.execute(insert(User), [
+                {"email": f"bench{i}@example.com", "password_hash": "x"} for i in range(users)
+            ])
+            db.session.commit()
+        for offset in range(0, rows, chunk):
+            n = min(chunk, rows - offset)
+            seconds = np.sort(rng.uniform(offset * span_s / rows, (offset + n) * span_s / rows, n))
+            user_ids = rng.integers(1, users + 1, n)
+            label_idx = rng.integers(0, len(labels), n)
+            conf = rng.random(n)
+            latency = rng.gamma(2.0, 10.0, n)
+            ok = rng.random(n) > 0.05
+            db.session.execute(insert(PredictionLog), [
+                {
+                    "user_id": int(user_ids[i]),
+                    "timestamp": start + timedelta(seconds=float(seconds[i])),
+                    "label": labels[label_idx[i]] if ok[i] else None,
+                    "confidence": float(conf[i]) if ok[i] else None,
+                    "latency_ms": float(latency[i]),
+                    "success": bool(ok[i]),
+                    "error_message": None if ok[i] else "Failed to preprocess",
+                }
+                for i in range(n)
+            ])
+            db.session.commit()
@@ -0,0 +1,103 @@
+"""
+Throughput scaling of the prefork worker pool from 1 to N cores.
+
+For each worker count, client threads keep the pool saturated with batches
+for a fixed duration; images/s, speedup over one worker, per-batch latency
+and the resident memory of the front and worker processes are reported.
+``INFERENCE_BACKEND`` / ``INFERENCE_INT8`` select what the workers serve.
+
+Usage:
+    python benchmarks/loadtest_prefork.py --model asl_mobilenetv2.h5 --max-workers 8
+    INFERENCE_BACKEND=tflite python benchmarks/loadtest_prefork.py --max-workers 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+import common
+
+from worker_pool import WorkerPool, available_cores
+
+
+def rss_mb(pid: int) -> float | None:
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return None
+
+
+def run(keras_path: str, workers: int, batch: int, duration_s: float, clients: int) -> dict:
+    pool = WorkerPool(keras_path, workers=workers, max_batch_size=batch, slots=2 * clients)
+    pool.start()
+    try:
+        tensors = np.random.default_rng(0).random((batch, 224, 224, 3), dtype=np.float32)
+        pool.predict(tensors)
+
+        latencies: list[float] = []
+        lock = threading.Lock()
+        deadline = time.perf_counter() + duration_s
+
+        def client():
+            local = []
+            while time.perf_counter() < deadline:
+                t0 = time.perf_counter()
+                pool.predict(tensors)
+                local.append((time.perf_counter() - t0) * 1000.0)
+            with lock:
+                latencies.extend(local)
+
+        t0 = time.perf_counter()
+        threads = [threading.Thread(target=client) for _ in range(clients)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - t0
+
+        worker_rss = [rss_mb(w["pid"]) for w in pool.stats()["workers"]]
+        return {
+            "workers": workers,
+            "clients": clients,
+            "batches": len(latencies),
+            "images_per_s": len(latencies) * batch / elapsed,
+            "batch_latency_ms": common.percentiles(latencies),
+            "front_rss_mb": rss_mb(os.getpid()),
+            "worker_rss_mb": worker_rss,
+        }
+    finally:
+        pool.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="asl_mobilenetv2.h5", help="Keras model (stand-in used if missing)")
+    parser.add_argument("--max-workers", type=int, default=len(available_cores()))
+    parser.add_argument("--batch", type=int, default=8, help="Rows per dispatched batch")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per worker count")
+    args = parser.parse_args()
+
+    keras_path = args.model if os.path.exists(args.model) else common.standin_model_file()
+    results = []
+    for workers in range(1, args.max_workers + 1):
+        result = run(keras_path, workers, args.batch, args.duration, clients=2 * workers)
+        result["speedup"] = result["images_per_s"] / results[0]["images_per_s"] if results else 1.0
+        results.append(result)
+        print(f"{workers:>2} workers: {result['images_per_s']:8.1f} img/s "
+              f"(x{result['speedup']:.2f}), worker RSS {result['worker_rss_mb']}")
+
+    print(json.dumps({"available_cores": len(available_cores()), "batch": args.batch, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
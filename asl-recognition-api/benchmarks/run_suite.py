@@ -0,0 +1,236 @@
+"""
+End-to-end load and regression suite for the API.
+
+Runs the Flask app in-process, serving a small stand-in Keras model with
+the production input/output shape (or ``--model``), against a throwaway
+SQLite database seeded with ``--rows`` prediction logs. Each scenario is
+driven by ``--concurrency`` client threads for ``--duration`` seconds:
+
+    predict         POST /api/predict with one base64 frame
+    predict_batch   POST /api/predict-batch with ``--batch`` frames
+    predictions     GET /api/predictions (first page, label filter)
+    stats_summary   GET /api/stats/summary?window=24h
+
+Throughput and p50/p95/p99 latency are printed and saved as JSON. Passing
+``--baseline`` with an earlier result file compares the two and exits
+non-zero if any scenario's p95 grew, or its throughput fell, by more than
+``--tolerance``.
+
+Usage:
+    python benchmarks/run_suite.py --concurrency 1,8 --out results/main.json
+    python benchmarks/run_suite.py --concurrency 1,8 --baseline results/main.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Callable
+
+import common
+
+SCENARIOS = ("predict", "predict_batch", "predictions", "stats_summary")
+LABELS = [chr(ord('A') + i) for i in range(26)] + ['del', 'nothing', 'space']
+
+
+def git_revision() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=common.API_DIR,
+                             capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+def setup(args):
+    """Import the app, create an admin, seed logs; returns (app module, auth headers)."""
+    model_path = args.model if args.model and os.path.exists(args.model) else common.small_standin_model_file()
+    app_module = common.import_app(
+        model_path,
+        database_url=args.database_url,
+        PREDICTION_CACHE_ENTRIES="0" if not args.cache else os.environ.get("PREDICTION_CACHE_ENTRIES", "4096"),
+        AUTH_RATE_PER_IP="0",
+    )
+    client = app_module.app.test_client()
+    client.post('/api/auth/signup', json={'email': 'suite-admin@example.com', 'password': 'bench'})
+    login = client.post('/api/auth/login', json={'email': 'suite-admin@example.com', 'password': 'bench'})
+    headers = {'Authorization': f"Bearer {login.json['access_token']}"}
+
+    if args.rows:
+        from rollups import rebuild_rollups
+
+        common.generate_prediction_logs(app_module.app, args.rows, users=args.users, days=7)
+        with app_module.app.app_context():
+            rebuild_rollups()
+    return app_module, headers
+
+
+def scenario_requests(args, headers) -> dict[str, Callable]:
+    """Scenario name -> ``fn(client, rng)`` issuing one request."""
+    frames = [base64.b64encode(f).decode() for f in common.synthetic_jpegs(args.frames, seed=1)]
+
+    def predict(client, rng):
+        return client.post('/api/predict', json={'image': rng.choice(frames)}, headers=headers)
+
+    def predict_batch(client, rng):
+        return client.post('/api/predict-batch', json={'images': rng.sample(frames, args.batch)}, headers=headers)
+
+    def predictions(client, rng):
+        return client.get(f'/api/predictions?page_size=25&label={rng.choice(LABELS)}', headers=headers)
+
+    def stats_summary(client, rng):
+        return client.get('/api/stats/summary?window=24h', headers=headers)
+
+    return {
+        "predict": predict,
+        "predict_batch": predict_batch,
+        "predictions": predictions,
+        "stats_summary": stats_summary,
+    }
+
+
+def run_scenario(app, fn: Callable, concurrency: int, duration_s: float, warmup: int) -> dict:
+    client = app.test_client()
+    rng = random.Random(0)
+    for _ in range(warmup):
+        fn(client, rng)
+
+    latencies: list[float] = []
+    errors = 0
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration_s
+
+    def worker(seed: int):
+        nonlocal errors
+        client = app.test_client()
+        rng = random.Random(seed)
+        local: list[float] = []
+        failed = 0
+        while time.perf_counter() < deadline:
+            t0 = time.perf_counter()
+            try:
+                ok = fn(client, rng).status_code < 400
+            except Exception:
+                ok = False
+            if ok:
+                local.append((time.perf_counter() - t0) * 1000.0)
+            else:
+                failed += 1
+        with lock:
+            latencies.extend(local)
+            errors += failed
+
+    t0 = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": len(latencies) / elapsed,
+        "latency_ms": common.percentiles(latencies),
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Human-readable regressions of ``current`` against ``baseline``."""
+    regressions = []
+    for name, runs in current["results"].items():
+        base_runs = {r["concurrency"]: r for r in baseline.get("results", {}).get(name, [])}
+        for run in runs:
+            base = base_runs.get(run["concurrency"])
+            if base is None or not base["requests"]:
+                continue
+            label = f"{name} @ {run['concurrency']}"
+            p95, base_p95 = run["latency_ms"]["p95"], base["latency_ms"]["p95"]
+            rps, base_rps = run["throughput_rps"], base["throughput_rps"]
+            print(f"{label:<28} p95 {base_p95:8.2f} -> {p95:8.2f} ms   rps {base_rps:8.1f} -> {rps:8.1f}")
+            if p95 > base_p95 * (1 + tolerance):
+                regressions.append(f"{label}: p95 {base_p95:.2f} -> {p95:.2f} ms")
+            if rps < base_rps * (1 - tolerance):
+                regressions.append(f"{label}: throughput {base_rps:.1f} -> {rps:.1f} req/s")
+            if run["errors"] > base["errors"]:
+                regressions.append(f"{label}: errors {base['errors']} -> {run['errors']}")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", help="Keras model to serve (default: small stand-in)")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--concurrency", default="1,8", help="Comma-separated client thread counts")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per scenario and concurrency")
+    parser.add_argument("--warmup", type=int, default=5, help="Untimed requests before each run")
+    parser.add_argument("--batch", type=int, default=16, help="Images per /api/predict-batch request")
+    parser.add_argument("--frames", type=int, default=64, help="Distinct synthetic frames to draw from")
+    parser.add_argument("--rows", type=int, default=100_000, help="Prediction logs seeded before the run")
+    parser.add_argument("--database-url", help="Seed and query this database instead of a throwaway SQLite file")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--cache", action="store_true", help="Leave the prediction cache on")
+    parser.add_argument("--out", help="Write results JSON here")
+    parser.add_argument("--baseline", help="Earlier results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative p95/throughput change")
+    args = parser.parse_args()
+
+    names = [n.strip() for n in args.scenarios.split(",") if n.strip()]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    levels = [int(c) for c in args.concurrency.split(",")]
+
+    app_module, headers = setup(args)
+    requests = scenario_requests(args, headers)
+
+    results: dict[str, list[dict]] = {}
+    for name in names:
+        for concurrency in levels:
+            run = run_scenario(app_module.app, requests[name], concurrency, args.duration, args.warmup)
+            if name == "predict_batch":
+                run["images_per_s"] = run["throughput_rps"] * args.batch
+            results.setdefault(name, []).append(run)
+            lat = run["latency_ms"]
+            print(f"{name:<14} c={concurrency:<3} {run['throughput_rps']:8.1f} req/s  "
+                  f"p50 {lat['p50']:7.2f}  p95 {lat['p95']:7.2f}  p99 {lat['p99']:7.2f} ms  errors {run['errors']}")
+
+    report = {
+        "created_at": datetime.utcnow().isoformat(),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("out", "baseline")},
+        "results": results,
+    }
+    if args.out:
+        os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.out}")
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print("Regressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print("No regressions beyond tolerance")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Convert the Keras model to TFLite / ONNX and check parity with Keras.
+
+Usage:
+    # Float TFLite / ONNX artifacts next to asl_mobilenetv2.h5
+    python convert_model.py convert tflite
+    python convert_model.py convert onnx
+
+    # Post-training INT8 quantization, calibrated on real frames
+    python convert_model.py convert tflite --int8 --samples-dir data/asl_alphabet_test
+    python convert_model.py convert onnx --int8 --samples-dir data/asl_alphabet_test
+
+    # Top-1 agreement with the Keras model on a sample set
+    python convert_model.py parity tflite --int8 --samples-dir data/asl_alphabet_test
+
+Conversion needs TensorFlow; ONNX export additionally needs ``tf2onnx`` and
+INT8 ONNX quantization needs ``onnxruntime``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+from typing import Iterator, Optional
+
+import cv2
+import numpy as np
+
+from backends import BACKENDS, artifact_path, load_backend
+from preprocessing import IMG_SIZE, preprocess_into
+
+MODEL_PATH = "asl_mobilenetv2.h5"
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def load_samples(samples_dir: Optional[str], limit: int, seed: int = 0) -> np.ndarray:
+    """Preprocessed ``(N, 224, 224, 3)`` samples from a folder tree, or synthetic frames."""
+    paths = []
+    if samples_dir:
+        for root, _, files in os.walk(samples_dir):
+            paths.extend(os.path.join(root, f) for f in sorted(files) if f.lower().endswith(IMAGE_EXTENSIONS))
+        paths.sort()
+        rng = np.random.default_rng(seed)
+        if len(paths) > limit:
+            paths = list(rng.choice(paths, size=limit, replace=False))
+    if not paths:
+        print("No sample images given; using synthetic frames (parity numbers will be less meaningful)")
+        rng = np.random.default_rng(seed)
+        images = [cv2.GaussianBlur(rng.integers(0, 256, (IMG_SIZE[1], IMG_SIZE[0], 3), dtype=np.uint8), (15, 15), 0)
+                  for _ in range(limit)]
+    else:
+        images = [cv2.imread(p, cv2.IMREAD_COLOR) for p in paths]
+        images = [img for img in images if img is not None]
+    batch = np.empty((len(images), IMG_SIZE[1], IMG_SIZE[0], 3), dtype=np.float32)
+    for i, img in enumerate(images):
+        preprocess_into(batch[i], img)
+    return batch
+
+
+def _calibration_batches(samples: np.ndarray) -> Iterator[list[np.ndarray]]:
+    for i in range(len(samples)):
+        yield [samples[i:i + 1]]
+
+
+def convert_tflite(model, output: str, int8: bool, samples: Optional[np.ndarray]) -> None:
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if int8:
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = lambda: _calibration_batches(samples)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        # Keep float32 I/O so the serving path does not change
+        converter.inference_input_type = tf.float32
+        converter.inference_output_type = tf.float32
+    with open(output, "wb") as f:
+        f.write(converter.convert())
+
+
+def convert_onnx(model, output: str, int8: bool, samples: Optional[np.ndarray]) -> None:
+    import tensorflow as tf
+    import tf2onnx
+
+    spec = (tf.TensorSpec((None, IMG_SIZE[1], IMG_SIZE[0], 3), tf.float32, name="input"),)
+    float_path = output
+    if int8:
+        float_path = os.path.join(tempfile.mkdtemp(prefix="asl-onnx-"), "float.onnx")
+    tf2onnx.convert.from_keras(model, input_signature=spec, opset=13, output_path=float_path)
+    if not int8:
+        return
+
+    from onnxruntime.quantization import (
+        CalibrationDataReader, QuantFormat, QuantType, quantize_static,
+    )
+
+    class _Reader(CalibrationDataReader):
+        def __init__(self):
+            self._it = (({"input": b[0]}) for b in _calibration_batches(samples))
+
+        def get_next(self):
+            return next(self._it, None)
+
+    quantize_static(
+        float_path, output, _Reader(),
+        quant_format=QuantFormat.QDQ,
+        per_channel=True,
+        activation_type=QuantType.QInt8,
+        weight_type=QuantType.QInt8,
+    )
+
+
+def parity(kind: str, path: str, keras_path: str, samples: np.ndarray, batch_size: int = 32) -> dict:
+    """Top-1 agreement and probability drift of a backend versus Keras."""
+    reference = load_backend("keras", keras_path).predict(samples, batch_size=batch_size)
+    candidate = load_backend(kind, path).predict(samples, batch_size=batch_size)
+    ref_top1 = reference.argmax(axis=1)
+    cand_top1 = candidate.argmax(axis=1)
+    return {
+        "backend": kind,
+        "artifact": path,
+        "samples": int(len(samples)),
+        "top1_agreement": float((ref_top1 == cand_top1).mean()) if len(samples) else None,
+        "max_abs_diff": float(np.abs(reference - candidate).max()) if len(samples) else None,
+        "mean_abs_diff": float(np.abs(reference - candidate).mean()) if len(samples) else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("convert", "parity"):
+        p = sub.add_parser(name)
+        p.add_argument("backend", choices=[b for b in BACKENDS if b != "keras"])
+        p.add_argument("--model", default=MODEL_PATH, help="Source Keras .h5 model")
+        p.add_argument("--output", help="Artifact path (default: next to the Keras model)")
+        p.add_argument("--int8", action="store_true", help="Post-training INT8 quantization")
+        p.add_argument("--samples-dir", help="Folder of images for calibration/parity")
+        p.add_argument("--samples", type=int, default=200, help="Max images to use")
+    args = parser.parse_args()
+
+    output = args.output or artifact_path(args.backend, args.model, args.int8)
+
+    if args.command == "convert":
+        from tensorflow.keras.models import load_model
+
+        model = load_model(args.model)
+        samples = load_samples(args.samples_dir, args.samples) if args.int8 else None
+        if args.backend == "tflite":
+            convert_tflite(model, output, args.int8, samples)
+        else:
+            convert_onnx(model, output, args.int8, samples)
+        print(f"✅ Wrote {output} ({os.path.getsize(output) / 1e6:.1f} MB)")
+        # Quick parity check on the calibration/synthetic set
+        args.command = "parity"
+
+    if args.command == "parity":
+        samples = load_samples(args.samples_dir, args.samples, seed=1)
+        print(json.dumps(parity(args.backend, output, args.model, samples), indent=2))
+
+
+if __name__ == "__main__":
+    main()
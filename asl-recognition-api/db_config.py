@@ -0,0 +1,142 @@
+"""
+Database engine configuration for SQLite and PostgreSQL.
+
+``init_db(app)`` replaces a bare ``db.init_app(app)``. On SQLite every new
+connection gets WAL journaling (readers no longer block the writer and vice
+versa), ``synchronous=NORMAL`` (no fsync per commit; still crash-safe in WAL
+mode), a busy timeout so contending writers wait instead of failing with
+"database is locked", and a larger page cache. On PostgreSQL the engine gets
+a sized connection pool with pre-ping and recycling, and server-side
+prepared statements when the psycopg 3 driver is used.
+
+Settings come from the environment (see ``sqlite_settings`` /
+``postgres_engine_options``).
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+from models import db
+
+DEFAULT_DATABASE_URL = "sqlite:///asl.db"
+SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+
+def database_url(url: Optional[str] = None) -> str:
+    """``url`` or ``DATABASE_URL``, with the legacy ``postgres://`` scheme fixed up."""
+    url = url or os.environ.get("DATABASE_URL", DEFAULT_DATABASE_URL)
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    return url
+
+
+def sqlite_settings() -> dict[str, Any]:
+    synchronous = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL").upper()
+    if synchronous not in SYNCHRONOUS_MODES:
+        raise ValueError(f"SQLITE_SYNCHRONOUS must be one of {', '.join(SYNCHRONOUS_MODES)}")
+    return {
+        "journal_mode": os.environ.get("SQLITE_JOURNAL_MODE", "WAL").upper(),
+        "synchronous": synchronous,
+        "busy_timeout": int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+        # Negative cache_size is in KiB rather than pages
+        "cache_size": -int(os.environ.get("SQLITE_CACHE_SIZE_KB", "65536")),
+        "temp_store": "MEMORY",
+    }
+
+
+def pool_options() -> dict[str, Any]:
+    return {
+        "pool_size": int(os.environ.get("DB_POOL_SIZE", "10")),
+        "max_overflow": int(os.environ.get("DB_MAX_OVERFLOW", "20")),
+        "pool_timeout": float(os.environ.get("DB_POOL_TIMEOUT_S", "10")),
+    }
+
+
+def postgres_engine_options(url: str) -> dict[str, Any]:
+    options: dict[str, Any] = {
+        **pool_options(),
+        "pool_recycle": int(os.environ.get("DB_POOL_RECYCLE_S", "1800")),
+        "pool_pre_ping": True,
+    }
+    connect_args: dict[str, Any] = {"application_name": os.environ.get("DB_APPLICATION_NAME", "asl-api")}
+    if make_url(url).get_driver_name() == "psycopg":
+        # psycopg 3 prepares a statement server-side after this many executions;
+        # set DB_PREPARE_THRESHOLD=off behind a transaction-mode PgBouncer
+        threshold = os.environ.get("DB_PREPARE_THRESHOLD", "2")
+        connect_args["prepare_threshold"] = None if threshold.lower() == "off" else int(threshold)
+    options["connect_args"] = connect_args
+    return options
+
+
+def _is_memory(url: str) -> bool:
+    database = make_url(url).database
+    return not database or database == ":memory:" or database.startswith("file::memory:")
+
+
+def engine_options(url: str) -> dict[str, Any]:
+    """``SQLALCHEMY_ENGINE_OPTIONS`` for ``url``."""
+    backend = make_url(url).get_backend_name()
+    if backend == "postgresql":
+        return postgres_engine_options(url)
+    if backend == "sqlite":
+        # File databases use a QueuePool sized like the PostgreSQL one;
+        # in-memory databases keep SQLAlchemy's per-thread pool
+        return {} if _is_memory(url) else pool_options()
+    return {**pool_options(), "pool_pre_ping": True}
+
+
+def apply_sqlite_pragmas(engine, settings: Optional[dict[str, Any]] = None) -> None:
+    """Run the tuning PRAGMAs on every new connection of ``engine``."""
+    settings = settings or sqlite_settings()
+    wal = settings["journal_mode"] == "WAL" and not _is_memory(str(engine.url))
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            if wal:
+                cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute(f"PRAGMA synchronous={settings['synchronous']}")
+            cursor.execute(f"PRAGMA busy_timeout={int(settings['busy_timeout'])}")
+            cursor.execute(f"PRAGMA cache_size={int(settings['cache_size'])}")
+            cursor.execute(f"PRAGMA temp_store={settings['temp_store']}")
+        finally:
+            cursor.close()
+
+
+def init_db(app, url: Optional[str] = None, tuned: bool = True) -> None:
+    """Configure ``app``'s database URL and engine, then bind ``db`` to it.
+
+    ``tuned=False`` keeps SQLAlchemy's defaults (used by the benchmarks as
+    the baseline).
+    """
+    url = database_url(url)
+    app.config["SQLALCHEMY_DATABASE_URI"] = url
+    app.config.setdefault("SQLALCHEMY_TRACK_MODIFICATIONS", False)
+    if tuned:
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(url)
+    db.init_app(app)
+    if tuned and make_url(url).get_backend_name() == "sqlite":
+        with app.app_context():
+            apply_sqlite_pragmas(db.engine)
+
+
+def describe() -> dict[str, Any]:
+    """Effective engine settings, for /api/stats/inference (inside an app context)."""
+    engine = db.engine
+    info: dict[str, Any] = {"dialect": engine.dialect.name, "driver": engine.driver}
+    pool = engine.pool
+    if hasattr(pool, "checkedout"):
+        info["pool"] = {"size": pool.size(), "checked_out": pool.checkedout(), "overflow": pool.overflow()}
+    if engine.dialect.name == "sqlite":
+        with engine.connect() as conn:
+            info["sqlite"] = {
+                name: conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+                for name in ("journal_mode", "synchronous", "busy_timeout", "cache_size")
+            }
+    return info
@@ -0,0 +1,156 @@
+"""
+Streaming export of prediction logs as NDJSON, CSV or Parquet.
+
+Rows are read through a server-side cursor in chunks of ``chunk`` rows
+(``yield_per``) and encoded chunk by chunk, so memory use stays flat no
+matter how many rows match. Parquet output needs the optional ``pyarrow``
+package; each chunk becomes one row group.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+from typing import Iterator
+
+from models import db, PredictionLog
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+EXPORT_COLUMNS = (
+    "id", "user_id", "timestamp", "label", "confidence", "latency_ms",
+    "success", "error_message", "client_ip", "top_predictions",
+)
+
+
+class ExportError(ValueError):
+    """Unsupported format or missing optional dependency."""
+
+
+def _parquet_modules():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ExportError("Parquet export requires pyarrow (pip install pyarrow)")
+    return pa, pq
+
+
+def check_format(fmt: str) -> None:
+    if fmt not in EXPORT_FORMATS:
+        raise ExportError(f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    if fmt == "parquet":
+        _parquet_modules()
+
+
+def iter_chunks(query, chunk: int = 5000) -> Iterator[list[tuple]]:
+    """Matching rows as tuples in EXPORT_COLUMNS order, ``chunk`` at a time."""
+    columns = [getattr(PredictionLog, c) for c in EXPORT_COLUMNS]
+    stmt = (
+        query.with_entities(*columns)
+        .order_by(None)
+        .order_by(PredictionLog.timestamp, PredictionLog.id)
+        .statement.execution_options(yield_per=chunk)
+    )
+    result = db.session.execute(stmt)
+    try:
+        for part in result.partitions():
+            yield part
+    finally:
+        result.close()
+
+
+def _ndjson(chunks: Iterator[list[tuple]]) -> Iterator[bytes]:
+    for part in chunks:
+        lines = []
+        for row in part:
+            record = dict(zip(EXPORT_COLUMNS, row))
+            record["timestamp"] = record["timestamp"].isoformat()
+            lines.append(json.dumps(record, separators=(",", ":")))
+        yield ("\n".join(lines) + "\n").encode()
+
+
+def _csv(chunks: Iterator[list[tuple]]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(EXPORT_COLUMNS)
+    for part in chunks:
+        for row in part:
+            row = list(row)
+            row[2] = row[2].isoformat()
+            if row[9] is not None:
+                row[9] = json.dumps(row[9], separators=(",", ":"))
+            writer.writerow(row)
+        yield buf.getvalue().encode()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode()
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object whose contents are drained after each row group."""
+
+    def __init__(self):
+        super().__init__()
+        self._parts: list[bytes] = []
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._parts.append(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def _parquet(chunks: Iterator[list[tuple]]) -> Iterator[bytes]:
+    pa, pq = _parquet_modules()
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("user_id", pa.int64()),
+        ("timestamp", pa.timestamp("us")),
+        ("label", pa.string()),
+        ("confidence", pa.float64()),
+        ("latency_ms", pa.float64()),
+        ("success", pa.bool_()),
+        ("error_message", pa.string()),
+        ("client_ip", pa.string()),
+        ("top_predictions", pa.string()),
+    ])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for part in chunks:
+            columns = list(zip(*part))
+            columns[9] = [json.dumps(v, separators=(",", ":")) if v is not None else None for v in columns[9]]
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(col, type=field.type) for col, field in zip(columns, schema)], schema=schema
+            ))
+            data = sink.drain()
+            if data:
+                yield data
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def export_stream(query, fmt: str, chunk: int = 5000) -> Iterator[bytes]:
+    """Encoded export of ``query`` as a byte stream (see EXPORT_FORMATS)."""
+    check_format(fmt)
+    encoder = {"ndjson": _ndjson, "csv": _csv, "parquet": _parquet}[fmt]
+    return encoder(iter_chunks(query, chunk))
@@ -1,11 +1,40 @@
+"""
+Standalone webcam recognition.
+
+Capture, inference and rendering run on separate threads connected by
+single-slot, latest-frame-wins buffers (``streaming.LatestSlot``). The
+window is redrawn at camera rate with the newest prediction, and
+inference always takes the freshest ROI instead of working through a
+backlog. ``--sequential`` runs the original one-thread loop for
+comparison. ``--source video.mp4 --headless`` replays a file at its
+native frame rate without a window and prints FPS and latency
+percentiles, which makes runs reproducible without a camera.
+``HAND_CROP=1`` classifies a crop around the skin-coloured hand region
+anywhere in the frame instead of the fixed ROI, and answers 'nothing'
+without inference when there is none (``hand_crop.py``).
+
+Usage:
+    python inf.py
+    python inf.py --source clip.mp4 --headless --report run.json
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+
 import cv2
 import numpy as np
-import time
-from tensorflow.keras.models import load_model
+
+from backends import backend_from_env
+from hand_crop import HandCropper, nothing_probs
+from motion_gate import GatedRecognizer, MotionGate, ProbabilitySmoother
+from sign_assembler import SignAssembler
+from streaming import LatestSlot
 
 # === Load Model ===
 MODEL_PATH = "asl_mobilenetv2.h5"  # path to your .h5 file
-model = load_model(MODEL_PATH)
 
 # === Label Map ===
 label_map = {
@@ -17,91 +46,140 @@ label_map = {
 # === Config ===
 IMG_SIZE = (224, 224)
 HOLD_TIME = 1.5  # seconds to hold before finalizing a letter
+ROI = (100, 100, 324, 324)  # x1, y1, x2, y2
+# Skip the forward pass while the ROI barely changes (mean gray-level difference; 0 = never skip)
+MOTION_THRESHOLD = float(os.environ.get("MOTION_THRESHOLD", "2.0"))
+MOTION_MAX_SKIP = int(os.environ.get("MOTION_MAX_SKIP", "15"))  # re-run at least this often
+SMOOTHING = os.environ.get("SMOOTHING", "ema")  # ema | vote | none
+SMOOTHING_ALPHA = float(os.environ.get("SMOOTHING_ALPHA", "0.5"))
+SMOOTHING_WINDOW = int(os.environ.get("SMOOTHING_WINDOW", "5"))
+# Classify a crop around the detected hand instead of the fixed ROI
+HAND_CROP = os.environ.get("HAND_CROP", "0").lower() in ("1", "true", "yes")
+
+
+class FrameSource:
+    """Webcam or video file; files are replayed at their native frame rate.
+
+    When the reader falls behind a paced file, overdue frames are skipped,
+    as a live camera would have moved on; they are counted in ``missed``.
+    """
+
+    def __init__(self, source, pace: bool = True):
+        self.is_file = not str(source).isdigit()
+        self.cap = cv2.VideoCapture(source if self.is_file else int(source))
+        fps = self.cap.get(cv2.CAP_PROP_FPS) if self.is_file else 0
+        self.interval = 1.0 / fps if pace and fps and fps > 0 else 0.0
+        self.started_at = None
+        self.index = 0
+        self.missed = 0
+
+    def opened(self) -> bool:
+        return self.cap.isOpened()
+
+    def read(self):
+        """Next frame as ``(frame, captured_at)``, or None at the end of the stream."""
+        if self.interval:
+            now = time.perf_counter()
+            if self.started_at is None:
+                self.started_at = now
+            due = self.started_at + self.index * self.interval
+            if due > now:
+                time.sleep(due - now)
+            else:
+                # Drop frames whose time has passed; only the current one is "live"
+                behind = int((now - due) / self.interval)
+                for _ in range(behind):
+                    if not self.cap.grab():
+                        return None
+                self.index += behind
+                self.missed += behind
+        ret, frame = self.cap.read()
+        if not ret:
+            return None
+        self.index += 1
+        return frame, time.perf_counter()
 
-# === Initialize webcam ===
-cap = cv2.VideoCapture(0)
-if not cap.isOpened():
-    print("❌ Error: Could not open webcam.")
-    exit()
-
-print("✅ Webcam started. Press 'q' to quit.")
-
-# === Initialize solution tracking ===
-solution = ""
-current_sign = None
-sign_start_time = None
-last_added_sign = None
-
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        print("⚠️ Failed to grab frame.")
-        break
-
-    # Flip horizontally for natural viewing
-    frame = cv2.flip(frame, 1)
-
-    # Define region of interest (ROI)
-    x1, y1, x2, y2 = 100, 100, 324, 324
-    roi = frame[y1:y2, x1:x2]
-
-    # Preprocess ROI for model
-    roi_resized = cv2.resize(roi, IMG_SIZE)
-    roi_array = np.expand_dims(roi_resized.astype("float32") / 255.0, axis=0)
-
-    # Predict
-    preds = model.predict(roi_array, verbose=0)[0]
-    pred_idx = np.argmax(preds)
-    pred_label = label_map[pred_idx]
-    confidence = preds[pred_idx]
-
-    # === Finalize letter logic ===
-    # Ignore 'nothing' predictions
-    if pred_label != 'nothing' and confidence > 0.7:  # Only process high confidence predictions
-        if current_sign == pred_label:
-            # Same sign is being held
-            elapsed_time = time.time() - sign_start_time
-            
-            # If held for HOLD_TIME and not already added, finalize it
-            if elapsed_time >= HOLD_TIME and last_added_sign != pred_label:
-                if pred_label == 'space':
-                    solution += ' '
-                    print(f"✅ Added: [SPACE]")
-                elif pred_label == 'del':
-                    if len(solution) > 0:
-                        solution = solution[:-1]
-                        print(f"✅ Deleted last character")
-                else:
-                    solution += pred_label
-                    print(f"✅ Added: {pred_label}")
-                
-                last_added_sign = pred_label
-        else:
-            # New sign detected, reset timer
-            current_sign = pred_label
-            sign_start_time = time.time()
-            last_added_sign = None
-    else:
-        # Reset if nothing detected
-        current_sign = None
-        sign_start_time = None
-        last_added_sign = None
-
-    # Calculate progress bar for hold time
-    progress = 0
-    if current_sign and sign_start_time:
-        elapsed = time.time() - sign_start_time
-        progress = min(elapsed / HOLD_TIME, 1.0)
+    def release(self) -> None:
+        self.cap.release()
+
+
+class Recognition:
+    """Inference stage: motion gate, smoothing and hold-to-commit over ROI crops."""
+
+    def __init__(self, model):
+        self.model = model
+        # Reused every frame: the ROI is resized straight into it and the backend scales uint8 to [0, 1]
+        self.roi_batch = np.empty((1, IMG_SIZE[1], IMG_SIZE[0], 3), dtype=np.uint8)
+        self.recognizer = GatedRecognizer(
+            self.classify,
+            MotionGate(MOTION_THRESHOLD, MOTION_MAX_SKIP),
+            ProbabilitySmoother(SMOOTHING, SMOOTHING_ALPHA, SMOOTHING_WINDOW),
+        )
+        self.assembler = SignAssembler(hold_time=HOLD_TIME)
+        self.cropper = HandCropper() if HAND_CROP else None
+        self.box = None  # last hand crop, in frame coordinates
+        self.nothing = nothing_probs(len(label_map), 27)
+
+    def region(self, frame):
+        """What the inference stage looks at: the whole frame when cropping to hands, else the ROI."""
+        if self.cropper is not None:
+            return frame
+        x1, y1, x2, y2 = ROI
+        return frame[y1:y2, x1:x2]
+
+    def classify(self, roi):
+        if self.cropper is not None:
+            self.box = self.cropper.find(roi)
+            if self.box is None:
+                # No hand: skip the forward pass
+                return self.nothing
+            x1, y1, x2, y2 = self.box
+            roi = roi[y1:y2, x1:x2]
+        cv2.resize(roi, IMG_SIZE, dst=self.roi_batch[0])
+        return self.model.predict(self.roi_batch)[0]
+
+    def step(self, roi) -> dict:
+        # Predict (reuses the last prediction if the ROI hasn't changed), smoothed over recent frames
+        pred_idx, confidence, inferred = self.recognizer.step(roi)
+        pred_label = label_map[pred_idx]
+
+        # === Finalize letter logic ===
+        committed = self.assembler.update(pred_label, confidence)
+        if committed == 'space':
+            print(f"✅ Added: [SPACE]")
+        elif committed == 'del':
+            print(f"✅ Deleted last character")
+        elif committed:
+            print(f"✅ Added: {committed}")
+
+        # Snapshot for the render stage, which runs on another thread
+        return {
+            'label': pred_label,
+            'confidence': confidence,
+            'inferred': inferred,
+            'current_sign': self.assembler.current_sign,
+            'sign_start_time': self.assembler.sign_start_time,
+            'solution': self.assembler.solution,
+            'box': self.box,
+        }
+
+
+def draw_overlay(frame, result, skip_rate: float) -> None:
+    x1, y1, x2, y2 = (result or {}).get('box') or ROI
 
     # Draw ROI rectangle
     cv2.rectangle(frame, (x1, y1), (x2, y2), (255, 255, 0), 2)
+    if result is None:
+        return
 
     # Display prediction text
-    cv2.putText(frame, f"{pred_label} ({confidence:.2f})", (x1, y1 - 10),
+    cv2.putText(frame, f"{result['label']} ({result['confidence']:.2f})", (x1, max(y1 - 10, 20)),
                 cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
 
     # Display progress bar for hold time
-    if progress > 0 and current_sign:
+    start = result['sign_start_time']
+    if result['current_sign'] and start:
+        progress = min((time.time() - start) / HOLD_TIME, 1.0)
         bar_width = int(progress * (x2 - x1))
         cv2.rectangle(frame, (x1, y2 + 10), (x1 + bar_width, y2 + 30), (0, 255, 0), -1)
         cv2.rectangle(frame, (x1, y2 + 10), (x2, y2 + 30), (255, 255, 255), 2)
@@ -109,17 +187,196 @@ while True:
                     cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
 
     # Display solution text
-    cv2.putText(frame, f"Text: {solution}", (10, 30),
+    cv2.putText(frame, f"Text: {result['solution']}", (10, 30),
                 cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
     cv2.putText(frame, "Press 'q' to quit", (10, frame.shape[0] - 20),
                 cv2.FONT_HERSHEY_SIMPLEX, 0.6, (200, 200, 200), 1)
+    cv2.putText(frame, f"Skipped: {skip_rate*100:.0f}%", (10, 60),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (200, 200, 200), 1)
+
 
-    # Show frame
+def show(frame, headless: bool) -> bool:
+    """Display ``frame``; returns False once the user pressed 'q'."""
+    if headless:
+        return True
     cv2.imshow("ASL Real-Time Prediction", frame)
+    return (cv2.waitKey(1) & 0xFF) != ord('q')
+
+
+def _new_stats() -> dict:
+    return {'captured': 0, 'rendered': 0, 'inferred': 0, 'inference_latency_ms': [], 'display_latency_ms': []}
+
+
+def run_sequential(source: FrameSource, recognition: Recognition, headless: bool, max_frames: int = 0) -> dict:
+    """Capture, infer and render one after another on the calling thread."""
+    stats = _new_stats()
+    started = time.perf_counter()
+    while not max_frames or stats['captured'] < max_frames:
+        item = source.read()
+        if item is None:
+            break
+        frame, captured_at = item
+        stats['captured'] += 1
+
+        # Flip horizontally for natural viewing
+        frame = cv2.flip(frame, 1)
+        result = recognition.step(recognition.region(frame))
+        stats['inference_latency_ms'].append((time.perf_counter() - captured_at) * 1000.0)
+        stats['inferred'] += 1
+
+        draw_overlay(frame, result, recognition.recognizer.skip_rate)
+        keep_going = show(frame, headless)
+        stats['rendered'] += 1
+        stats['display_latency_ms'].append((time.perf_counter() - captured_at) * 1000.0)
+        if not keep_going:
+            break
+    return summarize(stats, time.perf_counter() - started, source, recognition)
+
+
+def run_pipeline(source: FrameSource, recognition: Recognition, headless: bool, max_frames: int = 0) -> dict:
+    """Capture and inference threads feed the render loop on the calling thread.
+
+    Capture hands each frame to both the inference and the render stage
+    through latest-frame-wins slots, so neither stage ever works on a
+    backlog. The render stage draws the newest prediction over every frame.
+    """
+    to_infer: LatestSlot = LatestSlot()
+    to_render: LatestSlot = LatestSlot()
+    results: LatestSlot = LatestSlot()
+    stop = threading.Event()
+    stats = _new_stats()
+
+    def capture():
+        try:
+            while not stop.is_set() and (not max_frames or stats['captured'] < max_frames):
+                item = source.read()
+                if item is None:
+                    break
+                frame, captured_at = item
+                stats['captured'] += 1
+                # Flip horizontally for natural viewing
+                frame = cv2.flip(frame, 1)
+                # The render stage draws on the frame, so inference gets its own copy
+                to_infer.put((recognition.region(frame).copy(), captured_at))
+                to_render.put((frame, captured_at))
+        finally:
+            to_infer.close()
+            to_render.close()
+
+    def infer():
+        try:
+            while True:
+                item = to_infer.get(timeout=0.5)
+                if item is None:
+                    if to_infer.closed:
+                        break
+                    continue
+                roi, captured_at = item
+                result = recognition.step(roi)
+                stats['inference_latency_ms'].append((time.perf_counter() - captured_at) * 1000.0)
+                stats['inferred'] += 1
+                results.put(result)
+        except Exception as e:
+            print(f"❌ Inference failed: {e}")
+            stop.set()
+
+    threads = [threading.Thread(target=capture, name="capture", daemon=True),
+               threading.Thread(target=infer, name="inference", daemon=True)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+
+    result = None
+    while not stop.is_set():
+        item = to_render.get(timeout=0.5)
+        if item is None:
+            if to_render.closed:
+                break
+            continue
+        frame, captured_at = item
+        # Non-blocking: keep drawing the previous prediction until a new one lands
+        result = results.get(timeout=0) or result
+        draw_overlay(frame, result, recognition.recognizer.skip_rate)
+        keep_going = show(frame, headless)
+        stats['rendered'] += 1
+        stats['display_latency_ms'].append((time.perf_counter() - captured_at) * 1000.0)
+        if not keep_going:
+            stop.set()
+
+    stop.set()
+    for t in threads:
+        t.join(5.0)
+    return summarize(stats, time.perf_counter() - started, source, recognition)
+
+
+def _percentiles(samples_ms: list) -> dict:
+    if not samples_ms:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0}
+    arr = np.asarray(samples_ms)
+    return {f"p{q}": float(np.percentile(arr, q)) for q in (50, 95, 99)}
+
+
+def summarize(stats: dict, elapsed_s: float, source: FrameSource, recognition: Recognition) -> dict:
+    gate = recognition.recognizer.gate
+    elapsed_s = max(elapsed_s, 1e-9)
+    return {
+        'elapsed_s': elapsed_s,
+        'frames_captured': stats['captured'],
+        'frames_missed': source.missed,
+        'capture_fps': stats['captured'] / elapsed_s,
+        'render_fps': stats['rendered'] / elapsed_s,
+        'inference_fps': stats['inferred'] / elapsed_s,
+        'forward_passes': gate.frames - gate.skipped - (recognition.cropper.not_found if recognition.cropper else 0),
+        'skip_rate': recognition.recognizer.skip_rate,
+        'inference_latency_ms': _percentiles(stats['inference_latency_ms']),
+        'display_latency_ms': _percentiles(stats['display_latency_ms']),
+        'text': recognition.assembler.solution,
+        'hand_crop': recognition.cropper.stats() if recognition.cropper is not None else None,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", default="0", help="Camera index or video file")
+    parser.add_argument("--headless", action="store_true", help="No window (for video-file benchmarks)")
+    parser.add_argument("--sequential", action="store_true", help="Original single-thread loop")
+    parser.add_argument("--no-pace", action="store_true", help="Read video files as fast as possible")
+    parser.add_argument("--max-frames", type=int, default=0, help="Stop after this many captured frames")
+    parser.add_argument("--report", help="Write the FPS/latency summary as JSON here")
+    args = parser.parse_args()
+
+    # INFERENCE_BACKEND=tflite|onnx (and INFERENCE_INT8=1) use a converted artifact
+    model = backend_from_env(os.environ.get("MODEL_PATH", MODEL_PATH))
+
+    # === Initialize webcam ===
+    source = FrameSource(args.source, pace=not args.no_pace)
+    if not source.opened():
+        print(f"❌ Error: Could not open {'video' if source.is_file else 'webcam'}.")
+        exit()
+    print(f"✅ {'Video' if source.is_file else 'Webcam'} started." + ("" if args.headless else " Press 'q' to quit."))
+
+    recognition = Recognition(model)
+    run = run_sequential if args.sequential else run_pipeline
+    try:
+        report = run(source, recognition, args.headless, args.max_frames)
+    finally:
+        source.release()
+        if not args.headless:
+            cv2.destroyAllWindows()
+
+    print(f"✅ {report['render_fps']:.1f} FPS rendered, {report['inference_fps']:.1f} FPS classified, "
+          f"inference skipped on {report['skip_rate']*100:.1f}% of classified frames")
+    print(f"   latency p50/p95: inference {report['inference_latency_ms']['p50']:.1f}/"
+          f"{report['inference_latency_ms']['p95']:.1f} ms, display {report['display_latency_ms']['p50']:.1f}/"
+          f"{report['display_latency_ms']['p95']:.1f} ms")
+    if report['hand_crop']:
+        crops = report['hand_crop']
+        print(f"   no hand in {crops['no_hand']}/{crops['frames']} classified frames ({crops['skip_rate']*100:.1f}%), "
+              f"hand search p50 {crops['find_ms']['p50']:.2f} ms")
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
 
-    # Quit on 'q'
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        break
 
-cap.release()
-cv2.destroyAllWindows()
+if __name__ == "__main__":
+    main()
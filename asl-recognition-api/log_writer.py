@@ -0,0 +1,237 @@
+"""
+Asynchronous, buffered writer for PredictionLog rows.
+
+Request handlers enqueue plain dict records; a background thread inserts
+them in bulk (a single executemany per flush) when ``flush_size`` records
+are pending or ``flush_interval_s`` has elapsed, keeping database write
+locks off the inference latency path. The same transaction folds the
+records into the dashboard rollups (see ``rollups.py``).
+"""
+
+from __future__ import annotations
+
+import logging
+import queue
+import random
+import threading
+import time
+from typing import Any, Optional
+
+from sqlalchemy import insert
+
+from metrics import Histogram, LATENCY_BUCKETS_MS
+from models import db, PredictionLog
+from rollups import apply_rollups, prune_rollups
+
+logger = logging.getLogger(__name__)
+
+BACKPRESSURE_POLICIES = ("drop", "block", "sample")
+ROLLUP_PRUNE_INTERVAL_S = 600.0
+
+
+class _FlushRequest:
+    """Queue marker: the worker commits everything it holds, then sets ``done``."""
+
+    __slots__ = ("done",)
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class PredictionLogWriter:
+    """Bounded in-memory queue of log records flushed in bulk by a worker thread.
+
+    Args:
+        app: Flask app whose context is used for database access.
+        max_queue: Records held in memory before backpressure applies.
+        flush_size: Flush as soon as this many records are pending.
+        flush_interval_s: Flush at least this often while records are pending.
+        policy: What ``write`` does when the queue is under pressure:
+            ``drop`` discards new records once the queue is full,
+            ``block`` waits up to ``block_timeout_s`` for space, then drops,
+            ``sample`` keeps only ``sample_rate`` of new records once the
+            queue is half full (and drops once it is full).
+    """
+
+    def __init__(
+        self,
+        app,
+        max_queue: int = 10000,
+        flush_size: int = 500,
+        flush_interval_s: float = 1.0,
+        policy: str = "drop",
+        sample_rate: float = 0.1,
+        block_timeout_s: float = 0.05,
+    ):
+        if policy not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"Unknown backpressure policy: {policy}")
+        self.app = app
+        self.max_queue = max(1, int(max_queue))
+        self.flush_size = max(1, int(flush_size))
+        self.flush_interval_s = max(0.01, float(flush_interval_s))
+        self.policy = policy
+        self.sample_rate = min(max(float(sample_rate), 0.0), 1.0)
+        self.block_timeout_s = block_timeout_s
+
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=self.max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stopping = threading.Event()
+
+        self.enqueued = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.sampled_out = 0
+        self.flush_errors = 0
+        self.flushes = 0
+        self.last_flush_ms: Optional[float] = None
+        # Insert + rollup upsert + commit per flush
+        self.flush_ms = Histogram(LATENCY_BUCKETS_MS)
+        self._last_prune = 0.0
+
+    # ----- producer side -----
+
+    def write(self, **record: Any) -> bool:
+        """Queue one PredictionLog record (column name -> value).
+
+        Returns False if the record was dropped by the backpressure policy.
+        """
+        if self._thread is None:
+            self.start()
+        if self.policy == "sample" and self._queue.qsize() >= self.max_queue // 2:
+            if random.random() >= self.sample_rate:
+                self.sampled_out += 1
+                return False
+        try:
+            if self.policy == "block":
+                self._queue.put(record, timeout=self.block_timeout_s)
+            else:
+                self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.enqueued += 1
+        return True
+
+    # ----- lifecycle -----
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="prediction-log-writer", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Stop the worker and flush everything still queued."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.flush()
+
+    def flush(self) -> int:
+        """Synchronously write every record queued before the call; returns the number written.
+
+        While the worker runs, the flush goes through it: records it has
+        already taken off the queue are only in its local batch, so a
+        marker is queued behind them and the call waits until the worker
+        has committed everything up to it.
+        """
+        before = self.flushed
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            request = _FlushRequest()
+            self._queue.put(request)
+            while not request.done.wait(0.1):
+                if not thread.is_alive():
+                    break
+            if request.done.is_set():
+                return self.flushed - before
+        # No worker (stopped, or it exited before reaching the marker): drain here
+        while True:
+            batch = self._drain(self.flush_size)
+            if not batch:
+                return self.flushed - before
+            self._write_batch(batch)
+
+    # ----- worker -----
+
+    def _drain(self, limit: int) -> list[dict[str, Any]]:
+        batch = []
+        while len(batch) < limit:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, _FlushRequest):
+                # Everything queued before it is in this batch or already written
+                if batch:
+                    self._write_batch(batch)
+                    batch = []
+                item.done.set()
+            else:
+                batch.append(item)
+        return batch
+
+    def _write_batch(self, batch: list[dict[str, Any]]) -> int:
+        with self._flush_lock, self.app.app_context():
+            t0 = time.perf_counter()
+            try:
+                # List of dicts -> one executemany INSERT
+                db.session.execute(insert(PredictionLog), batch)
+                apply_rollups(batch)
+                if time.monotonic() - self._last_prune >= ROLLUP_PRUNE_INTERVAL_S:
+                    prune_rollups()
+                    self._last_prune = time.monotonic()
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                self.flush_errors += 1
+                self.dropped += len(batch)
+                logger.error(f"Failed to flush {len(batch)} prediction logs: {e}")
+                return 0
+            self.last_flush_ms = (time.perf_counter() - t0) * 1000.0
+            self.flush_ms.observe(self.last_flush_ms)
+            self.flushed += len(batch)
+            self.flushes += 1
+            return len(batch)
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            deadline = time.monotonic() + self.flush_interval_s
+            batch: list[dict[str, Any]] = []
+            request: Optional[_FlushRequest] = None
+            while len(batch) < self.flush_size and not self._stopping.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=min(remaining, 0.1))
+                except queue.Empty:
+                    continue
+                if isinstance(item, _FlushRequest):
+                    request = item
+                    break
+                batch.append(item)
+            if batch:
+                self._write_batch(batch)
+            if request is not None:
+                request.done.set()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "policy": self.policy,
+            "queue_depth": self._queue.qsize(),
+            "max_queue": self.max_queue,
+            "enqueued": self.enqueued,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "sampled_out": self.sampled_out,
+            "flush_errors": self.flush_errors,
+            "flushes": self.flushes,
+            "last_flush_ms": self.last_flush_ms,
+            "flush_ms": self.flush_ms.snapshot(),
+        }
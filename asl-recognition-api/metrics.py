@@ -0,0 +1,161 @@
+"""
+Lightweight in-process metrics primitives used by the inference components.
+
+Kept dependency-free on purpose: the API server reads snapshots of these
+through the admin stats endpoints and renders them in the Prometheus text
+format for ``/metrics``.
+"""
+
+from __future__ import annotations
+
+import bisect
+import threading
+from typing import Any, Iterable, Optional, Sequence
+
+# Default latency buckets in milliseconds
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+def percentile_from_buckets(bounds: Sequence[float], counts: Sequence[int], q: float) -> Optional[float]:
+    """Estimate the q-th percentile (0-100) from non-cumulative bucket counts.
+
+    ``counts`` has one more entry than ``bounds``; the last entry is the
+    overflow bucket, which is reported as the largest finite bound.
+    """
+    total = sum(counts)
+    if total == 0:
+        return None
+    rank = (q / 100.0) * total
+    seen = 0
+    lower = 0.0
+    for i, c in enumerate(counts):
+        if i >= len(bounds):
+            return float(bounds[-1]) if bounds else None
+        upper = float(bounds[i])
+        if c and seen + c >= rank:
+            # Linear interpolation inside the bucket
+            return lower + (upper - lower) * ((rank - seen) / c)
+        seen += c
+        lower = upper
+    return float(bounds[-1]) if bounds else None
+
+
+class Histogram:
+    """Thread-safe fixed-bucket histogram."""
+
+    def __init__(self, buckets: Iterable[float] = LATENCY_BUCKETS_MS):
+        self.bounds = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.bounds) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._min: Optional[float] = None
+        self._max: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        idx = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self._counts[idx] += 1
+            self._sum += value
+            self._count += 1
+            if self._min is None or value < self._min:
+                self._min = value
+            if self._max is None or value > self._max:
+                self._max = value
+
+    def _clamped(self, value: Optional[float]) -> Optional[float]:
+        # Bucket interpolation can overshoot the observed range
+        if value is None or self._min is None:
+            return value
+        return min(max(value, self._min), self._max)
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            counts = list(self._counts)
+        return self._clamped(percentile_from_buckets(self.bounds, counts, q))
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            counts = list(self._counts)
+            total = self._count
+            s = self._sum
+        buckets = {str(b): c for b, c in zip(self.bounds, counts)}
+        buckets["+Inf"] = counts[-1]
+        return {
+            "count": total,
+            "sum": s,
+            "mean": (s / total) if total else None,
+            "min": self._min,
+            "max": self._max,
+            "p50": self._clamped(percentile_from_buckets(self.bounds, counts, 50)),
+            "p95": self._clamped(percentile_from_buckets(self.bounds, counts, 95)),
+            "p99": self._clamped(percentile_from_buckets(self.bounds, counts, 99)),
+            "buckets": buckets,
+        }
+
+    def cumulative(self) -> tuple[list[tuple[str, int]], float, int]:
+        """``([(le, cumulative count), ...], sum, count)`` for Prometheus exposition."""
+        with self._lock:
+            counts = list(self._counts)
+            s, total = self._sum, self._count
+        out, running = [], 0
+        for bound, c in zip(self.bounds, counts):
+            running += c
+            out.append((_format_value(bound), running))
+        out.append(("+Inf", running + counts[-1]))
+        return out, s, total
+
+
+# ----- Prometheus text exposition (format 0.0.4) -----
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _labels(labels: Optional[dict[str, Any]]) -> str:
+    if not labels:
+        return ""
+    parts = []
+    for key, value in labels.items():
+        escaped = str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{key}="{escaped}"')
+    return "{" + ",".join(parts) + "}"
+
+
+class PrometheusWriter:
+    """Accumulates metric families and renders them as Prometheus text."""
+
+    def __init__(self, prefix: str = ""):
+        self.prefix = prefix
+        self._lines: list[str] = []
+
+    def _header(self, name: str, kind: str, help_text: str) -> str:
+        name = self.prefix + name
+        self._lines.append(f"# HELP {name} {help_text}")
+        self._lines.append(f"# TYPE {name} {kind}")
+        return name
+
+    def scalar(self, name: str, kind: str, help_text: str,
+               samples: Iterable[tuple[Optional[dict[str, Any]], Optional[float]]]) -> None:
+        """A ``gauge`` or ``counter`` family; ``None`` values are skipped."""
+        name = self._header(name, kind, help_text)
+        for labels, value in samples:
+            if value is not None:
+                self._lines.append(f"{name}{_labels(labels)} {_format_value(value)}")
+
+    def histogram(self, name: str, help_text: str,
+                  samples: Iterable[tuple[Optional[dict[str, Any]], Histogram]]) -> None:
+        name = self._header(name, "histogram", help_text)
+        for labels, hist in samples:
+            buckets, s, total = hist.cumulative()
+            labels = dict(labels or {})
+            for le, count in buckets:
+                self._lines.append(f"{name}_bucket{_labels({**labels, 'le': le})} {count}")
+            self._lines.append(f"{name}_sum{_labels(labels)} {_format_value(s)}")
+            self._lines.append(f"{name}_count{_labels(labels)} {total}")
+
+    def render(self) -> str:
+        return "\n".join(self._lines) + "\n"
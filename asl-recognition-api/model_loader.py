@@ -0,0 +1,132 @@
+"""
+Background model loading and warm-up.
+
+The API process starts serving immediately (health, auth, logs) while the
+model is loaded on a background thread. After loading, a dummy forward pass
+triggers graph tracing so the first real request does not pay for it. If
+loading fails (e.g. the model file is missing) it is retried periodically.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+PENDING, LOADING, READY, FAILED = "pending", "loading", "ready", "failed"
+
+
+class ModelLoader:
+    """Loads a backend off the request path and reports readiness.
+
+    Args:
+        factory: Zero-argument callable returning an inference backend.
+        warmup_shapes: Batch sizes to run once after loading.
+        retry_interval_s: Delay between attempts after a failure (0 disables retries).
+        process_start: ``time.perf_counter()`` at process start, for reporting.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        warmup_shapes: tuple[int, ...] = (1,),
+        input_shape: tuple[int, int, int] = (224, 224, 3),
+        retry_interval_s: float = 30.0,
+        process_start: Optional[float] = None,
+    ):
+        self.factory = factory
+        self.warmup_shapes = warmup_shapes
+        self.input_shape = input_shape
+        self.retry_interval_s = retry_interval_s
+        self.process_start = process_start if process_start is not None else time.perf_counter()
+
+        self.backend: Any = None
+        self.state = PENDING
+        self.error: Optional[str] = None
+        self.attempts = 0
+        self.load_ms: Optional[float] = None
+        self.warmup_ms: Optional[float] = None
+        self.ready_after_ms: Optional[float] = None
+
+        self._ready = threading.Event()
+        self._stopping = threading.Event()
+        self._callbacks: list[Callable[[Any], None]] = []
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def on_ready(self, callback: Callable[[Any], None]) -> None:
+        """Run ``callback(backend)`` once the model is ready (immediately if it already is)."""
+        self._callbacks.append(callback)
+        if self.ready:
+            callback(self.backend)
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="model-loader", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until ready; returns readiness."""
+        return self._ready.wait(timeout)
+
+    def _load_once(self) -> None:
+        self.attempts += 1
+        self.state = LOADING
+        t0 = time.perf_counter()
+        backend = self.factory()
+        t1 = time.perf_counter()
+        for n in self.warmup_shapes:
+            backend.predict(np.zeros((n,) + self.input_shape, dtype=np.uint8))
+        t2 = time.perf_counter()
+
+        self.load_ms = (t1 - t0) * 1000.0
+        self.warmup_ms = (t2 - t1) * 1000.0
+        self.backend = backend
+        self.state = READY
+        self.error = None
+        self.ready_after_ms = (t2 - self.process_start) * 1000.0
+        self._ready.set()
+        logger.info(
+            f"✅ Model ready: load {self.load_ms:.0f} ms, warm-up {self.warmup_ms:.0f} ms, "
+            f"{self.ready_after_ms:.0f} ms after process start"
+        )
+        for callback in self._callbacks:
+            try:
+                callback(backend)
+            except Exception as e:
+                logger.error(f"Model ready callback failed: {e}")
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                self._load_once()
+                return
+            except Exception as e:
+                self.state = FAILED
+                self.error = str(e)
+                logger.error(f"❌ Failed to load model (attempt {self.attempts}): {e}")
+            if not self.retry_interval_s or self._stopping.wait(self.retry_interval_s):
+                return
+
+    def status(self) -> dict[str, Any]:
+        return {
+            "state": self.state,
+            "error": self.error,
+            "attempts": self.attempts,
+            "load_ms": self.load_ms,
+            "warmup_ms": self.warmup_ms,
+            "ready_after_ms": self.ready_after_ms,
+            "backend": self.backend.describe() if self.backend is not None else None,
+        }
@@ -1,9 +1,9 @@
 from __future__ import annotations
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Optional, Any
 
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import func
+from sqlalchemy import Index, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.dialects.sqlite import JSON as SQLITE_JSON
 
@@ -43,14 +43,21 @@ class User(db.Model):
 
 class PredictionLog(db.Model):
     __tablename__ = "prediction_logs"
+    # Match the common /api/predictions filters, each ordered for keyset paging
+    __table_args__ = (
+        Index("ix_prediction_logs_user_ts", "user_id", "timestamp", "id"),
+        Index("ix_prediction_logs_label_ts", "label", "timestamp", "id"),
+        Index("ix_prediction_logs_success_ts", "success", "timestamp", "id"),
+        Index("ix_prediction_logs_ts_id", "timestamp", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
-    user_id: Mapped[Optional[int]] = mapped_column(db.ForeignKey("users.id"), nullable=True, index=True)
-    timestamp: Mapped[datetime] = mapped_column(default=datetime.utcnow, index=True)
-    label: Mapped[Optional[str]] = mapped_column(nullable=True, index=True)
+    user_id: Mapped[Optional[int]] = mapped_column(db.ForeignKey("users.id"), nullable=True)
+    timestamp: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    label: Mapped[Optional[str]] = mapped_column(nullable=True)
     confidence: Mapped[Optional[float]] = mapped_column(nullable=True, index=True)
     latency_ms: Mapped[Optional[float]] = mapped_column(nullable=True)
-    success: Mapped[bool] = mapped_column(default=True, index=True)
+    success: Mapped[bool] = mapped_column(default=True)
     error_message: Mapped[Optional[str]] = mapped_column(nullable=True)
     client_ip: Mapped[Optional[str]] = mapped_column(nullable=True)
     top_predictions: Mapped[Optional[dict]] = mapped_column(SQLITE_JSON, nullable=True)
@@ -72,30 +79,135 @@ class PredictionLog(db.Model):
         }
 
 
-def get_summary_stats() -> dict[str, Any]:
-    """Aggregate stats for dashboard."""
-    total_predictions = db.session.query(func.count(PredictionLog.id)).scalar() or 0
-    avg_confidence = db.session.query(func.avg(PredictionLog.confidence)).filter(PredictionLog.success.is_(True)).scalar()
-    avg_latency = db.session.query(func.avg(PredictionLog.latency_ms)).scalar()
+class PredictionRollup(db.Model):
+    """Per-bucket prediction totals, maintained incrementally by the log writer.
+
+    ``granularity`` is ``minute``, ``hour`` or ``total`` (one all-time row).
+    """
+
+    __tablename__ = "prediction_rollups"
+
+    granularity: Mapped[str] = mapped_column(primary_key=True)
+    bucket_start: Mapped[datetime] = mapped_column(primary_key=True)
+    count: Mapped[int] = mapped_column(default=0)
+    success_count: Mapped[int] = mapped_column(default=0)
+    confidence_sum: Mapped[float] = mapped_column(default=0.0)
+    confidence_count: Mapped[int] = mapped_column(default=0)
+    latency_sum: Mapped[float] = mapped_column(default=0.0)
+    latency_count: Mapped[int] = mapped_column(default=0)
+
+
+class PredictionRollupLabel(db.Model):
+    __tablename__ = "prediction_rollup_labels"
+
+    granularity: Mapped[str] = mapped_column(primary_key=True)
+    bucket_start: Mapped[datetime] = mapped_column(primary_key=True)
+    label: Mapped[str] = mapped_column(primary_key=True)
+    count: Mapped[int] = mapped_column(default=0)
+
+
+class PredictionRollupLatency(db.Model):
+    """Latency histogram per bucket; ``bucket`` indexes rollups.LATENCY_BUCKETS_MS."""
+
+    __tablename__ = "prediction_rollup_latency"
+
+    granularity: Mapped[str] = mapped_column(primary_key=True)
+    bucket_start: Mapped[datetime] = mapped_column(primary_key=True)
+    bucket: Mapped[int] = mapped_column(primary_key=True)
+    count: Mapped[int] = mapped_column(default=0)
+
+
+class PredictionArchive(db.Model):
+    """Manifest of archived prediction log files (see ``retention.py``).
+
+    ``completed`` is set once the archived rows have been deleted from
+    ``prediction_logs``; only completed archives are read back.
+    """
+
+    __tablename__ = "prediction_log_archives"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    day: Mapped[datetime] = mapped_column(index=True)
+    path: Mapped[str] = mapped_column(nullable=False)
+    format: Mapped[str] = mapped_column(nullable=False)
+    rows: Mapped[int] = mapped_column(default=0)
+    bytes: Mapped[int] = mapped_column(default=0)
+    min_id: Mapped[int] = mapped_column(default=0)
+    max_id: Mapped[int] = mapped_column(default=0)
+    min_ts: Mapped[datetime] = mapped_column()
+    max_ts: Mapped[datetime] = mapped_column()
+    created_at: Mapped[datetime] = mapped_column(default=datetime.utcnow)
+    completed: Mapped[bool] = mapped_column(default=False)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "day": self.day.date().isoformat(),
+            "path": self.path,
+            "format": self.format,
+            "rows": self.rows,
+            "bytes": self.bytes,
+            "min_ts": self.min_ts.isoformat(),
+            "max_ts": self.max_ts.isoformat(),
+            "completed": self.completed,
+        }
+
+
+# Single-column indexes superseded by the composite ones above
+_SUPERSEDED_INDEXES = (
+    "ix_prediction_logs_user_id",
+    "ix_prediction_logs_timestamp",
+    "ix_prediction_logs_label",
+    "ix_prediction_logs_success",
+)
+
+
+def ensure_indexes() -> None:
+    """Bring an existing database's prediction_logs indexes up to date.
+
+    ``create_all`` skips tables that already exist, so indexes added later
+    are created here (and the superseded single-column ones dropped).
+    Call inside an app context.
+    """
+    from sqlalchemy import inspect, text
+
+    existing = {ix["name"] for ix in inspect(db.engine).get_indexes(PredictionLog.__tablename__)}
+    with db.engine.begin() as conn:
+        for index in PredictionLog.__table__.indexes:
+            if index.name not in existing:
+                index.create(bind=conn)
+        for name in _SUPERSEDED_INDEXES:
+            if name in existing:
+                conn.execute(text(f"DROP INDEX {name}"))
+
+
+def get_summary_stats(activity: Optional[Any] = None, start: Optional[datetime] = None,
+                      end: Optional[datetime] = None) -> dict[str, Any]:
+    """Aggregate stats for dashboard.
+
+    Prediction figures come from the rollup tables (see ``rollups.py``), so
+    the cost does not grow with the log table; ``start``/``end`` restrict
+    them to a time window. ``activity`` is an optional ActivityTracker; users
+    it has seen recently count as active even before their timestamps are
+    flushed to the table.
+    """
+    from rollups import rollup_summary
+
+    stats = rollup_summary(start, end)
 
     users_count = db.session.query(func.count(User.id)).scalar() or 0
 
     # Active sessions: last activity within 15 minutes
-    fifteen_min_ago = datetime.utcnow().timestamp() - 15 * 60
-    # We can't do timestamp arithmetic directly; compute in Python
-    cutoff_dt = datetime.utcfromtimestamp(fifteen_min_ago)
-    active_sessions = (
-        db.session.query(func.count(User.id))
-        .filter(User.last_activity_at.isnot(None))
-        .filter(User.last_activity_at > cutoff_dt)
-        .scalar()
-        or 0
-    )
-
-    return {
-        "total_predictions": int(total_predictions),
-        "average_confidence": float(avg_confidence) if avg_confidence is not None else None,
-        "average_latency_ms": float(avg_latency) if avg_latency is not None else None,
+    cutoff_dt = datetime.utcnow() - timedelta(minutes=15)
+    unflushed = activity.unflushed_active_ids(cutoff_dt) if activity is not None else set()
+    # Unflushed ids may also have an older recent timestamp in the table; count them once
+    active_query = db.session.query(func.count(User.id)).filter(User.last_activity_at > cutoff_dt)
+    if unflushed:
+        active_query = active_query.filter(User.id.notin_(unflushed))
+    active_sessions = (active_query.scalar() or 0) + len(unflushed)
+
+    stats.update({
         "active_sessions": int(active_sessions),
         "users_count": int(users_count),
-    }
+    })
+    return stats
@@ -0,0 +1,208 @@
+"""
+Motion-gated inference and temporal smoothing for live recognition.
+
+Consecutive webcam frames of a held sign are nearly identical, so running
+the classifier on each one mostly recomputes the previous answer.
+``MotionGate`` compares a small grayscale thumbnail of each frame with the
+thumbnail of the last frame that was classified. When the mean absolute
+difference is below ``threshold`` (in 0-255 gray levels) the previous
+prediction is reused instead. Encoded frames are thumbnailed with a 1/8
+scale JPEG decode, which costs a fraction of the full decode it avoids.
+
+``ProbabilitySmoother`` turns the per-frame probability rows into a steadier
+label, using an exponential moving average or a majority vote over the last
+``window`` frames, before the hold-to-commit logic sees it.
+``GatedRecognizer`` combines the two and is used by ``inf.py`` and by
+streaming sessions.
+"""
+
+from __future__ import annotations
+
+from collections import Counter, deque
+from typing import Any, Callable, Optional
+
+import cv2
+import numpy as np
+
+from preprocessing import jpeg_size, payload_bytes
+
+THUMB_SIZE = (32, 32)
+SMOOTHING_MODES = ("none", "ema", "vote")
+
+# (factor, flag), largest first, for decoding just enough of a JPEG to thumbnail it
+_REDUCED_GRAYSCALE = (
+    (8, cv2.IMREAD_REDUCED_GRAYSCALE_8),
+    (4, cv2.IMREAD_REDUCED_GRAYSCALE_4),
+    (2, cv2.IMREAD_REDUCED_GRAYSCALE_2),
+)
+
+
+def thumbnail(image: Any, size: tuple[int, int] = THUMB_SIZE) -> np.ndarray:
+    """Small grayscale uint8 thumbnail of a BGR image or an encoded frame payload."""
+    data = payload_bytes(image)
+    if isinstance(data, np.ndarray):
+        gray = cv2.cvtColor(data, cv2.COLOR_BGR2GRAY) if data.ndim == 3 else data
+    else:
+        flag = cv2.IMREAD_GRAYSCALE
+        dims = jpeg_size(data)
+        if dims is not None:
+            for factor, reduced in _REDUCED_GRAYSCALE:
+                if dims[0] // factor >= size[0] and dims[1] // factor >= size[1]:
+                    flag = reduced
+                    break
+        gray = cv2.imdecode(np.frombuffer(data, np.uint8), flag)
+        if gray is None:
+            raise ValueError("Could not decode image")
+    return cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+
+
+class MotionGate:
+    """Decides per frame whether the scene changed enough to run inference.
+
+    Args:
+        threshold: Mean absolute thumbnail difference (gray levels) below
+            which a frame counts as unchanged. ``0`` disables the gate.
+        max_skip: Consecutive frames that may be skipped before inference
+            runs anyway, so slow drifts and lighting changes are picked up.
+    """
+
+    def __init__(self, threshold: float = 2.0, max_skip: int = 15):
+        self.threshold = float(threshold)
+        self.max_skip = max(0, int(max_skip))
+        self._reference: Optional[np.ndarray] = None
+        self._run = 0
+
+        self.frames = 0
+        self.skipped = 0
+        self.last_diff: Optional[float] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.threshold > 0
+
+    def changed(self, image: Any) -> bool:
+        """True if ``image`` must be classified; it then becomes the new reference."""
+        self.frames += 1
+        if not self.enabled:
+            return True
+        thumb = thumbnail(image)
+        if self._reference is not None and self._run < self.max_skip:
+            self.last_diff = float(cv2.absdiff(thumb, self._reference).mean())
+            if self.last_diff < self.threshold:
+                self._run += 1
+                self.skipped += 1
+                return False
+        self._reference = thumb
+        self._run = 0
+        return True
+
+    def reset(self) -> None:
+        self._reference = None
+        self._run = 0
+
+    @property
+    def skip_rate(self) -> float:
+        return self.skipped / self.frames if self.frames else 0.0
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "threshold": self.threshold,
+            "max_skip": self.max_skip,
+            "frames": self.frames,
+            "skipped": self.skipped,
+            "skip_rate": self.skip_rate,
+        }
+
+
+class ProbabilitySmoother:
+    """Smooths per-frame probability rows into one (class index, confidence).
+
+    ``ema`` keeps ``alpha * probs + (1 - alpha) * previous`` and reports its
+    argmax. ``vote`` reports the most frequent argmax of the last ``window``
+    rows, with that class's mean probability over the window as confidence.
+    ``none`` reports each row's own argmax.
+    """
+
+    def __init__(self, mode: str = "ema", alpha: float = 0.5, window: int = 5):
+        if mode not in SMOOTHING_MODES:
+            raise ValueError(f"smoothing must be one of {', '.join(SMOOTHING_MODES)}")
+        self.mode = mode
+        self.alpha = float(alpha)
+        self.window = max(1, int(window))
+        self.reset()
+
+    def reset(self) -> None:
+        self._ema: Optional[np.ndarray] = None
+        self._rows: deque[np.ndarray] = deque(maxlen=self.window)
+
+    def state(self) -> dict[str, Any]:
+        """JSON-serializable snapshot, restored with :meth:`load_state`."""
+        return {
+            "ema": self._ema.tolist() if self._ema is not None else None,
+            "rows": [np.asarray(row).tolist() for row in self._rows],
+        }
+
+    def load_state(self, state: dict[str, Any]) -> None:
+        self.reset()
+        if state.get("ema") is not None:
+            self._ema = np.asarray(state["ema"], dtype=np.float32)
+        for row in state.get("rows", []):
+            self._rows.append(np.asarray(row, dtype=np.float32))
+
+    def update(self, probs: np.ndarray) -> tuple[int, float]:
+        if self.mode == "ema":
+            if self._ema is None:
+                self._ema = np.array(probs, dtype=np.float32)
+            else:
+                self._ema *= 1.0 - self.alpha
+                self._ema += self.alpha * probs
+            idx = int(np.argmax(self._ema))
+            return idx, float(self._ema[idx])
+        if self.mode == "vote":
+            self._rows.append(probs)
+            votes = Counter(int(np.argmax(row)) for row in self._rows)
+            # Ties go to the class voted for most recently
+            best = max(votes.values())
+            idx = next(int(np.argmax(row)) for row in reversed(self._rows) if votes[int(np.argmax(row))] == best)
+            return idx, float(np.mean([row[idx] for row in self._rows]))
+        idx = int(np.argmax(probs))
+        return idx, float(probs[idx])
+
+
+class GatedRecognizer:
+    """Runs ``infer`` only on frames the gate lets through, then smooths the result."""
+
+    def __init__(self, infer: Callable[[Any], np.ndarray], gate: Optional[MotionGate] = None,
+                 smoother: Optional[ProbabilitySmoother] = None):
+        self.infer = infer
+        self.gate = gate or MotionGate(threshold=0)
+        self.smoother = smoother or ProbabilitySmoother("none")
+        self._last: Optional[tuple[int, float]] = None
+
+    def step(self, frame: Any) -> tuple[int, float, bool]:
+        """Classify ``frame``; returns ``(class index, confidence, inferred)``.
+
+        ``inferred`` is False when the previous (smoothed) prediction was reused.
+        """
+        if not self.gate.changed(frame) and self._last is not None:
+            return self._last + (False,)
+        try:
+            probs = self.infer(frame)
+        except Exception:
+            # Do not let a frame that was never classified become the reference
+            self.gate.reset()
+            raise
+        self._last = self.smoother.update(probs)
+        return self._last + (True,)
+
+    def reset(self) -> None:
+        self.gate.reset()
+        self.smoother.reset()
+        self._last = None
+
+    @property
+    def skip_rate(self) -> float:
+        return self.gate.skip_rate
+
+    def stats(self) -> dict[str, Any]:
+        return dict(self.gate.stats(), smoothing=self.smoother.mode)
@@ -0,0 +1,85 @@
+"""
+Keyset (cursor) pagination for prediction logs.
+
+Pages are ordered newest first on ``(timestamp, id)``. Instead of an OFFSET,
+each page ends with an opaque cursor encoding the last row's key, and the
+next page starts strictly after it, so deep pages cost the same as the
+first one. Total counts are optional: exact, estimated, or skipped.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Optional
+
+from sqlalchemy import func, or_, select, text
+
+from models import db, PredictionLog
+
+# Estimated totals stop counting here and report "at least"
+TOTAL_ESTIMATE_CAP = 10_000
+TOTAL_MODES = ("none", "estimate", "exact")
+
+
+def encode_cursor(timestamp: datetime, row_id: int) -> str:
+    raw = json.dumps([timestamp.isoformat(), row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> tuple[datetime, int]:
+    """Inverse of :func:`encode_cursor`; raises ValueError on a malformed token."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        ts, row_id = json.loads(raw)
+        return datetime.fromisoformat(ts), int(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def keyset_page(query, page_size: int, cursor: Optional[str] = None) -> tuple[list[PredictionLog], Optional[str]]:
+    """One page of ``query`` (newest first) after ``cursor``, plus the next cursor."""
+    if cursor:
+        ts, row_id = decode_cursor(cursor)
+        # The first condition gives the planner an index range; the second breaks ties
+        query = query.filter(
+            PredictionLog.timestamp <= ts,
+            or_(PredictionLog.timestamp < ts, PredictionLog.id < row_id),
+        )
+    rows = (
+        query.order_by(PredictionLog.timestamp.desc(), PredictionLog.id.desc())
+        .limit(page_size + 1)
+        .all()
+    )
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(rows[-1].timestamp, rows[-1].id)
+    return rows, next_cursor
+
+
+def count_rows(query, mode: str = "exact") -> dict[str, Any]:
+    """Total for ``query``: ``exact`` counts, ``estimate`` is cheap, ``none`` skips.
+
+    Estimates use the planner's row estimate on PostgreSQL and a count capped
+    at TOTAL_ESTIMATE_CAP elsewhere.
+    """
+    if mode == "none":
+        return {"total": None}
+    if mode == "exact":
+        return {"total": query.order_by(None).count()}
+
+    stmt = query.order_by(None).with_entities(PredictionLog.id).statement
+    if db.engine.dialect.name == "postgresql":
+        compiled = stmt.compile(dialect=db.engine.dialect, compile_kwargs={"literal_binds": True})
+        plan = db.session.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}")).scalar()
+        return {"total": int(plan[0]["Plan"]["Plan Rows"]), "total_estimated": True}
+
+    capped = stmt.limit(TOTAL_ESTIMATE_CAP + 1).subquery()
+    n = db.session.execute(select(func.count()).select_from(capped)).scalar() or 0
+    return {
+        "total": min(n, TOTAL_ESTIMATE_CAP),
+        "total_estimated": True,
+        "total_capped": n > TOTAL_ESTIMATE_CAP,
+    }
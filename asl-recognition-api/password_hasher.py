@@ -0,0 +1,122 @@
+"""
+Password hashing off the request threads.
+
+bcrypt is deliberately slow (100-300 ms of CPU per call at the default cost),
+so a burst of logins hashed on request threads competes with preprocessing
+and inference for every core. ``PasswordHasher`` runs all hashing on a small
+dedicated thread pool (the bcrypt backends release the GIL) with a bounded
+queue: at most ``workers`` cores ever go to hashing, and callers beyond
+``max_pending`` are turned away with ``HasherBusy`` instead of queueing
+without limit. Queue wait and hash times are recorded for the stats endpoint.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from passlib.hash import bcrypt
+
+from metrics import Histogram
+
+# bcrypt at cost 12 takes a few hundred ms, so the default buckets go higher
+HASH_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 200, 300, 500, 750, 1000, 2000, 5000, 10000)
+
+
+class HasherBusy(RuntimeError):
+    """Raised when ``max_pending`` hash operations are already queued."""
+
+
+class PasswordHasher:
+    """Bounded worker pool for bcrypt hashing and verification.
+
+    Args:
+        rounds: bcrypt cost factor (log2 of the iteration count).
+        workers: Hashing threads, i.e. cores hashing may occupy at once.
+        max_pending: Queued plus running operations before ``HasherBusy``.
+        timeout_s: How long a caller waits for its result.
+    """
+
+    def __init__(self, rounds: int = 12, workers: int = 2, max_pending: int = 64, timeout_s: float = 10.0):
+        self.rounds = int(rounds)
+        self.scheme = bcrypt.using(rounds=self.rounds)
+        self.workers = max(1, int(workers))
+        self.max_pending = max(self.workers, int(max_pending))
+        self.timeout_s = float(timeout_s)
+        self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="password-hash")
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._dummy_hash: Optional[str] = None
+
+        self.wait_ms = Histogram(HASH_BUCKETS_MS)
+        self.hash_ms = Histogram(HASH_BUCKETS_MS)
+        self.rejected = 0
+        self.completed = 0
+
+    def _submit(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise HasherBusy("Too many authentication requests in progress")
+        enqueued = time.perf_counter()
+
+        def run():
+            started = time.perf_counter()
+            self.wait_ms.observe((started - enqueued) * 1000.0)
+            try:
+                return fn(*args)
+            finally:
+                self.hash_ms.observe((time.perf_counter() - started) * 1000.0)
+                self.completed += 1
+                self._slots.release()
+
+        try:
+            future = self._executor.submit(run)
+        except Exception:
+            self._slots.release()
+            raise
+        return future.result(timeout=self.timeout_s)
+
+    def hash(self, plain: str) -> str:
+        return self._submit(self.scheme.hash, plain)
+
+    def verify(self, plain: str, hashed: Optional[str]) -> bool:
+        """Check ``plain`` against ``hashed``; ``None`` burns a comparable amount of time.
+
+        Verifying unknown accounts against a dummy hash keeps response times
+        from revealing which emails are registered.
+        """
+        if hashed is None:
+            if self._dummy_hash is None:
+                self._dummy_hash = self.hash("dummy-password")
+            self._submit(self._safe_verify, "not-the-password", self._dummy_hash)
+            return False
+        return self._submit(self._safe_verify, plain, hashed)
+
+    def needs_update(self, hashed: str) -> bool:
+        """True if ``hashed`` was made with a different cost factor."""
+        try:
+            return self.scheme.needs_update(hashed)
+        except Exception:
+            return False
+
+    @staticmethod
+    def _safe_verify(plain: str, hashed: str) -> bool:
+        try:
+            return bcrypt.verify(plain, hashed)
+        except Exception:
+            return False
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "rounds": self.rounds,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "queue_wait_ms": self.wait_ms.snapshot(),
+            "hash_ms": self.hash_ms.snapshot(),
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
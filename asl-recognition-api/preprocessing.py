@@ -0,0 +1,311 @@
+"""
+Image decoding and preprocessing helpers shared by the prediction endpoints.
+
+The serving path avoids per-frame temporaries: JPEGs much larger than the
+model input are decoded at 1/2, 1/4 or 1/8 scale by libjpeg
+(``IMREAD_REDUCED_COLOR_*``, chosen from the header's dimensions), resized
+straight into the caller's uint8 row, and handed to the model as uint8; the
+backends scale to [0, 1] (see ``backends.py``). Float32 output is still
+available for offline callers and is scaled in place from a per-thread
+uint8 buffer.
+"""
+
+from __future__ import annotations
+
+import base64
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional, Sequence
+
+import cv2
+import numpy as np
+
+from hand_crop import HandCropper, NoHandFound
+from metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+IMG_SIZE = (224, 224)
+PIXEL_SCALE = np.float32(1.0 / 255.0)
+
+# (factor, flag), largest first: libjpeg scales during the IDCT, so these
+# decode several times faster than a full-size decode
+_REDUCED_DECODE = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+# Start-of-frame markers that carry the image size (not DHT/JPG/DAC)
+_JPEG_SOF = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+_local = threading.local()
+
+
+def thread_buffer(shape: tuple[int, ...] = (IMG_SIZE[1], IMG_SIZE[0], 3), dtype=np.uint8) -> np.ndarray:
+    """Array reused by the calling thread; valid until that thread asks for the same shape again."""
+    buffers = getattr(_local, "buffers", None)
+    if buffers is None:
+        buffers = _local.buffers = {}
+    key = (shape, np.dtype(dtype).str)
+    buf = buffers.get(key)
+    if buf is None:
+        buf = buffers[key] = np.empty(shape, dtype=dtype)
+    return buf
+
+
+def jpeg_size(data: Any) -> Optional[tuple[int, int]]:
+    """``(width, height)`` from a JPEG's frame header, or None if ``data`` is not a JPEG."""
+    mv = memoryview(data).cast("B") if not isinstance(data, bytes) else data
+    n = len(mv)
+    if n < 4 or mv[0] != 0xFF or mv[1] != 0xD8:
+        return None
+    i = 2
+    while i + 9 < n:
+        if mv[i] != 0xFF:
+            return None
+        marker = mv[i + 1]
+        if marker == 0xFF:
+            # Fill byte
+            i += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD8:
+            # Standalone markers have no length
+            i += 2
+            continue
+        if marker in _JPEG_SOF:
+            return (mv[i + 7] << 8) | mv[i + 8], (mv[i + 5] << 8) | mv[i + 6]
+        i += 2 + ((mv[i + 2] << 8) | mv[i + 3])
+    return None
+
+
+def reduced_decode_flag(img_bytes: Any, target: tuple[int, int] = IMG_SIZE) -> int:
+    """imdecode flag decoding a JPEG as small as possible while still covering ``target``."""
+    size = jpeg_size(img_bytes)
+    if size is not None:
+        width, height = size
+        for factor, flag in _REDUCED_DECODE:
+            if width // factor >= target[0] and height // factor >= target[1]:
+                return flag
+    return cv2.IMREAD_COLOR
+
+
+def payload_bytes(image_data: Any) -> Any:
+    """Encoded image bytes of a payload (base64 is decoded); arrays pass through."""
+    if isinstance(image_data, (np.ndarray, bytes, bytearray, memoryview)):
+        return image_data
+    if isinstance(image_data, str):
+        # Remove data:image/jpeg;base64, prefix if present
+        if ',' in image_data:
+            image_data = image_data.split(',', 1)[1]
+        try:
+            return base64.b64decode(image_data)
+        except Exception as e:
+            raise ValueError(f"Invalid base64 data: {e}")
+    raise ValueError("Image must be a base64 string or raw bytes")
+
+
+def decode_image(image_data: Any, target: Optional[tuple[int, int]] = None) -> np.ndarray:
+    """Decode an image payload into a BGR uint8 image.
+
+    Accepts a base64 string (optionally a data URL), raw encoded bytes
+    (``bytes``/``bytearray``/``memoryview``, decoded without copying) or a
+    numpy array, which is passed through unchanged. With ``target``, large
+    JPEGs are decoded at a reduced scale that still covers it. Raises
+    ``ValueError`` when the payload cannot be decoded.
+    """
+    img_bytes = payload_bytes(image_data)
+    if isinstance(img_bytes, np.ndarray):
+        return img_bytes
+    if not len(img_bytes):
+        raise ValueError("Empty image")
+    flag = reduced_decode_flag(img_bytes, target) if target else cv2.IMREAD_COLOR
+    img = cv2.imdecode(np.frombuffer(img_bytes, np.uint8), flag)
+    if img is None:
+        raise ValueError("Could not decode image")
+    return img
+
+
+def resize_into(out: np.ndarray, img: np.ndarray) -> None:
+    """Resize ``img`` into ``out``: uint8 pixels, or float32 scaled to [0, 1]."""
+    if out.dtype == np.uint8:
+        cv2.resize(img, IMG_SIZE, dst=out)
+        return
+    pixels = thread_buffer()
+    cv2.resize(img, IMG_SIZE, dst=pixels)
+    np.multiply(pixels, PIXEL_SCALE, out=out)
+
+
+def preprocess_into(out: np.ndarray, image_data: Any, reduced_decode: bool = True) -> None:
+    """Decode and resize one image into a preallocated uint8 or float32 row."""
+    resize_into(out, decode_image(image_data, IMG_SIZE if reduced_decode else None))
+
+
+def preprocess_batch(images: Sequence[Any], dtype=np.float32) -> tuple[np.ndarray, list[Optional[str]], list[int]]:
+    """Preprocess many images into one ``(N, 224, 224, 3)`` array of ``dtype``.
+
+    Valid images are packed contiguously at the front of the array so the
+    caller can run a single forward pass over ``batch[:len(valid)]``.
+
+    Returns:
+        (batch, errors, valid) where ``errors[i]`` is ``None`` for a good
+        image and ``valid[j]`` is the request index of row ``j``.
+    """
+    batch = np.empty((len(images), IMG_SIZE[1], IMG_SIZE[0], 3), dtype=dtype)
+    errors: list[Optional[str]] = [None] * len(images)
+    valid: list[int] = []
+    for i, image_data in enumerate(images):
+        try:
+            preprocess_into(batch[len(valid)], image_data)
+            valid.append(i)
+        except Exception as e:
+            logger.error(f"Error in preprocessing image {i}: {e}")
+            errors[i] = str(e)
+    return batch, errors, valid
+
+
+def top_k(probs: np.ndarray, k: int = 5) -> tuple[np.ndarray, np.ndarray]:
+    """Vectorized top-k over a ``(N, num_classes)`` probability matrix.
+
+    Returns ``(indices, scores)``, both ``(N, k)`` and sorted descending.
+    """
+    k = min(k, probs.shape[1])
+    part = np.argpartition(-probs, k - 1, axis=1)[:, :k]
+    part_scores = np.take_along_axis(probs, part, axis=1)
+    order = np.argsort(-part_scores, axis=1)
+    return np.take_along_axis(part, order, axis=1), np.take_along_axis(part_scores, order, axis=1)
+
+
+class PreprocessPool:
+    """Thread pool for decode/resize work.
+
+    OpenCV releases the GIL in ``imdecode`` and ``resize``, so images are
+    preprocessed in parallel and off the request threads' critical path.
+    Per-stage timings are recorded for the stats endpoint; ``normalize`` is
+    only recorded for float32 output, since uint8 rows are scaled by the
+    model backend.
+
+    With a ``cropper``, each decoded frame is cropped to the hand region
+    before resizing (``handcrop`` stage), and frames without one raise
+    :class:`~hand_crop.NoHandFound` so the caller can answer 'nothing'
+    without inference.
+    """
+
+    STAGES = ("b64decode", "imdecode", "handcrop", "resize", "normalize")
+
+    def __init__(self, workers: Optional[int] = None, reduced_decode: bool = True,
+                 cropper: Optional[HandCropper] = None):
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.reduced_decode = reduced_decode
+        self.cropper = cropper
+        # A hand crop is a fraction of the frame, so decode at twice the resolution it needs
+        self._decode_target = (IMG_SIZE[0] * 2, IMG_SIZE[1] * 2) if cropper else IMG_SIZE
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="preprocess")
+        self.stage_ms = {stage: Histogram() for stage in self.STAGES}
+        self.failures = 0
+
+    def _record(self, stage: str, started: float, timings: Optional[dict]) -> float:
+        now = time.perf_counter()
+        ms = (now - started) * 1000.0
+        self.stage_ms[stage].observe(ms)
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + ms
+        return now
+
+    def _preprocess_into(self, out: np.ndarray, image_data: Any, timings: Optional[dict] = None) -> None:
+        t = time.perf_counter()
+        img_bytes = payload_bytes(image_data)
+        t = self._record("b64decode", t, timings)
+        img = decode_image(img_bytes, self._decode_target if self.reduced_decode else None)
+        t = self._record("imdecode", t, timings)
+        if self.cropper is not None:
+            img = self.cropper.crop(img)
+            t = self._record("handcrop", t, timings)
+            if img is None:
+                raise NoHandFound()
+        if out.dtype == np.uint8:
+            cv2.resize(img, IMG_SIZE, dst=out)
+            self._record("resize", t, timings)
+        else:
+            pixels = thread_buffer()
+            cv2.resize(img, IMG_SIZE, dst=pixels)
+            t = self._record("resize", t, timings)
+            np.multiply(pixels, PIXEL_SCALE, out=out)
+            self._record("normalize", t, timings)
+
+    def preprocess(self, image_data: Any, timings: Optional[dict] = None,
+                   out: Optional[np.ndarray] = None) -> np.ndarray:
+        """Preprocess one image on the pool into ``out`` (a new float32 array by default).
+
+        ``out`` is a ``(224, 224, 3)`` uint8 or float32 array, e.g. a
+        :func:`thread_buffer`. Per-stage milliseconds are added to
+        ``timings`` when given. Raises ``ValueError`` if the image cannot be
+        decoded, and ``NoHandFound`` if the pool crops to hands and there is none.
+        """
+        if out is None:
+            out = np.empty((IMG_SIZE[1], IMG_SIZE[0], 3), dtype=np.float32)
+        try:
+            self._executor.submit(self._preprocess_into, out, image_data, timings).result()
+        except NoHandFound:
+            raise
+        except Exception:
+            self.failures += 1
+            raise
+        return out
+
+    def preprocess_batch(self, images: Sequence[Any], timings: Optional[dict] = None,
+                         dtype=np.float32) -> tuple[np.ndarray, list[Optional[str]], list[int]]:
+        """Parallel version of :func:`preprocess_batch` with the same return value.
+
+        ``timings`` receives per-stage milliseconds summed over the images.
+        Images without a hand (when cropping) have no error but are left out
+        of ``valid``.
+        """
+        batch = np.empty((len(images), IMG_SIZE[1], IMG_SIZE[0], 3), dtype=dtype)
+        # One dict per image: the workers fill them concurrently
+        parts = [{} for _ in images] if timings is not None else [None] * len(images)
+        futures = [
+            self._executor.submit(self._preprocess_into, batch[i], image_data, parts[i])
+            for i, image_data in enumerate(images)
+        ]
+        errors: list[Optional[str]] = [None] * len(images)
+        valid: list[int] = []
+        for i, fut in enumerate(futures):
+            try:
+                fut.result()
+                valid.append(i)
+            except NoHandFound:
+                pass
+            except Exception as e:
+                logger.error(f"Error in preprocessing image {i}: {e}")
+                self.failures += 1
+                errors[i] = str(e)
+        if len(valid) != len(images):
+            # Rare path: compact the good rows to the front
+            batch[:len(valid)] = batch[valid]
+        if timings is not None:
+            for part in parts:
+                for stage, ms in part.items():
+                    timings[stage] = timings.get(stage, 0.0) + ms
+        return batch, errors, valid
+
+    def config(self) -> dict[str, Any]:
+        """Settings that change the model input for a given image (part of the cache version)."""
+        return {
+            "img_size": list(IMG_SIZE),
+            "reduced_decode": self.reduced_decode,
+            "hand_crop": self.cropper.config() if self.cropper is not None else None,
+        }
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "failures": self.failures,
+            "stage_ms": {stage: h.snapshot() for stage, h in self.stage_ms.items()},
+            "hand_crop": self.cropper.stats() if self.cropper is not None else None,
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
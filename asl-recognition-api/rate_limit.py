@@ -0,0 +1,72 @@
+"""
+In-memory token-bucket rate limiting, keyed by arbitrary strings.
+
+Used in front of the auth endpoints so that expensive password hashing is
+only attempted by callers within their budget (per client IP and per
+email). State is per process; idle buckets are dropped as they refill.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any
+
+
+class RateLimiter:
+    """``per_minute`` requests per key on average, with bursts up to ``burst``.
+
+    ``per_minute <= 0`` disables the limiter.
+    """
+
+    def __init__(self, per_minute: float, burst: int = 0, max_keys: int = 100_000):
+        self.per_minute = float(per_minute)
+        self.rate = self.per_minute / 60.0
+        self.burst = float(burst or max(1, int(self.per_minute)))
+        self.max_keys = max(1, int(max_keys))
+        self._buckets: dict[str, tuple[float, float]] = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+
+        self.allowed = 0
+        self.limited = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def hit(self, key: str) -> float:
+        """Take one token for ``key``; returns 0 if allowed, else seconds until retry."""
+        if not self.enabled:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            if tokens >= 1.0:
+                self._buckets[key] = (tokens - 1.0, now)
+                self.allowed += 1
+                retry_after = 0.0
+            else:
+                self._buckets[key] = (tokens, now)
+                self.limited += 1
+                retry_after = (1.0 - tokens) / self.rate
+            if len(self._buckets) > self.max_keys or now - self._last_sweep > 60.0:
+                self._sweep(now)
+        return retry_after
+
+    def _sweep(self, now: float) -> None:
+        # A bucket that has refilled completely carries no state worth keeping
+        full_after = self.burst / self.rate
+        self._buckets = {k: v for k, v in self._buckets.items() if now - v[1] < full_after}
+        self._last_sweep = now
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "per_minute": self.per_minute,
+                "burst": self.burst,
+                "tracked_keys": len(self._buckets),
+                "allowed": self.allowed,
+                "limited": self.limited,
+            }
@@ -0,0 +1,257 @@
+"""
+Content-addressed cache of model outputs.
+
+Identical frames (static backgrounds, client retries, repeated 'nothing'
+frames) are answered from the cache without decoding or inference. Entries
+are keyed on a fast hash of the raw image payload and hold the probability
+row returned by the model. An optional SQLite-backed second tier survives
+restarts. Changing the model version, or preprocessing settings that
+change the model input, invalidates every entry.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Rough per-entry bookkeeping cost on top of the array bytes
+_ENTRY_OVERHEAD_BYTES = 200
+
+
+def model_version(path: str, config: Optional[dict] = None) -> str:
+    """Fingerprint of a model file's contents (``MODEL_VERSION`` env overrides).
+
+    ``config`` describes preprocessing that changes what the model sees for a
+    given payload (e.g. hand cropping); it is folded into the version so
+    changing it also invalidates cached outputs.
+    """
+    version = os.environ.get("MODEL_VERSION") or _file_digest(path)
+    if config:
+        digest = hashlib.blake2b(json.dumps(config, sort_keys=True).encode(), digest_size=8).hexdigest()
+        version = f"{version}+{digest}"
+    return version
+
+
+def _file_digest(path: str) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    try:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    except OSError:
+        return "unknown"
+    return h.hexdigest()
+
+
+class _DiskTier:
+    """SQLite table of key -> float32 probability blob."""
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._puts = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS prediction_cache ("
+            " key TEXT PRIMARY KEY, version TEXT NOT NULL, probs BLOB NOT NULL, created REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str, version: str) -> Optional[np.ndarray]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT probs FROM prediction_cache WHERE key = ? AND version = ?", (key, version)
+            ).fetchone()
+        if row is None:
+            return None
+        return np.frombuffer(row[0], dtype=np.float32)
+
+    def put(self, key: str, version: str, probs: np.ndarray) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO prediction_cache (key, version, probs, created) VALUES (?, ?, ?, ?)",
+                (key, version, probs.astype(np.float32).tobytes(), time.time()),
+            )
+            self._conn.commit()
+            self._puts += 1
+            if self._puts % 1000 == 0:
+                self._prune()
+
+    def _prune(self) -> None:
+        # Drop the oldest rows beyond the cap
+        self._conn.execute(
+            "DELETE FROM prediction_cache WHERE key IN ("
+            " SELECT key FROM prediction_cache ORDER BY created DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+        self._conn.commit()
+
+    def invalidate_except(self, version: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM prediction_cache WHERE version != ?", (version,))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM prediction_cache")
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class PredictionCache:
+    """LRU cache of probability rows bounded by entry count and memory.
+
+    Args:
+        max_entries: In-memory entry limit; ``0`` disables the cache.
+        max_bytes: In-memory size limit (approximate).
+        disk_path: Optional SQLite file for the persistent tier.
+        disk_max_entries: Row cap for the persistent tier.
+        version: Model version; entries from other versions are never served.
+            ``None`` keeps the cache inactive until :meth:`set_version` is
+            called (e.g. once the model has finished loading).
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 4096,
+        max_bytes: int = 16 * 1024 * 1024,
+        disk_path: Optional[str] = None,
+        disk_max_entries: int = 1_000_000,
+        version: Optional[str] = None,
+    ):
+        self.max_entries = max(0, int(max_entries))
+        self.max_bytes = max(0, int(max_bytes))
+        self.version = version
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._disk: Optional[_DiskTier] = None
+        if disk_path and self.max_entries > 0 and self.max_bytes > 0:
+            try:
+                self._disk = _DiskTier(disk_path, disk_max_entries)
+                if version is not None:
+                    self._disk.invalidate_except(version)
+            except Exception as e:
+                logger.error(f"Prediction cache disk tier disabled: {e}")
+                self._disk = None
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0 and self.version is not None
+
+    @staticmethod
+    def key_for(payload: Union[str, bytes, memoryview]) -> str:
+        """Hash a raw image payload (base64 strings are hashed without decoding)."""
+        if isinstance(payload, str):
+            # Ignore a data:image/...;base64, prefix so both forms share a key
+            comma = payload.find(',', 0, 64)
+            if comma != -1:
+                payload = payload[comma + 1:]
+            payload = payload.encode('ascii', 'ignore')
+        return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            probs = self._entries.get(key)
+            if probs is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return probs
+        if self._disk is not None:
+            probs = self._disk.get(key, self.version)
+            if probs is not None:
+                self.disk_hits += 1
+                self._put_memory(key, probs)
+                return probs
+        self.misses += 1
+        return None
+
+    def put(self, key: str, probs: np.ndarray) -> None:
+        if not self.enabled:
+            return
+        probs = np.array(probs, dtype=np.float32, copy=True)
+        self._put_memory(key, probs)
+        if self._disk is not None:
+            try:
+                self._disk.put(key, self.version, probs)
+            except Exception as e:
+                logger.error(f"Prediction cache disk write failed: {e}")
+
+    def _put_memory(self, key: str, probs: np.ndarray) -> None:
+        size = probs.nbytes + _ENTRY_OVERHEAD_BYTES
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.nbytes + _ENTRY_OVERHEAD_BYTES
+            self._entries[key] = probs
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes + _ENTRY_OVERHEAD_BYTES
+                self.evictions += 1
+
+    def set_version(self, version: str) -> None:
+        """Switch model version, dropping every entry computed by another model."""
+        if version == self.version:
+            return
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.version = version
+        if self._disk is not None:
+            self._disk.invalidate_except(version)
+        logger.info(f"Prediction cache invalidated for model version {version}")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self._disk is not None:
+            self._disk.clear()
+
+    def close(self) -> None:
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "version": self.version,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "disk_tier": self._disk.path if self._disk is not None else None,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": ((self.hits + self.disk_hits) / lookups) if lookups else None,
+        }
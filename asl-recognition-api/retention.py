@@ -0,0 +1,451 @@
+"""
+Retention and archival of prediction logs.
+
+Rows older than the retention TTL are moved out of ``prediction_logs`` one
+day at a time: the day's rows are written to a compressed archive file
+(Parquet with zstd when ``pyarrow`` is installed, gzipped NDJSON otherwise)
+under ``<archive_dir>/date=YYYY-MM-DD/``, recorded in the
+``prediction_log_archives`` manifest, and then deleted from the hot table in
+bounded chunks, each its own short transaction. Archived rows can be read
+back (newest first, with the same filters as ``/api/predictions``) so the
+history endpoint can span both the hot table and the archive.
+
+Dashboard rollups are not touched: they keep counting archived rows.
+
+Run once from the command line:
+    python retention.py --days 30 [--dry-run] [--vacuum]
+"""
+
+from __future__ import annotations
+
+import argparse
+import gzip
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from sqlalchemy import delete, func
+
+from export import ExportError, check_format, export_stream
+from models import db, PredictionArchive, PredictionLog
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FORMATS = ("parquet", "ndjson")
+
+
+def default_archive_format() -> str:
+    try:
+        check_format("parquet")
+        return "parquet"
+    except ExportError:
+        return "ndjson"
+
+
+def record_matches(rec: dict[str, Any], filters: dict[str, Any]) -> bool:
+    """Python equivalent of the SQL filters applied by ``/api/predictions``."""
+    if filters.get("user_id") is not None and rec["user_id"] != filters["user_id"]:
+        return False
+    if filters.get("label") and rec["label"] != filters["label"]:
+        return False
+    if filters.get("success") is not None and bool(rec["success"]) != filters["success"]:
+        return False
+    conf = rec["confidence"]
+    if filters.get("min_confidence") is not None and (conf is None or conf < filters["min_confidence"]):
+        return False
+    if filters.get("max_confidence") is not None and (conf is None or conf > filters["max_confidence"]):
+        return False
+    if filters.get("start") is not None and rec["timestamp"] < filters["start"]:
+        return False
+    if filters.get("end") is not None and rec["timestamp"] > filters["end"]:
+        return False
+    return True
+
+
+def _parquet_filter(filters: dict[str, Any], before: Optional[tuple[datetime, int]]):
+    """``pyarrow.dataset`` expression equivalent to :func:`record_matches` plus the cursor, or None."""
+    import pyarrow.dataset as ds
+
+    ts, row_id = ds.field("timestamp"), ds.field("id")
+    terms = []
+    if filters.get("user_id") is not None:
+        terms.append(ds.field("user_id") == filters["user_id"])
+    if filters.get("label"):
+        terms.append(ds.field("label") == filters["label"])
+    if filters.get("success") is not None:
+        terms.append(ds.field("success") == filters["success"])
+    # Comparisons with a null confidence are null, which drops the row as record_matches does
+    if filters.get("min_confidence") is not None:
+        terms.append(ds.field("confidence") >= filters["min_confidence"])
+    if filters.get("max_confidence") is not None:
+        terms.append(ds.field("confidence") <= filters["max_confidence"])
+    if filters.get("start") is not None:
+        terms.append(ts >= filters["start"])
+    if filters.get("end") is not None:
+        terms.append(ts <= filters["end"])
+    if before is not None:
+        terms.append((ts < before[0]) | ((ts == before[0]) & (row_id < before[1])))
+    expr = None
+    for term in terms:
+        expr = term if expr is None else expr & term
+    return expr
+
+
+def _row_group_span(meta, column: int) -> Optional[tuple[Any, Any]]:
+    stats = meta.column(column).statistics
+    if stats is None or not stats.has_min_max:
+        return None
+    return stats.min, stats.max
+
+
+def _read_parquet_page(path: str, filters: dict[str, Any], limit: int,
+                       before: Optional[tuple[datetime, int]]) -> list[dict[str, Any]]:
+    """Newest ``limit`` matching rows of a Parquet archive, reading row groups newest first.
+
+    Archives are written in (timestamp, id) order, one row group per export
+    chunk, so the timestamp statistics of each group bound its rows: groups
+    outside the time range or the cursor are skipped without reading, and
+    the scan ends once the page is full and the next group is older.
+    """
+    import pyarrow.parquet as pq
+
+    parquet = pq.ParquetFile(path)
+    ts_column = parquet.schema_arrow.get_field_index("timestamp")
+    expr = _parquet_filter(filters, before)
+    newest_bound = before[0] if before is not None else None
+    if filters.get("end") is not None:
+        newest_bound = min(newest_bound, filters["end"]) if newest_bound is not None else filters["end"]
+
+    groups = []
+    for i in range(parquet.num_row_groups):
+        span = _row_group_span(parquet.metadata.row_group(i), ts_column)
+        if span is not None:
+            if newest_bound is not None and span[0] > newest_bound:
+                continue
+            if filters.get("start") is not None and span[1] < filters["start"]:
+                continue
+        groups.append((span, i))
+    # Newest first; groups without statistics are read in reverse file order
+    groups.sort(key=lambda g: (g[0] is not None, g[0][1] if g[0] is not None else None, g[1]), reverse=True)
+
+    rows: list[dict[str, Any]] = []
+    for span, i in groups:
+        if len(rows) >= limit and span is not None and span[1] < rows[limit - 1]["timestamp"]:
+            break
+        table = parquet.read_row_group(i)
+        if expr is not None:
+            table = table.filter(expr)
+        if table.num_rows > limit:
+            table = table.sort_by([("timestamp", "descending"), ("id", "descending")]).slice(0, limit)
+        rows.extend(table.to_pylist())
+        rows.sort(key=lambda r: (r["timestamp"], r["id"]), reverse=True)
+        del rows[limit:]
+    for r in rows:
+        if r["top_predictions"] is not None:
+            r["top_predictions"] = json.loads(r["top_predictions"])
+    return rows
+
+
+def _day_start(ts: datetime) -> datetime:
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+class RetentionManager:
+    """Archives and deletes expired prediction logs; reads archives back.
+
+    Args:
+        app: Flask app whose context is used for database access.
+        archive_dir: Root directory for archive partitions.
+        retention_days: Rows older than this many days are archived (0 disables
+            the background worker; :meth:`run_once` still works with ``days``).
+        archive_format: ``parquet`` or ``ndjson`` (gzip); default picks Parquet
+            when pyarrow is installed.
+        chunk_rows: Rows deleted per transaction.
+        pause_s: Sleep between delete chunks so writers can get the lock.
+        interval_s: How often the background worker runs.
+    """
+
+    def __init__(
+        self,
+        app,
+        archive_dir: str,
+        retention_days: int = 0,
+        archive_format: Optional[str] = None,
+        chunk_rows: int = 5000,
+        pause_s: float = 0.05,
+        interval_s: float = 3600.0,
+    ):
+        self.app = app
+        self.archive_dir = archive_dir
+        self.retention_days = max(0, int(retention_days))
+        self.archive_format = archive_format or default_archive_format()
+        if self.archive_format not in ARCHIVE_FORMATS:
+            raise ValueError(f"Unknown archive format: {self.archive_format}")
+        self.chunk_rows = max(1, int(chunk_rows))
+        self.pause_s = max(0.0, float(pause_s))
+        self.interval_s = max(1.0, float(interval_s))
+
+        self._run_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+        self.runs = 0
+        self.archived_rows = 0
+        self.deleted_rows = 0
+        self.last_run_ms: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+    # ----- background worker -----
+
+    def start(self) -> None:
+        if not self.retention_days or self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="log-retention", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(5.0)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stopping.wait(self.interval_s):
+            try:
+                self.run_once()
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"❌ Log retention run failed: {e}")
+
+    # ----- archiving -----
+
+    def run_once(self, days: Optional[int] = None, now: Optional[datetime] = None,
+                 dry_run: bool = False) -> dict[str, Any]:
+        """Archive and delete every full day older than the TTL."""
+        days = self.retention_days if days is None else days
+        if not days:
+            return {"archived_days": [], "rows": 0}
+        cutoff = _day_start((now or datetime.utcnow()) - timedelta(days=days))
+        t0 = time.perf_counter()
+        archived: list[dict[str, Any]] = []
+        with self._run_lock, self.app.app_context():
+            # Finish deletes interrupted by a crash or restart
+            for manifest in db.session.query(PredictionArchive).filter_by(completed=False).all():
+                self._delete_archived(manifest)
+
+            after = datetime.min
+            while not self._stopping.is_set():
+                oldest = (
+                    db.session.query(func.min(PredictionLog.timestamp))
+                    .filter(PredictionLog.timestamp >= after, PredictionLog.timestamp < cutoff)
+                    .scalar()
+                )
+                if oldest is None:
+                    break
+                day = _day_start(oldest)
+                if dry_run:
+                    archived.append(self._day_stats(day))
+                    # Nothing is deleted, so skip past the day explicitly
+                    after = day + timedelta(days=1)
+                    continue
+                manifest = self._archive_day(day)
+                self._delete_archived(manifest)
+                archived.append(manifest.to_dict())
+
+        if not dry_run:
+            self.runs += 1
+            self.last_run_ms = (time.perf_counter() - t0) * 1000.0
+            self.last_error = None
+        rows = sum(a["rows"] for a in archived)
+        if rows:
+            logger.info(f"✅ Archived {rows} prediction logs from {len(archived)} day(s)")
+        return {"archived_days": archived, "rows": rows, "dry_run": dry_run}
+
+    def _day_query(self, day: datetime):
+        return db.session.query(PredictionLog).filter(
+            PredictionLog.timestamp >= day, PredictionLog.timestamp < day + timedelta(days=1)
+        )
+
+    def _day_stats(self, day: datetime) -> dict[str, Any]:
+        count, min_id, max_id, min_ts, max_ts = self._day_query(day).with_entities(
+            func.count(PredictionLog.id), func.min(PredictionLog.id), func.max(PredictionLog.id),
+            func.min(PredictionLog.timestamp), func.max(PredictionLog.timestamp),
+        ).one()
+        return {"day": day.date().isoformat(), "rows": int(count), "min_id": min_id, "max_id": max_id,
+                "min_ts": min_ts, "max_ts": max_ts}
+
+    def _archive_day(self, day: datetime) -> PredictionArchive:
+        stats = self._day_stats(day)
+        ext = "parquet" if self.archive_format == "parquet" else "ndjson.gz"
+        rel_path = os.path.join(f"date={stats['day']}", f"part-{int(time.time() * 1000)}.{ext}")
+        path = os.path.join(self.archive_dir, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        q = self._day_query(day).filter(PredictionLog.id <= stats["max_id"])
+        tmp = path + ".tmp"
+        opener = open if self.archive_format == "parquet" else gzip.open
+        with opener(tmp, "wb") as f:
+            for part in export_stream(q, self.archive_format, chunk=self.chunk_rows):
+                f.write(part)
+        os.replace(tmp, path)
+
+        manifest = PredictionArchive(
+            day=day, path=rel_path, format=self.archive_format, rows=stats["rows"],
+            bytes=os.path.getsize(path), min_id=stats["min_id"], max_id=stats["max_id"],
+            min_ts=stats["min_ts"], max_ts=stats["max_ts"],
+        )
+        db.session.add(manifest)
+        db.session.commit()
+        self.archived_rows += stats["rows"]
+        return manifest
+
+    def _delete_archived(self, manifest: PredictionArchive) -> None:
+        """Delete a manifest's rows from the hot table in short transactions."""
+        q = self._day_query(manifest.day).filter(PredictionLog.id <= manifest.max_id)
+        while True:
+            ids = [row_id for (row_id,) in q.with_entities(PredictionLog.id).limit(self.chunk_rows)]
+            if not ids:
+                break
+            db.session.execute(delete(PredictionLog).where(PredictionLog.id.in_(ids)))
+            db.session.commit()
+            self.deleted_rows += len(ids)
+            if self.pause_s:
+                time.sleep(self.pause_s)
+        manifest.completed = True
+        db.session.commit()
+
+    # ----- reading archives -----
+
+    def _read_partition(self, manifest: PredictionArchive, filters: dict[str, Any], limit: int,
+                        before: Optional[tuple[datetime, int]]) -> list[dict[str, Any]]:
+        """The newest ``limit`` matching rows of one archive file, newest first.
+
+        Parquet files are read one row group at a time, newest first, and
+        reading stops once ``limit`` rows newer than every remaining group
+        are in hand; NDJSON files are streamed through a bounded heap. Either
+        way at most one row group (``chunk_rows`` rows) plus the page is held
+        in memory.
+        """
+        path = os.path.join(self.archive_dir, manifest.path)
+        if manifest.format == "parquet":
+            rows = _read_parquet_page(path, filters, limit, before)
+        else:
+            newest: list[tuple] = []
+            with gzip.open(path, "rt") as f:
+                for n, line in enumerate(f):
+                    if not line.strip():
+                        continue
+                    r = json.loads(line)
+                    r["timestamp"] = datetime.fromisoformat(r["timestamp"])
+                    if before is not None and (r["timestamp"], r["id"]) >= before:
+                        continue
+                    if not record_matches(r, filters):
+                        continue
+                    item = (r["timestamp"], r["id"], n, r)
+                    if len(newest) < limit:
+                        heapq.heappush(newest, item)
+                    elif item[:2] > newest[0][:2]:
+                        heapq.heapreplace(newest, item)
+            rows = [item[3] for item in newest]
+        rows.sort(key=lambda r: (r["timestamp"], r["id"]), reverse=True)
+        return rows
+
+    def query(self, filters: dict[str, Any], limit: int,
+              before: Optional[tuple[datetime, int]] = None) -> list[dict[str, Any]]:
+        """Up to ``limit`` archived rows matching ``filters``, newest first,
+        strictly older than the ``(timestamp, id)`` key ``before``."""
+        mq = db.session.query(PredictionArchive).filter(PredictionArchive.completed.is_(True))
+        if before is not None:
+            mq = mq.filter(PredictionArchive.min_ts <= before[0])
+        if filters.get("start") is not None:
+            mq = mq.filter(PredictionArchive.max_ts >= filters["start"])
+        if filters.get("end") is not None:
+            mq = mq.filter(PredictionArchive.min_ts <= filters["end"])
+
+        results: list[dict[str, Any]] = []
+        for manifest in mq.order_by(PredictionArchive.max_ts.desc(), PredictionArchive.max_id.desc()):
+            if len(results) >= limit and (manifest.max_ts, manifest.max_id) < (
+                results[limit - 1]["timestamp"], results[limit - 1]["id"]
+            ):
+                break
+            results.extend(self._read_partition(manifest, filters, limit, before))
+            results.sort(key=lambda r: (r["timestamp"], r["id"]), reverse=True)
+            del results[limit:]
+        return results
+
+    def stats(self) -> dict[str, Any]:
+        with self.app.app_context():
+            files, rows, size = db.session.query(
+                func.count(PredictionArchive.id),
+                func.coalesce(func.sum(PredictionArchive.rows), 0),
+                func.coalesce(func.sum(PredictionArchive.bytes), 0),
+            ).filter(PredictionArchive.completed.is_(True)).one()
+        return {
+            "retention_days": self.retention_days,
+            "archive_dir": self.archive_dir,
+            "archive_format": self.archive_format,
+            "archive_files": int(files),
+            "archive_rows": int(rows),
+            "archive_bytes": int(size),
+            "runs": self.runs,
+            "archived_rows": self.archived_rows,
+            "deleted_rows": self.deleted_rows,
+            "last_run_ms": self.last_run_ms,
+            "last_error": self.last_error,
+        }
+
+
+def archived_to_dict(rec: dict[str, Any]) -> dict[str, Any]:
+    """Archived row in the same shape as ``PredictionLog.to_dict``."""
+    out = dict(rec)
+    out["timestamp"] = rec["timestamp"].isoformat()
+    out["archived"] = True
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=int, default=int(os.environ.get("RETENTION_DAYS", "30")),
+                        help="Archive rows older than this many days")
+    parser.add_argument("--archive-dir", default=os.environ.get("RETENTION_ARCHIVE_DIR"))
+    parser.add_argument("--format", choices=ARCHIVE_FORMATS, default=os.environ.get("RETENTION_ARCHIVE_FORMAT"))
+    parser.add_argument("--chunk", type=int, default=5000, help="Rows deleted per transaction")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be archived")
+    parser.add_argument("--vacuum", action="store_true", help="VACUUM the SQLite file afterwards")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    from flask import Flask
+
+    from db_config import init_db
+
+    app = Flask(__name__)
+    init_db(app)
+    with app.app_context():
+        db.create_all()
+
+    manager = RetentionManager(
+        app,
+        archive_dir=args.archive_dir or os.path.join(app.instance_path, "archive"),
+        archive_format=args.format,
+        chunk_rows=args.chunk,
+    )
+    result = manager.run_once(days=args.days, dry_run=args.dry_run)
+    print(json.dumps(result, indent=2, default=str))
+
+    if args.vacuum and not args.dry_run:
+        with app.app_context():
+            if db.engine.dialect.name == "sqlite":
+                # Return the space freed by the deletes to the filesystem
+                with db.engine.connect() as conn:
+                    conn.execution_options(isolation_level="AUTOCOMMIT").exec_driver_sql("VACUUM")
+
+
+if __name__ == "__main__":
+    main()
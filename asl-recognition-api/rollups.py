@@ -0,0 +1,230 @@
+"""
+Incrementally maintained rollups of prediction logs.
+
+Every flush of the log writer folds its records into per-minute, per-hour
+and all-time buckets (counts, success counts, confidence and latency sums, a
+latency histogram and per-label counts) with additive upserts in the same
+transaction as the insert. Dashboard stats then read a bounded number of
+rollup rows instead of scanning ``prediction_logs``. Windows are resolved
+to whole buckets: minutes for recent, short windows and hours otherwise.
+Minute buckets are pruned after ``MINUTE_RETENTION``.
+"""
+
+from __future__ import annotations
+
+import bisect
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import delete, func, insert, select, update
+
+from metrics import percentile_from_buckets
+from models import db, PredictionLog, PredictionRollup, PredictionRollupLabel, PredictionRollupLatency
+
+# Finer than metrics.LATENCY_BUCKETS_MS: request latency percentiles are the point here
+LATENCY_BUCKETS_MS = (1, 2, 3, 5, 7, 10, 15, 20, 30, 50, 75, 100, 150, 200, 300, 500, 750, 1000, 2000, 5000)
+
+MINUTE, HOUR, TOTAL = "minute", "hour", "total"
+TOTAL_BUCKET = datetime(1970, 1, 1)
+MINUTE_RETENTION = timedelta(hours=48)
+# Windows up to this long (and within minute retention) are read at minute resolution
+MINUTE_WINDOW_MAX = timedelta(hours=6)
+
+_ROLLUP_TABLES = (PredictionRollup, PredictionRollupLabel, PredictionRollupLatency)
+_SCALARS = ("count", "success_count", "confidence_sum", "confidence_count", "latency_sum", "latency_count")
+
+
+def bucket_start(ts: datetime, granularity: str) -> datetime:
+    if granularity == MINUTE:
+        return ts.replace(second=0, microsecond=0)
+    if granularity == HOUR:
+        return ts.replace(minute=0, second=0, microsecond=0)
+    return TOTAL_BUCKET
+
+
+def aggregate(records: Iterable[dict[str, Any]]) -> tuple[dict, dict, dict]:
+    """Fold log records into rollup deltas keyed by (granularity, bucket_start)."""
+    scalars: dict = defaultdict(lambda: dict.fromkeys(_SCALARS, 0))
+    labels: dict = defaultdict(int)
+    latency: dict = defaultdict(int)
+    for r in records:
+        ts = r.get("timestamp") or datetime.utcnow()
+        success = bool(r.get("success", True))
+        conf = r.get("confidence")
+        lat = r.get("latency_ms")
+        label = r.get("label")
+        for gran in (MINUTE, HOUR, TOTAL):
+            key = (gran, bucket_start(ts, gran))
+            row = scalars[key]
+            row["count"] += 1
+            if success:
+                row["success_count"] += 1
+            if success and conf is not None:
+                row["confidence_sum"] += float(conf)
+                row["confidence_count"] += 1
+            if lat is not None:
+                row["latency_sum"] += float(lat)
+                row["latency_count"] += 1
+                latency[key + (bisect.bisect_left(LATENCY_BUCKETS_MS, lat),)] += 1
+            if label is not None:
+                labels[key + (label,)] += 1
+    return scalars, labels, latency
+
+
+def _upsert(model, keys: tuple[str, ...], rows: list[dict[str, Any]], additive: tuple[str, ...]) -> None:
+    """Insert rows, adding ``additive`` columns onto existing rows with the same key."""
+    if not rows:
+        return
+    table = model.__table__
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={c: table.c[c] + stmt.excluded[c] for c in additive},
+        )
+        db.session.execute(stmt, rows)
+        return
+    # Portable fallback: update, then insert whatever did not exist yet
+    for row in rows:
+        where = [table.c[k] == row[k] for k in keys]
+        result = db.session.execute(
+            update(table).where(*where).values({c: table.c[c] + row[c] for c in additive})
+        )
+        if result.rowcount == 0:
+            db.session.execute(insert(table).values(row))
+
+
+def apply_rollups(records: list[dict[str, Any]]) -> None:
+    """Add ``records`` to the rollups in the current session (caller commits)."""
+    scalars, labels, latency = aggregate(records)
+    _upsert(
+        PredictionRollup, ("granularity", "bucket_start"),
+        [{"granularity": g, "bucket_start": b, **v} for (g, b), v in scalars.items()],
+        _SCALARS,
+    )
+    _upsert(
+        PredictionRollupLabel, ("granularity", "bucket_start", "label"),
+        [{"granularity": g, "bucket_start": b, "label": l, "count": n} for (g, b, l), n in labels.items()],
+        ("count",),
+    )
+    _upsert(
+        PredictionRollupLatency, ("granularity", "bucket_start", "bucket"),
+        [{"granularity": g, "bucket_start": b, "bucket": i, "count": n} for (g, b, i), n in latency.items()],
+        ("count",),
+    )
+
+
+def prune_rollups(now: Optional[datetime] = None) -> None:
+    """Drop minute buckets older than MINUTE_RETENTION (caller commits)."""
+    cutoff = (now or datetime.utcnow()) - MINUTE_RETENTION
+    for model in _ROLLUP_TABLES:
+        db.session.execute(delete(model).where(model.granularity == MINUTE, model.bucket_start < cutoff))
+
+
+def rebuild_rollups(chunk: int = 10_000) -> int:
+    """Recompute every rollup from ``prediction_logs``; returns rows folded in.
+
+    Used to backfill databases that predate the rollup tables. Call inside
+    an app context.
+    """
+    for model in _ROLLUP_TABLES:
+        db.session.execute(delete(model))
+    columns = (PredictionLog.timestamp, PredictionLog.success, PredictionLog.confidence,
+               PredictionLog.latency_ms, PredictionLog.label)
+    rows = db.session.execute(select(*columns).execution_options(yield_per=chunk))
+    total = 0
+    for part in rows.partitions():
+        apply_rollups([r._asdict() for r in part])
+        total += len(part)
+    prune_rollups()
+    db.session.commit()
+    return total
+
+
+def ensure_rollups() -> None:
+    """Backfill the rollups if logs exist but were never rolled up."""
+    has_total = db.session.query(PredictionRollup).filter_by(granularity=TOTAL).first() is not None
+    if not has_total and db.session.query(PredictionLog.id).first() is not None:
+        rebuild_rollups()
+
+
+_WINDOW_UNITS = {"m": "minutes", "h": "hours", "d": "days"}
+
+
+def parse_window(spec: str) -> timedelta:
+    """``15m`` / ``6h`` / ``7d`` -> timedelta; raises ValueError otherwise."""
+    spec = spec.strip().lower()
+    unit = _WINDOW_UNITS.get(spec[-1:])
+    if unit is None or not spec[:-1].isdigit():
+        raise ValueError(f"expected e.g. 15m, 6h or 7d, got '{spec}'")
+    return timedelta(**{unit: int(spec[:-1])})
+
+
+def _granularity_for(start: Optional[datetime], end: Optional[datetime]) -> str:
+    if start is None and end is None:
+        return TOTAL
+    now = datetime.utcnow()
+    start = start or datetime.min
+    end = end or now
+    if end - start <= MINUTE_WINDOW_MAX and start >= now - MINUTE_RETENTION:
+        return MINUTE
+    return HOUR
+
+
+def rollup_summary(start: Optional[datetime] = None, end: Optional[datetime] = None) -> dict[str, Any]:
+    """Prediction totals, averages, latency percentiles and label counts.
+
+    Without a window the single all-time row is read; otherwise buckets whose
+    start lies in ``[start, end]`` (rounded down to the bucket size).
+    """
+    gran = _granularity_for(start, end)
+
+    def window(model, query):
+        query = query.filter(model.granularity == gran)
+        if start is not None:
+            query = query.filter(model.bucket_start >= bucket_start(start, gran))
+        if end is not None:
+            query = query.filter(model.bucket_start <= end)
+        return query
+
+    sums = window(PredictionRollup, db.session.query(
+        *(func.coalesce(func.sum(getattr(PredictionRollup, c)), 0) for c in _SCALARS)
+    )).one()
+    totals = dict(zip(_SCALARS, sums))
+
+    hist = dict(window(PredictionRollupLatency, db.session.query(
+        PredictionRollupLatency.bucket, func.sum(PredictionRollupLatency.count)
+    )).group_by(PredictionRollupLatency.bucket).all())
+    counts = [int(hist.get(i, 0)) for i in range(len(LATENCY_BUCKETS_MS) + 1)]
+
+    labels = window(PredictionRollupLabel, db.session.query(
+        PredictionRollupLabel.label, func.sum(PredictionRollupLabel.count)
+    )).group_by(PredictionRollupLabel.label).all()
+
+    count = int(totals["count"])
+    return {
+        "total_predictions": count,
+        "successful_predictions": int(totals["success_count"]),
+        "success_rate": (totals["success_count"] / count) if count else None,
+        "average_confidence": (
+            float(totals["confidence_sum"]) / totals["confidence_count"] if totals["confidence_count"] else None
+        ),
+        "average_latency_ms": (
+            float(totals["latency_sum"]) / totals["latency_count"] if totals["latency_count"] else None
+        ),
+        "latency_percentiles_ms": {
+            f"p{q}": percentile_from_buckets(LATENCY_BUCKETS_MS, counts, q) for q in (50, 95, 99)
+        },
+        "label_counts": {label: int(n) for label, n in sorted(labels, key=lambda x: -x[1])},
+        "window": {
+            "start": start.isoformat() if start else None,
+            "end": end.isoformat() if end else None,
+            "resolution": gran,
+        },
+    }
@@ -0,0 +1,66 @@
+"""
+Production entry point: prefork inference workers behind a threaded HTTP front.
+
+    python serve.py --workers 4 --port 5001
+
+The front process serves HTTP, decodes and preprocesses images and runs the
+micro-batcher; it never loads TensorFlow. Batches are handed to ``--workers``
+inference processes (one per core, each pinned and single-threaded) through
+shared memory, so throughput scales with cores. With the TFLite backend the
+model file is memory-mapped, so its weights are shared between workers via
+the page cache rather than copied into each one; it is the default when
+``INFERENCE_BACKEND`` is unset and a converted ``.tflite`` model exists.
+Keras and ONNX workers each hold a full copy of the weights.
+
+Uses waitress when installed; ``--server werkzeug`` (also the fallback) is
+required for the WebSocket streaming endpoint.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+
+from worker_pool import available_cores
+
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=0,
+                        help="Inference worker processes (default: available cores - 1, min 1)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5001)
+    parser.add_argument("--threads", type=int, default=32, help="HTTP front threads")
+    parser.add_argument("--server", choices=("waitress", "werkzeug"), default="waitress")
+    args = parser.parse_args()
+
+    workers = args.workers or max(1, len(available_cores()) - 1)
+    os.environ["INFERENCE_WORKERS"] = str(workers)
+
+    import app as app_module
+
+    with app_module.app.app_context():
+        app_module.db.create_all()
+        app_module.ensure_indexes()
+        app_module.ensure_rollups()
+
+    print(f"🚀 Serving on http://{args.host}:{args.port} with {workers} inference workers")
+    if args.server == "waitress":
+        try:
+            from waitress import serve
+        except ImportError:
+            logger.warning("waitress is not installed; falling back to the werkzeug server")
+        else:
+            serve(app_module.app, host=args.host, port=args.port, threads=args.threads)
+            return
+
+    from werkzeug.serving import run_simple
+
+    run_simple(args.host, args.port, app_module.app, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
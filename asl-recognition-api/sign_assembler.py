@@ -0,0 +1,87 @@
+"""
+Hold-to-commit text assembly shared by the webcam script and streaming sessions.
+
+A sign is committed once it has been predicted (above ``min_confidence``)
+for ``hold_time`` seconds; 'space' appends a space, 'del' removes the last
+character and 'nothing' resets the hold timer.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Any, Optional
+
+HOLD_TIME = 1.5  # seconds to hold before finalizing a letter
+MIN_CONFIDENCE = 0.7  # Only process high confidence predictions
+
+
+class SignAssembler:
+    """Per-session state machine turning per-frame predictions into text."""
+
+    def __init__(self, hold_time: float = HOLD_TIME, min_confidence: float = MIN_CONFIDENCE):
+        self.hold_time = hold_time
+        self.min_confidence = min_confidence
+        self.reset()
+
+    def reset(self) -> None:
+        self.solution = ""
+        self.current_sign: Optional[str] = None
+        self.sign_start_time: Optional[float] = None
+        self.last_added_sign: Optional[str] = None
+
+    def update(self, pred_label: str, confidence: float, now: Optional[float] = None) -> Optional[str]:
+        """Feed one prediction; returns the committed sign, if this frame committed one."""
+        now = time.time() if now is None else now
+        committed = None
+
+        # Ignore 'nothing' predictions
+        if pred_label != 'nothing' and confidence > self.min_confidence:
+            if self.current_sign == pred_label:
+                # Same sign is being held
+                elapsed_time = now - self.sign_start_time
+
+                # If held for HOLD_TIME and not already added, finalize it
+                if elapsed_time >= self.hold_time and self.last_added_sign != pred_label:
+                    if pred_label == 'space':
+                        self.solution += ' '
+                    elif pred_label == 'del':
+                        if len(self.solution) > 0:
+                            self.solution = self.solution[:-1]
+                    else:
+                        self.solution += pred_label
+                    committed = pred_label
+                    self.last_added_sign = pred_label
+            else:
+                # New sign detected, reset timer
+                self.current_sign = pred_label
+                self.sign_start_time = now
+                self.last_added_sign = None
+        else:
+            # Reset if nothing detected
+            self.current_sign = None
+            self.sign_start_time = None
+            self.last_added_sign = None
+
+        return committed
+
+    def state(self) -> dict[str, Any]:
+        """JSON-serializable snapshot, restored with :meth:`load_state`."""
+        return {
+            "solution": self.solution,
+            "current_sign": self.current_sign,
+            "sign_start_time": self.sign_start_time,
+            "last_added_sign": self.last_added_sign,
+        }
+
+    def load_state(self, state: dict[str, Any]) -> None:
+        self.solution = state.get("solution", "")
+        self.current_sign = state.get("current_sign")
+        self.sign_start_time = state.get("sign_start_time")
+        self.last_added_sign = state.get("last_added_sign")
+
+    def progress(self, now: Optional[float] = None) -> float:
+        """Fraction (0..1) of the hold time elapsed for the current sign."""
+        if not (self.current_sign and self.sign_start_time):
+            return 0.0
+        now = time.time() if now is None else now
+        return min((now - self.sign_start_time) / self.hold_time, 1.0)
@@ -0,0 +1,219 @@
+"""
+Streaming recognition sessions.
+
+A client pushes frames continuously over one connection and receives
+per-frame predictions plus committed text. Each session owns a
+SignAssembler (the same hold-to-commit logic as ``inf.py``) and a
+single-slot, latest-frame-wins buffer: if inference falls behind, older
+unprocessed frames are dropped instead of queueing up. Frames that barely
+differ from the last classified one reuse its prediction, and predictions
+are smoothed over time before the hold logic sees them (see
+``motion_gate.py``).
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Generic, Optional, TypeVar
+
+import numpy as np
+
+from motion_gate import GatedRecognizer, MotionGate, ProbabilitySmoother
+from sign_assembler import SignAssembler, HOLD_TIME, MIN_CONFIDENCE
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class LatestSlot(Generic[T]):
+    """Single-slot buffer where a new item replaces an unconsumed one."""
+
+    def __init__(self):
+        self._item: Optional[T] = None
+        self._has_item = False
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def put(self, item: T) -> bool:
+        """Store ``item``; returns True if it replaced (dropped) an unconsumed item."""
+        with self._cond:
+            replaced = self._has_item
+            self._item = item
+            self._has_item = True
+            self._cond.notify()
+            return replaced
+
+    def get(self, timeout: Optional[float] = None) -> Optional[T]:
+        """Take the newest item, waiting up to ``timeout``; None on timeout/close."""
+        with self._cond:
+            if not self._has_item and not self._closed:
+                self._cond.wait(timeout)
+            if not self._has_item:
+                return None
+            item = self._item
+            self._item = None
+            self._has_item = False
+            return item
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+
+class RecognitionSession:
+    """Server-side state for one streaming client.
+
+    Args:
+        infer: Callable mapping one image payload to a probability row.
+        labels: Class index -> label mapping.
+        send: Callable delivering one JSON-serializable message to the client.
+        on_prediction: Optional hook called with (label, confidence, latency_ms)
+            for every classified frame (used for prediction logging); frames
+            that reuse the previous prediction are not reported.
+        gate: Skips inference on frames that match the last classified one.
+        smoother: Temporal smoothing applied before hold-to-commit.
+    """
+
+    def __init__(
+        self,
+        infer: Callable[[Any], np.ndarray],
+        labels: dict[int, str],
+        send: Callable[[dict[str, Any]], None],
+        hold_time: float = HOLD_TIME,
+        min_confidence: float = MIN_CONFIDENCE,
+        on_prediction: Optional[Callable[[str, float, float], None]] = None,
+        gate: Optional[MotionGate] = None,
+        smoother: Optional[ProbabilitySmoother] = None,
+    ):
+        self.infer = infer
+        self.recognizer = GatedRecognizer(infer, gate, smoother)
+        self.labels = labels
+        self.send = send
+        self.on_prediction = on_prediction
+        self.assembler = SignAssembler(hold_time=hold_time, min_confidence=min_confidence)
+        self._slot: LatestSlot[tuple[int, Any, float]] = LatestSlot()
+        self._worker: Optional[threading.Thread] = None
+        # Guards recognizer/assembler state: reset() comes from the receive thread
+        self._lock = threading.Lock()
+
+        self.received = 0
+        self.processed = 0
+        self.dropped = 0
+        self.skipped = 0
+        self.errors = 0
+
+    # ----- receive side -----
+
+    def push(self, frame: Any) -> None:
+        """Hand a newly received frame to the session (never blocks)."""
+        self.received += 1
+        if self._slot.put((self.received, frame, time.perf_counter())):
+            self.dropped += 1
+
+    def reset(self) -> None:
+        """Clear the text and smoothing state; waits for a frame being processed."""
+        with self._lock:
+            self.assembler.reset()
+            self.recognizer.reset()
+
+    # ----- processing side -----
+
+    def start(self) -> None:
+        self._worker = threading.Thread(target=self._run, name="stream-session", daemon=True)
+        self._worker.start()
+
+    def close(self) -> None:
+        self._slot.close()
+        if self._worker is not None:
+            self._worker.join(5.0)
+            self._worker = None
+
+    def process(self, seq: int, frame: Any, received_at: float) -> dict[str, Any]:
+        with self._lock:
+            pred_idx, confidence, inferred = self.recognizer.step(frame)
+            pred_label = self.labels[pred_idx]
+            committed = self.assembler.update(pred_label, confidence)
+            text = self.assembler.solution
+            progress = self.assembler.progress()
+        latency_ms = (time.perf_counter() - received_at) * 1000.0
+        self.processed += 1
+        if not inferred:
+            self.skipped += 1
+        elif self.on_prediction is not None:
+            self.on_prediction(pred_label, confidence, latency_ms)
+        return {
+            'type': 'prediction',
+            'frame': seq,
+            'prediction': pred_label,
+            'confidence': confidence,
+            'committed': committed,
+            'text': text,
+            'progress': progress,
+            'dropped': self.dropped,
+            'skipped': not inferred,
+            'latency_ms': latency_ms,
+        }
+
+    def _run(self) -> None:
+        while not self._slot.closed:
+            item = self._slot.get(timeout=0.5)
+            if item is None:
+                continue
+            try:
+                message = self.process(*item)
+            except Exception as e:
+                self.errors += 1
+                message = {'type': 'error', 'frame': item[0], 'error': str(e)}
+            try:
+                self.send(message)
+            except Exception as e:
+                logger.info(f"Stream session send failed, closing: {e}")
+                self._slot.close()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "received": self.received,
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "skipped": self.skipped,
+            "errors": self.errors,
+        }
+
+
+class SessionRegistry:
+    """Tracks live sessions and totals for the stats endpoint."""
+
+    def __init__(self):
+        self._sessions: set[RecognitionSession] = set()
+        self._lock = threading.Lock()
+        self._totals = {"sessions": 0, "received": 0, "processed": 0, "dropped": 0, "skipped": 0, "errors": 0}
+
+    def add(self, session: RecognitionSession) -> None:
+        with self._lock:
+            self._sessions.add(session)
+            self._totals["sessions"] += 1
+
+    def remove(self, session: RecognitionSession) -> None:
+        with self._lock:
+            self._sessions.discard(session)
+            for key, value in session.stats().items():
+                self._totals[key] += value
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            totals = dict(self._totals)
+            for session in self._sessions:
+                for key, value in session.stats().items():
+                    totals[key] += value
+            totals["active"] = len(self._sessions)
+        # Share of processed frames answered without a forward pass
+        totals["skip_rate"] = totals["skipped"] / totals["processed"] if totals["processed"] else 0.0
+        return totals
@@ -0,0 +1,97 @@
+"""
+Shared fixtures.
+
+The app is imported once per session against a throwaway SQLite database
+and archive directory, with a missing model file so no TensorFlow is loaded
+(the endpoints under test do not need a model).
+"""
+
+from __future__ import annotations
+
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_TMP = tempfile.mkdtemp(prefix="asl-tests-")
+# Registered before app.py's own atexit hooks, so it runs after them
+atexit.register(shutil.rmtree, _TMP, True)
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{os.path.join(_TMP, 'test.db')}",
+    "RETENTION_ARCHIVE_DIR": os.path.join(_TMP, "archive"),
+    "RETENTION_DAYS": "0",
+    "MODEL_PATH": os.path.join(_TMP, "missing.h5"),
+    "MODEL_RETRY_INTERVAL_S": "0",
+})
+
+
+@pytest.fixture(scope="session")
+def app_module():
+    import app as app_module
+
+    with app_module.app.app_context():
+        app_module.db.create_all()
+    return app_module
+
+
+@pytest.fixture
+def app(app_module):
+    """The Flask app; every table is emptied after the test."""
+    yield app_module.app
+    # Write timestamps for users seen by this test while they still exist
+    app_module.activity_tracker.flush()
+    db = app_module.db
+    with app_module.app.app_context():
+        for table in reversed(db.metadata.sorted_tables):
+            db.session.execute(table.delete())
+        db.session.commit()
+    app_module.user_states.clear()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def make_user(app, app_module):
+    """``make_user(role='user') -> (user_id, auth headers)``."""
+    from flask_jwt_extended import create_access_token
+
+    from models import db, User
+
+    def make(role: str = "user") -> tuple[int, dict[str, str]]:
+        with app.app_context():
+            user = User(email=f"{role}-{os.urandom(4).hex()}@example.com", password_hash="x", role=role)
+            db.session.add(user)
+            db.session.commit()
+            token = create_access_token(identity=user.id, additional_claims={"role": role})
+            return user.id, {"Authorization": f"Bearer {token}"}
+
+    return make
+
+
+@pytest.fixture
+def insert_logs(app):
+    """``insert_logs(records)``: bulk-insert PredictionLog rows; returns all log ids, newest first."""
+    from sqlalchemy import insert
+
+    from models import db, PredictionLog
+
+    def insert_rows(records: list[dict]) -> list[int]:
+        defaults = {"user_id": None, "label": "A", "confidence": 0.9, "latency_ms": 10.0, "success": True,
+                    "error_message": None, "client_ip": None, "top_predictions": None}
+        with app.app_context():
+            db.session.execute(insert(PredictionLog), [{**defaults, **r} for r in records])
+            db.session.commit()
+            rows = (db.session.query(PredictionLog.id)
+                    .order_by(PredictionLog.timestamp.desc(), PredictionLog.id.desc()).all())
+        return [row_id for (row_id,) in rows]
+
+    return insert_rows
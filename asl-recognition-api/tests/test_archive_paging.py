@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import db, PredictionLog
+from retention import RetentionManager
+
+HOT_ROWS = 21
+ARCHIVED_DAYS = (3, 4, 5, 6)
+ROWS_PER_DAY = 30
+
+
+@pytest.fixture(params=["parquet", "ndjson"])
+def retention(request, app, app_module, monkeypatch, tmp_path):
+    """The app's RetentionManager, swapped for one writing ``request.param`` archives.
+
+    ``chunk_rows`` is small so each Parquet file has several row groups.
+    """
+    if request.param == "parquet":
+        pytest.importorskip("pyarrow")
+    manager = RetentionManager(app, str(tmp_path), archive_format=request.param, chunk_rows=7, pause_s=0)
+    monkeypatch.setattr(app_module, "log_retention", manager)
+    return manager
+
+
+@pytest.fixture
+def history(app, make_user, insert_logs, retention):
+    """Hot rows from the last hour plus four archived days; returns (user ids, all rows newest first)."""
+    user_ids = [make_user()[0], make_user()[0]]
+    now = datetime.utcnow()
+    records = []
+    for i in range(HOT_ROWS):
+        records.append({"timestamp": now - timedelta(minutes=2 * i)})
+    for days in ARCHIVED_DAYS:
+        noon = (now - timedelta(days=days)).replace(hour=12, minute=0, second=0, microsecond=0)
+        # Pairs of rows share a timestamp, so keys tie on time and differ by id
+        records.extend({"timestamp": noon + timedelta(minutes=i // 2)} for i in range(ROWS_PER_DAY))
+    for i, r in enumerate(records):
+        r.update(label="ABC"[i % 3], user_id=user_ids[i % 2], confidence=0.5 + (i % 5) / 10)
+    insert_logs(records)
+    with app.app_context():
+        rows = [r.to_dict() for r in db.session.query(PredictionLog)
+                .order_by(PredictionLog.timestamp.desc(), PredictionLog.id.desc())]
+
+    result = retention.run_once(days=2, now=now)
+    assert len(result["archived_days"]) == len(ARCHIVED_DAYS)
+    with app.app_context():
+        assert db.session.query(PredictionLog).count() == HOT_ROWS
+    return user_ids, rows
+
+
+def _walk(client, headers, **params) -> list[dict]:
+    items, cursor = [], None
+    for _ in range(100):
+        query = dict(params, include_archive="true", **({"cursor": cursor} if cursor else {}))
+        resp = client.get("/api/predictions", query_string=query, headers=headers)
+        assert resp.status_code == 200, resp.get_json()
+        body = resp.get_json()
+        assert len(body["items"]) <= body["page_size"]
+        items.extend(body["items"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return items
+    raise AssertionError("pagination did not terminate")
+
+
+@pytest.mark.parametrize("page_size", [4, 7, 200])
+def test_filtered_pages_span_hot_and_archived_rows(client, make_user, history, page_size):
+    _, rows = history
+    _, admin = make_user("admin")
+    items = _walk(client, admin, label="A", min_confidence="0.7", page_size=page_size)
+
+    expected = [r["id"] for r in rows if r["label"] == "A" and r["confidence"] >= 0.7]
+    assert [i["id"] for i in items] == expected
+    # Hot rows first, then the archive, with no row in both
+    flags = [bool(i.get("archived")) for i in items]
+    assert flags == sorted(flags)
+    assert 0 < flags.count(True) < len(flags)
+
+
+def test_user_pages_span_hot_and_archived_rows(client, app, history):
+    from flask_jwt_extended import create_access_token
+
+    user_ids, rows = history
+    with app.app_context():
+        headers = {"Authorization": f"Bearer {create_access_token(identity=user_ids[1])}"}
+    items = _walk(client, headers, page_size=5)
+
+    assert [i["id"] for i in items] == [r["id"] for r in rows if r["user_id"] == user_ids[1]]
+
+
+def test_archive_query_pages_by_key(app, history, retention):
+    _, rows = history
+    archived = [r for r in rows if r["label"] == "B"][HOT_ROWS // 3:]
+    seen, before = [], None
+    with app.app_context():
+        for _ in range(100):
+            page = retention.query({"label": "B"}, 6, before)
+            if not page:
+                break
+            seen.extend(r["id"] for r in page)
+            before = (page[-1]["timestamp"], page[-1]["id"])
+    assert seen == [r["id"] for r in archived]
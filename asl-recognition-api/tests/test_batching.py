@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+import numpy as np
+import pytest
+
+from batching import BatcherOverloaded, MicroBatcher
+
+
+def _tensor(value: int) -> np.ndarray:
+    return np.full((2, 2, 1), value, dtype=np.uint8)
+
+
+class _Model:
+    """Returns each row's pixel value as its output and records the batches it saw."""
+
+    def __init__(self, gate: threading.Event | None = None):
+        self.batches: list[list[int]] = []
+        self.gate = gate
+        self.entered = threading.Event()
+
+    def __call__(self, batch: np.ndarray) -> np.ndarray:
+        self.batches.append([int(row[0, 0, 0]) for row in batch])
+        self.entered.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        return batch.reshape(len(batch), -1)[:, :1].astype(np.float32)
+
+
+@pytest.fixture
+def batcher():
+    created = []
+
+    def make(predict_fn, **kwargs) -> MicroBatcher:
+        b = MicroBatcher(predict_fn, **kwargs)
+        created.append(b)
+        return b
+
+    yield make
+    for b in created:
+        b.stop()
+
+
+@pytest.mark.parametrize("max_inflight", [1, 4])
+def test_each_caller_gets_its_own_row(batcher, max_inflight):
+    model = _Model()
+    b = batcher(model, max_batch_size=8, max_wait_ms=20, max_inflight=max_inflight)
+    with ThreadPoolExecutor(32) as pool:
+        results = list(pool.map(lambda v: b.predict(_tensor(v), timeout=5), range(100)))
+
+    assert [int(r[0]) for r in results] == list(range(100))
+    assert sum(len(batch) for batch in model.batches) == 100
+    assert max(len(batch) for batch in model.batches) <= 8
+    assert len(model.batches) < 100  # concurrent requests were actually combined
+
+
+def test_batch_keeps_submission_order(batcher):
+    gate = threading.Event()
+    model = _Model(gate)
+    b = batcher(model, max_batch_size=4, max_wait_ms=50)
+    blocker = b.submit(_tensor(0))
+    assert model.entered.wait(5)
+    # Queued while the first batch runs, so they are collected together
+    futures = [b.submit(_tensor(v)) for v in range(1, 5)]
+    gate.set()
+
+    assert [int(f.result(5)[0]) for f in futures] == [1, 2, 3, 4]
+    assert blocker.result(5)[0] == 0
+    assert model.batches == [[0], [1, 2, 3, 4]]
+
+
+def test_timed_out_requests_are_left_out_of_the_batch(batcher):
+    gate = threading.Event()
+    model = _Model(gate)
+    b = batcher(model, max_batch_size=8, max_wait_ms=1)
+    blocker = b.submit(_tensor(0))
+    assert model.entered.wait(5)
+
+    with pytest.raises(FutureTimeoutError):
+        b.predict(_tensor(1), timeout=0.05)
+    live = b.submit(_tensor(2))
+    gate.set()
+
+    assert live.result(5)[0] == 2
+    blocker.result(5)
+    assert model.batches == [[0], [2]]
+    assert b.stats()["cancelled"] == 1
+
+
+def test_timeout_after_dispatch_waits_for_the_copy(batcher):
+    gate = threading.Event()
+    model = _Model(gate)
+    b = batcher(model, max_batch_size=1, max_wait_ms=0)
+    tensor = _tensor(7)
+
+    with pytest.raises(FutureTimeoutError):
+        b.predict(tensor, timeout=0.1)
+    # The forward pass had started, so the row was copied before predict gave up
+    tensor[:] = 99
+    gate.set()
+    time.sleep(0.05)
+    assert model.batches == [[7]]
+    assert b.stats()["cancelled"] == 0
+
+
+def test_full_queue_rejects(batcher):
+    gate = threading.Event()
+    model = _Model(gate)
+    b = batcher(model, max_batch_size=1, max_wait_ms=0, max_queue_size=2)
+    b.submit(_tensor(0))
+    assert model.entered.wait(5)
+    b.submit(_tensor(1))
+    b.submit(_tensor(2))
+
+    with pytest.raises(BatcherOverloaded):
+        b.submit(_tensor(3))
+    assert b.stats()["rejected"] == 1
+    gate.set()
+
+
+def test_stop_fails_queued_requests(batcher):
+    gate = threading.Event()
+    model = _Model(gate)
+    b = batcher(model, max_batch_size=1, max_wait_ms=0)
+    b.submit(_tensor(0))
+    assert model.entered.wait(5)
+    queued = b.submit(_tensor(1))
+
+    threading.Timer(0.05, gate.set).start()
+    b.stop()
+    with pytest.raises(RuntimeError, match="stopped"):
+        queued.result(1)
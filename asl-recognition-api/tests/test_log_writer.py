@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from log_writer import PredictionLogWriter
+from models import db, PredictionLog
+
+
+def _record(i: int = 0) -> dict:
+    return {
+        "user_id": None,
+        "timestamp": datetime.utcnow(),
+        "label": "A",
+        "confidence": 0.9,
+        "latency_ms": float(i),
+        "success": True,
+        "error_message": None,
+        "client_ip": "127.0.0.1",
+        "top_predictions": None,
+    }
+
+
+def _stored(app) -> int:
+    with app.app_context():
+        return db.session.query(PredictionLog).count()
+
+
+def _idle_writer(app, **kwargs) -> PredictionLogWriter:
+    """A writer whose worker never starts, so the queue only drains on ``flush``."""
+    writer = PredictionLogWriter(app, **kwargs)
+    writer.start = lambda: None
+    return writer
+
+
+def test_drop_policy_discards_writes_once_full(app):
+    writer = _idle_writer(app, max_queue=5, policy="drop")
+    accepted = [writer.write(**_record(i)) for i in range(8)]
+
+    assert accepted == [True] * 5 + [False] * 3
+    assert writer.flush() == 5
+    assert _stored(app) == 5
+    assert writer.stats()["dropped"] == 3
+
+
+def test_block_policy_waits_for_space(app):
+    writer = _idle_writer(app, max_queue=3, policy="block", block_timeout_s=2.0)
+    for i in range(3):
+        assert writer.write(**_record(i))
+    threading.Timer(0.1, writer._queue.get).start()  # a consumer frees one slot
+
+    t0 = time.perf_counter()
+    assert writer.write(**_record(3))
+    assert time.perf_counter() - t0 >= 0.05
+    assert writer.flush() == 3  # the record taken by the consumer above is gone
+    assert _stored(app) == 3
+
+
+def test_block_policy_drops_after_timeout(app):
+    writer = _idle_writer(app, max_queue=3, policy="block", block_timeout_s=0.05)
+    accepted = [writer.write(**_record(i)) for i in range(5)]
+
+    assert accepted == [True] * 3 + [False] * 2
+    assert writer.flush() == 3
+    assert _stored(app) == 3
+    assert writer.stats()["dropped"] == 2
+
+
+def test_sample_policy_thins_writes_past_half_full(app):
+    writer = _idle_writer(app, max_queue=10, policy="sample", sample_rate=0.0)
+    accepted = [writer.write(**_record(i)) for i in range(12)]
+
+    assert accepted == [True] * 5 + [False] * 7
+    assert writer.stats()["sampled_out"] == 7
+    assert writer.flush() == 5
+    assert _stored(app) == 5
+
+
+def test_sample_policy_still_drops_when_full(app):
+    writer = _idle_writer(app, max_queue=10, policy="sample", sample_rate=1.0)
+    accepted = [writer.write(**_record(i)) for i in range(12)]
+
+    assert accepted == [True] * 10 + [False] * 2
+    assert writer.stats()["dropped"] == 2
+    assert writer.flush() == 10
+    assert _stored(app) == 10
+
+
+@pytest.mark.parametrize("policy", ["drop", "block", "sample"])
+def test_flush_writes_records_held_by_the_worker(app, policy):
+    # Long interval and batch: without flush() nothing would be written for a minute
+    writer = PredictionLogWriter(app, flush_size=1000, flush_interval_s=60.0, policy=policy)
+    try:
+        for i in range(20):
+            assert writer.write(**_record(i))
+        time.sleep(0.2)  # let the worker take the records into its local batch
+
+        assert writer.flush() == 20
+        assert _stored(app) == 20
+        assert writer.flush() == 0
+    finally:
+        writer.stop()
+
+
+def test_unknown_policy_is_rejected(app):
+    with pytest.raises(ValueError):
+        PredictionLogWriter(app, policy="lossy")
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import base64
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import db, PredictionLog
+from pagination import decode_cursor, encode_cursor, keyset_page
+
+
+def _b64(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("ts, row_id", [
+    (datetime(2024, 1, 2, 3, 4, 5), 1),
+    (datetime(2024, 1, 2, 3, 4, 5, 678901), 123456789),
+    (datetime(1999, 12, 31, 23, 59, 59, 999999), 0),
+])
+def test_cursor_round_trip(ts, row_id):
+    token = encode_cursor(ts, row_id)
+    assert "=" not in token
+    assert decode_cursor(token) == (ts, row_id)
+
+
+@pytest.mark.parametrize("token", [
+    "not a cursor",
+    "%%%",
+    _b64(b"{}"),
+    _b64(b'["2024-01-02T03:04:05"]'),
+    _b64(b'["yesterday", 5]'),
+    _b64(b'["2024-01-02T03:04:05", "five"]'),
+])
+def test_invalid_cursor_raises(token):
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        decode_cursor(token)
+
+
+def _records(n: int, start: datetime) -> list[dict]:
+    # Three rows per timestamp, so pages break in the middle of ties
+    return [
+        {"timestamp": start + timedelta(seconds=i // 3), "label": "AB"[i % 2], "user_id": i % 2 + 1}
+        for i in range(n)
+    ]
+
+
+def test_keyset_pages_cover_every_row_once(app, insert_logs):
+    expected = insert_logs(_records(25, datetime(2024, 1, 1)))
+    seen, cursor = [], None
+    with app.app_context():
+        while True:
+            rows, cursor = keyset_page(db.session.query(PredictionLog), 4, cursor)
+            seen.extend(r.id for r in rows)
+            if cursor is None:
+                break
+    assert seen == expected
+
+
+def _walk(client, headers, **params) -> list[dict]:
+    items, cursor = [], None
+    while True:
+        query = dict(params, **({"cursor": cursor} if cursor else {}))
+        resp = client.get("/api/predictions", query_string=query, headers=headers)
+        assert resp.status_code == 200, resp.get_json()
+        body = resp.get_json()
+        assert len(body["items"]) <= body["page_size"]
+        items.extend(body["items"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return items
+
+
+def test_endpoint_cursor_pages_with_filter(client, make_user, insert_logs):
+    _, admin = make_user("admin")
+    insert_logs(_records(40, datetime(2024, 1, 1)))
+    items = _walk(client, admin, label="A", page_size=3)
+
+    keys = [(i["timestamp"], i["id"]) for i in items]
+    assert all(i["label"] == "A" for i in items)
+    assert len(items) == 20
+    assert keys == sorted(keys, reverse=True)
+    assert len(set(keys)) == len(keys)
+
+
+def test_endpoint_scopes_users_to_their_own_rows(client, make_user, insert_logs):
+    user_id, headers = make_user()
+    insert_logs([dict(r, user_id=user_id if r["user_id"] == 1 else None)
+                 for r in _records(12, datetime(2024, 1, 1))])
+    items = _walk(client, headers, page_size=4)
+
+    assert len(items) == 6
+    assert {i["user_id"] for i in items} == {user_id}
+
+
+def test_endpoint_rejects_invalid_cursor(client, make_user):
+    _, admin = make_user("admin")
+    resp = client.get("/api/predictions", query_string={"cursor": "not a cursor"}, headers=admin)
+
+    assert resp.status_code == 400
+    assert resp.get_json() == {"success": False, "error": "Invalid cursor"}
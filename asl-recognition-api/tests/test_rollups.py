@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import random
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Optional
+
+import pytest
+
+from models import db
+from rollups import apply_rollups, rebuild_rollups, rollup_summary
+
+
+def _records(n: int, now: datetime, span: timedelta, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    records = []
+    for _ in range(n):
+        success = rng.random() < 0.8
+        records.append({
+            "timestamp": now - timedelta(seconds=rng.uniform(0, span.total_seconds())),
+            "label": rng.choice("ABC") if success else None,
+            "confidence": rng.uniform(0.3, 1.0) if success else None,
+            "latency_ms": rng.uniform(1, 400) if rng.random() < 0.9 else None,
+            "success": success,
+        })
+    return records
+
+
+def _raw_summary(records: list[dict], start: Optional[datetime] = None, end: Optional[datetime] = None) -> dict:
+    rows = [r for r in records
+            if (start is None or r["timestamp"] >= start) and (end is None or r["timestamp"] <= end)]
+    confidences = [r["confidence"] for r in rows if r["success"] and r["confidence"] is not None]
+    latencies = [r["latency_ms"] for r in rows if r["latency_ms"] is not None]
+    return {
+        "total_predictions": len(rows),
+        "successful_predictions": sum(r["success"] for r in rows),
+        "average_confidence": sum(confidences) / len(confidences),
+        "average_latency_ms": sum(latencies) / len(latencies),
+        "label_counts": dict(Counter(r["label"] for r in rows if r["label"] is not None)),
+    }
+
+
+def _assert_matches(summary: dict, raw: dict) -> None:
+    assert summary["total_predictions"] == raw["total_predictions"]
+    assert summary["successful_predictions"] == raw["successful_predictions"]
+    assert summary["label_counts"] == raw["label_counts"]
+    assert summary["average_confidence"] == pytest.approx(raw["average_confidence"])
+    assert summary["average_latency_ms"] == pytest.approx(raw["average_latency_ms"])
+
+
+def _apply_in_batches(records: list[dict], size: int) -> None:
+    # Separate transactions, so later batches upsert onto existing bucket rows
+    for i in range(0, len(records), size):
+        apply_rollups(records[i:i + size])
+        db.session.commit()
+
+
+def test_upserts_add_up_to_raw_counts(app):
+    records = _records(500, datetime.utcnow(), timedelta(hours=30))
+    with app.app_context():
+        _apply_in_batches(records, 37)
+        summary = rollup_summary()
+
+    assert summary["window"]["resolution"] == "total"
+    _assert_matches(summary, _raw_summary(records))
+
+
+def test_hour_window_matches_raw_counts(app):
+    now = datetime.utcnow()
+    records = _records(500, now, timedelta(hours=30), seed=1)
+    # Whole hours, longer than the minute-resolution limit
+    start = (now - timedelta(hours=20)).replace(minute=0, second=0, microsecond=0)
+    end = start + timedelta(hours=12) - timedelta(microseconds=1)
+    with app.app_context():
+        _apply_in_batches(records, 50)
+        summary = rollup_summary(start, end)
+
+    assert summary["window"]["resolution"] == "hour"
+    _assert_matches(summary, _raw_summary(records, start, end))
+
+
+def test_minute_window_matches_raw_counts(app):
+    now = datetime.utcnow()
+    records = _records(300, now, timedelta(hours=3), seed=2)
+    start = (now - timedelta(minutes=90)).replace(second=0, microsecond=0)
+    end = start + timedelta(minutes=45) - timedelta(microseconds=1)
+    with app.app_context():
+        _apply_in_batches(records, 25)
+        summary = rollup_summary(start, end)
+
+    assert summary["window"]["resolution"] == "minute"
+    _assert_matches(summary, _raw_summary(records, start, end))
+
+
+def test_rebuild_matches_incremental_rollups(app, insert_logs):
+    records = _records(400, datetime.utcnow(), timedelta(hours=10), seed=3)
+    insert_logs(records)
+    with app.app_context():
+        _apply_in_batches(records, 64)
+        incremental = rollup_summary()
+        assert rebuild_rollups(chunk=100) == len(records)
+        rebuilt = rollup_summary()
+
+    _assert_matches(rebuilt, incremental)
+    _assert_matches(rebuilt, _raw_summary(records))
+
+
+def test_log_writer_flush_updates_rollups(app):
+    from log_writer import PredictionLogWriter
+
+    records = _records(120, datetime.utcnow(), timedelta(hours=2), seed=4)
+    writer = PredictionLogWriter(app, flush_size=50, flush_interval_s=60.0)
+    try:
+        for r in records:
+            writer.write(**r)
+        writer.flush()
+    finally:
+        writer.stop()
+    with app.app_context():
+        _assert_matches(rollup_summary(), _raw_summary(records))
@@ -0,0 +1,98 @@
+"""
+Per-request, per-stage latency tracing for the prediction paths.
+
+A ``Trace`` is started when a prediction request arrives and ``mark()``-ed
+as each stage ends, so consecutive stages tile the request's wall time.
+Components that run elsewhere (the preprocessing pool, the micro-batcher)
+report sub-stages with ``add()``, named ``<stage>.<detail>``, which nest
+inside the marked stage rather than adding to it. ``Tracer.finish`` folds a
+trace into one histogram per (path, stage); a trace costs a few
+``perf_counter`` calls and histogram observations.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Optional
+
+from metrics import Histogram, LATENCY_BUCKETS_MS
+
+# Sub-millisecond resolution: most stages other than inference are short
+STAGE_BUCKETS_MS = (0.05, 0.1, 0.25, 0.5) + LATENCY_BUCKETS_MS
+
+
+class Trace:
+    """Stage timings of one request, in milliseconds."""
+
+    __slots__ = ("path", "stages", "started_at", "_last")
+
+    def __init__(self, path: str, started_at: Optional[float] = None):
+        self.path = path
+        self.stages: dict[str, float] = {}
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self._last = self.started_at
+
+    def mark(self, stage: str) -> None:
+        """End ``stage`` now: it gets the time since the previous mark."""
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + (now - self._last) * 1000.0
+        self._last = now
+
+    def add(self, stage: str, ms: float) -> None:
+        """Record a sub-stage measured elsewhere (does not move the mark)."""
+        self.stages[stage] = self.stages.get(stage, 0.0) + ms
+
+    def merge(self, prefix: str, timings: dict[str, float]) -> None:
+        for stage, ms in timings.items():
+            self.add(f"{prefix}.{stage}", ms)
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started_at) * 1000.0
+
+    def server_timing(self) -> str:
+        """Value for a ``Server-Timing`` response header."""
+        return ", ".join(f"{stage.replace('.', '-')};dur={ms:.3f}" for stage, ms in self.stages.items())
+
+
+class Tracer:
+    """Histograms of stage timings per prediction path."""
+
+    def __init__(self, buckets=STAGE_BUCKETS_MS):
+        self.buckets = tuple(buckets)
+        self._histograms: dict[tuple[str, str], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def start(self, path: str, started_at: Optional[float] = None) -> Trace:
+        return Trace(path, started_at)
+
+    def _histogram(self, path: str, stage: str) -> Histogram:
+        key = (path, stage)
+        hist = self._histograms.get(key)
+        if hist is None:
+            with self._lock:
+                hist = self._histograms.setdefault(key, Histogram(self.buckets))
+        return hist
+
+    def finish(self, trace: Trace) -> float:
+        """Record ``trace``'s stages plus its ``total``; returns the total in ms."""
+        total = trace.elapsed_ms()
+        trace.stages["total"] = total
+        for stage, ms in trace.stages.items():
+            self._histogram(trace.path, stage).observe(ms)
+        return total
+
+    def items(self) -> list[tuple[dict[str, str], Histogram]]:
+        """``({"path": ..., "stage": ...}, histogram)`` pairs, for /metrics."""
+        with self._lock:
+            keys = sorted(self._histograms)
+        return [({"path": path, "stage": stage}, self._histograms[(path, stage)]) for path, stage in keys]
+
+    def stats(self) -> dict[str, Any]:
+        out: dict[str, dict[str, Any]] = {}
+        for labels, hist in self.items():
+            snap = hist.snapshot()
+            out.setdefault(labels["path"], {})[labels["stage"]] = {
+                k: snap[k] for k in ("count", "mean", "p50", "p95", "p99")
+            }
+        return out
@@ -0,0 +1,438 @@
+"""
+Offline transcription of recorded signing videos and image folders.
+
+Every video file, and every directory of still images (taken in name
+order), is one sequence. Decoder threads (``--decode-workers``; OpenCV
+releases the GIL while decoding) each turn one sequence into a generator
+of preprocessed uint8 frames, grouped into ``--batch-size`` batches and
+passed through a bounded queue. The main thread classifies each batch in
+one forward pass. It feeds the predictions, in frame order, through the
+same smoothing and hold-to-commit text assembly as ``inf.py``, timed by
+video time instead of the wall clock.
+
+Output is JSONL: one ``frame`` record per classified frame (unless
+``--no-frames``) and one ``transcript`` record per sequence::
+
+    {"type": "frame", "source": "a.mp4", "frame": 42, "t": 1.4, "label": "A", "confidence": 0.91, "committed": null}
+    {"type": "transcript", "source": "a.mp4", "text": "HELLO", "frames": 5400, "duration_s": 180.0}
+
+Every ``--checkpoint-every`` seconds, the output is flushed and a
+checkpoint is written next to it. The checkpoint records the output size,
+the next frame of every unfinished sequence and its smoothing and
+assembler state. Ctrl-C takes effect after the batch being classified, so
+the checkpoint written then matches the output; a second Ctrl-C stops at
+once and keeps the last periodic checkpoint. ``--resume`` truncates the
+output to the checkpointed size and carries on from there, so an
+interrupted multi-hour run loses at most one checkpoint interval.
+
+Usage:
+    python transcribe.py recordings/ --out transcripts.jsonl
+    python transcribe.py recordings/ --out transcripts.jsonl --resume
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import queue
+import signal
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable, Iterator, Optional
+
+import cv2
+import numpy as np
+
+from backends import backend_from_env
+from motion_gate import SMOOTHING_MODES, ProbabilitySmoother
+from preprocessing import IMG_SIZE, decode_image, resize_into
+from sign_assembler import HOLD_TIME, MIN_CONFIDENCE, SignAssembler
+
+MODEL_PATH = "asl_mobilenetv2.h5"
+LABELS = [chr(ord('A') + i) for i in range(26)] + ['del', 'nothing', 'space']
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".webm", ".m4v")
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+CHECKPOINT_VERSION = 1
+
+
+class Sequence:
+    """One video file, or the images of one directory in name order."""
+
+    def __init__(self, path: str, images: Optional[list[str]] = None):
+        self.path = path
+        self.images = images
+
+    @property
+    def key(self) -> str:
+        return os.path.abspath(self.path)
+
+
+def find_sequences(paths: Iterable[str]) -> list[Sequence]:
+    """Videos anywhere under ``paths`` plus one image sequence per directory holding images."""
+    sequences = []
+    for path in paths:
+        if os.path.isfile(path):
+            if path.lower().endswith(VIDEO_EXTENSIONS):
+                sequences.append(Sequence(path))
+            elif path.lower().endswith(IMAGE_EXTENSIONS):
+                sequences.append(Sequence(path, [path]))
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            files.sort()
+            images = [os.path.join(root, f) for f in files if f.lower().endswith(IMAGE_EXTENSIONS)]
+            if images:
+                sequences.append(Sequence(root, images))
+            sequences.extend(Sequence(os.path.join(root, f)) for f in files if f.lower().endswith(VIDEO_EXTENSIONS))
+    return sequences
+
+
+def iter_frames(seq: Sequence, start: int = 0, stride: int = 1, image_fps: float = 30.0,
+                roi: Optional[tuple[int, int, int, int]] = None) -> Iterator[tuple[int, float, np.ndarray]]:
+    """Yield ``(frame index, video time in s, BGR frame)`` for frames from ``start`` on.
+
+    Only frames whose index is a multiple of ``stride`` are decoded, so a
+    resumed run samples the same frames as an uninterrupted one.
+    Unreadable images in a folder are skipped.
+    """
+    if seq.images is not None:
+        for i in range(-(-start // stride) * stride, len(seq.images), stride):
+            with open(seq.images[i], "rb") as f:
+                data = f.read()
+            try:
+                # Without a crop, large stills can be decoded at reduced scale
+                img = decode_image(data, None if roi else IMG_SIZE)
+            except ValueError:
+                continue
+            yield i, i / image_fps, _crop(img, roi)
+        return
+
+    cap = cv2.VideoCapture(seq.path)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video {seq.path}")
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) or image_fps
+        index = 0
+        if start:
+            if cap.set(cv2.CAP_PROP_POS_FRAMES, start) and int(cap.get(cv2.CAP_PROP_POS_FRAMES)) == start:
+                index = start
+            else:
+                # The container cannot seek exactly; step through from the beginning
+                cap.release()
+                cap = cv2.VideoCapture(seq.path)
+                while index < start and cap.grab():
+                    index += 1
+        while True:
+            if index % stride:
+                if not cap.grab():
+                    break
+            else:
+                ok, frame = cap.read()
+                if not ok:
+                    break
+                yield index, index / fps, _crop(frame, roi)
+            index += 1
+    finally:
+        cap.release()
+
+
+def _crop(img: np.ndarray, roi: Optional[tuple[int, int, int, int]]) -> np.ndarray:
+    if roi is None:
+        return img
+    x1, y1, x2, y2 = roi
+    return img[y1:y2, x1:x2]
+
+
+def batched(frames: Iterator[tuple[int, float, np.ndarray]],
+            size: int) -> Iterator[tuple[np.ndarray, list[int], list[float]]]:
+    """Group frames into ``(uint8 batch, frame indices, times)``, resizing each straight into its row."""
+    batch = None
+    indices: list[int] = []
+    times: list[float] = []
+    for index, t, frame in frames:
+        if batch is None:
+            batch = np.empty((size, IMG_SIZE[1], IMG_SIZE[0], 3), dtype=np.uint8)
+        resize_into(batch[len(indices)], frame)
+        indices.append(index)
+        times.append(t)
+        if len(indices) == size:
+            yield batch, indices, times
+            batch, indices, times = None, [], []
+    if indices:
+        yield batch[:len(indices)], indices, times
+
+
+class SequenceState:
+    """Smoothing and text assembly for one sequence, checkpointable as JSON."""
+
+    def __init__(self, seq: Sequence, args):
+        self.seq = seq
+        self.smoother = ProbabilitySmoother(args.smoothing, args.smoothing_alpha, args.smoothing_window)
+        self.assembler = SignAssembler(hold_time=args.hold_time, min_confidence=args.min_confidence)
+        self.next_frame = 0
+        self.frames = 0
+        self.last_t = 0.0
+
+    def state(self) -> dict[str, Any]:
+        return {
+            "next_frame": self.next_frame,
+            "frames": self.frames,
+            "last_t": self.last_t,
+            "smoother": self.smoother.state(),
+            "assembler": self.assembler.state(),
+        }
+
+    def load_state(self, state: dict[str, Any]) -> None:
+        self.next_frame = state["next_frame"]
+        self.frames = state["frames"]
+        self.last_t = state["last_t"]
+        self.smoother.load_state(state["smoother"])
+        self.assembler.load_state(state["assembler"])
+
+
+class Checkpoint:
+    """Progress of a run: output size, finished sequences and in-flight sequence state."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.output_bytes = 0
+        self.done: dict[str, dict[str, Any]] = {}
+        self.active: dict[str, dict[str, Any]] = {}
+
+    def load(self) -> bool:
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path) as f:
+            data = json.load(f)
+        if data.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(f"Unsupported checkpoint version in {self.path}")
+        self.output_bytes = data["output_bytes"]
+        self.done = data["done"]
+        self.active = data["active"]
+        return True
+
+    def save(self) -> None:
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({
+                "version": CHECKPOINT_VERSION,
+                "output_bytes": self.output_bytes,
+                "done": self.done,
+                "active": self.active,
+            }, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+
+class Transcriber:
+    """Runs the decode -> batch -> classify -> assemble pipeline over many sequences."""
+
+    def __init__(self, model, args, out, checkpoint: Checkpoint):
+        self.model = model
+        self.args = args
+        self.out = out
+        self.checkpoint = checkpoint
+        self.states: dict[str, SequenceState] = {}
+        self.stop = threading.Event()
+        self.interrupted = threading.Event()
+        self._queue: "queue.Queue[tuple]" = queue.Queue(maxsize=max(2, 2 * args.decode_workers))
+        self._last_checkpoint = time.monotonic()
+
+        self.frames = 0
+        self.forward_passes = 0
+        self.sequences = 0
+        self.failed = 0
+
+    # ----- decoder threads -----
+
+    def _put(self, item: tuple) -> bool:
+        while not self.stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _decode(self, seq: Sequence, start: int) -> None:
+        error = None
+        try:
+            frames = iter_frames(seq, start, self.args.stride, self.args.image_fps, self.args.roi)
+            for batch in batched(frames, self.args.batch_size):
+                if not self._put(("batch", seq.key) + batch):
+                    return
+        except Exception as e:
+            error = str(e)
+        self._put(("end", seq.key, error))
+
+    # ----- main thread -----
+
+    def run(self, sequences: list[Sequence]) -> None:
+        pending = [seq for seq in sequences if seq.key not in self.checkpoint.done]
+        for seq in pending:
+            state = SequenceState(seq, self.args)
+            if seq.key in self.checkpoint.active:
+                state.load_state(self.checkpoint.active[seq.key])
+            self.states[seq.key] = state
+        if not pending:
+            return
+
+        remaining = len(pending)
+        previous_handler = self._defer_interrupts()
+        with ThreadPoolExecutor(self.args.decode_workers, thread_name_prefix="decode") as pool:
+            for seq in pending:
+                pool.submit(self._decode, seq, self.states[seq.key].next_frame)
+            try:
+                while remaining:
+                    # Checked only between items, where every sequence's state matches the output
+                    if self.interrupted.is_set():
+                        self.save_checkpoint()
+                        print(f"❌ Interrupted; rerun with --resume to continue")
+                        raise KeyboardInterrupt
+                    try:
+                        item = self._queue.get(timeout=0.2)
+                    except queue.Empty:
+                        continue
+                    if item[0] == "batch":
+                        self._classify(*item[1:])
+                    else:
+                        self._finish(*item[1:])
+                        remaining -= 1
+                    if time.monotonic() - self._last_checkpoint >= self.args.checkpoint_every:
+                        self.save_checkpoint()
+            finally:
+                self.stop.set()
+                if previous_handler is not None:
+                    signal.signal(signal.SIGINT, previous_handler)
+        self.save_checkpoint()
+
+    def _defer_interrupts(self):
+        """Turn the first Ctrl-C into a flag handled between batches; returns the old handler.
+
+        A second Ctrl-C raises at once without a checkpoint; the last
+        periodic one is still consistent, since it was taken between batches.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return None
+        previous = signal.getsignal(signal.SIGINT) or signal.default_int_handler
+
+        def handler(signum, frame):
+            self.interrupted.set()
+            signal.signal(signal.SIGINT, previous)
+            print("Stopping after the current batch (Ctrl-C again to stop now)")
+
+        signal.signal(signal.SIGINT, handler)
+        return previous
+
+    def _classify(self, key: str, batch: np.ndarray, indices: list[int], times: list[float]) -> None:
+        state = self.states[key]
+        probs = self.model.predict(batch, batch_size=self.args.batch_size)
+        self.forward_passes += 1
+        for row, index, t in zip(probs, indices, times):
+            pred_idx, confidence = state.smoother.update(row)
+            committed = state.assembler.update(LABELS[pred_idx], confidence, now=t)
+            if not self.args.no_frames:
+                self._write({
+                    "type": "frame", "source": state.seq.path, "frame": index, "t": round(t, 4),
+                    "label": LABELS[pred_idx], "confidence": round(confidence, 4), "committed": committed,
+                })
+        state.frames += len(indices)
+        state.next_frame = indices[-1] + 1
+        state.last_t = times[-1]
+        self.frames += len(indices)
+
+    def _finish(self, key: str, error: Optional[str]) -> None:
+        state = self.states.pop(key)
+        record = {
+            "type": "transcript",
+            "source": state.seq.path,
+            "text": state.assembler.solution,
+            "frames": state.frames,
+            "duration_s": round(state.last_t, 3),
+        }
+        if error:
+            record["error"] = error
+            self.failed += 1
+            print(f"❌ {state.seq.path}: {error}")
+        else:
+            print(f"✅ {state.seq.path}: {state.frames} frames -> {state.assembler.solution!r}")
+        self._write(record)
+        self.checkpoint.done[key] = {"frames": state.frames, "error": error}
+        self.sequences += 1
+
+    def _write(self, record: dict[str, Any]) -> None:
+        self.out.write(json.dumps(record) + "\n")
+
+    def save_checkpoint(self) -> None:
+        """Flush the output and record a consistent snapshot of every in-flight sequence."""
+        self.out.flush()
+        os.fsync(self.out.fileno())
+        self.checkpoint.output_bytes = self.out.tell()
+        self.checkpoint.active = {key: state.state() for key, state in self.states.items()}
+        self.checkpoint.save()
+        self._last_checkpoint = time.monotonic()
+
+
+def parse_roi(value: Optional[str]) -> Optional[tuple[int, int, int, int]]:
+    if not value:
+        return None
+    parts = [int(v) for v in value.split(",")]
+    if len(parts) != 4:
+        raise argparse.ArgumentTypeError("--roi takes x1,y1,x2,y2")
+    return tuple(parts)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="Video files, images or directories (searched recursively)")
+    parser.add_argument("--out", required=True, help="JSONL output file")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <out>.checkpoint.json)")
+    parser.add_argument("--resume", action="store_true", help="Continue from the checkpoint instead of starting over")
+    parser.add_argument("--checkpoint-every", type=float, default=30.0, help="Seconds between checkpoints")
+    parser.add_argument("--model", default=os.environ.get("MODEL_PATH", MODEL_PATH))
+    parser.add_argument("--batch-size", type=int, default=32, help="Frames per forward pass")
+    parser.add_argument("--decode-workers", type=int, default=min(4, os.cpu_count() or 1),
+                        help="Sequences decoded in parallel")
+    parser.add_argument("--stride", type=int, default=1, help="Classify every Nth frame")
+    parser.add_argument("--image-fps", type=float, default=30.0, help="Frame rate assumed for image folders")
+    parser.add_argument("--roi", type=parse_roi, help="Crop x1,y1,x2,y2 before resizing (default: whole frame)")
+    parser.add_argument("--hold-time", type=float, default=HOLD_TIME)
+    parser.add_argument("--min-confidence", type=float, default=MIN_CONFIDENCE)
+    parser.add_argument("--smoothing", choices=SMOOTHING_MODES, default=os.environ.get("SMOOTHING", "ema"))
+    parser.add_argument("--smoothing-alpha", type=float, default=float(os.environ.get("SMOOTHING_ALPHA", "0.5")))
+    parser.add_argument("--smoothing-window", type=int, default=int(os.environ.get("SMOOTHING_WINDOW", "5")))
+    parser.add_argument("--no-frames", action="store_true", help="Only write transcript records")
+    args = parser.parse_args()
+    args.stride = max(1, args.stride)
+    args.decode_workers = max(1, args.decode_workers)
+
+    sequences = find_sequences(args.paths)
+    if not sequences:
+        parser.error("no videos or images found")
+
+    checkpoint = Checkpoint(args.checkpoint or args.out + ".checkpoint.json")
+    resumed = args.resume and checkpoint.load()
+    if resumed:
+        # Drop anything written after the last checkpoint; it is regenerated
+        with open(args.out, "r+b") as f:
+            f.truncate(checkpoint.output_bytes)
+        print(f"✅ Resuming: {len(checkpoint.done)} sequences done, {len(checkpoint.active)} in progress")
+
+    # INFERENCE_BACKEND=tflite|onnx (and INFERENCE_INT8=1) use a converted artifact
+    model = backend_from_env(args.model)
+
+    started = time.perf_counter()
+    with open(args.out, "a" if resumed else "w") as out:
+        transcriber = Transcriber(model, args, out, checkpoint)
+        transcriber.run(sequences)
+    elapsed = time.perf_counter() - started
+    print(f"✅ {transcriber.sequences} sequences, {transcriber.frames} frames in {elapsed:.1f} s "
+          f"({transcriber.frames / max(elapsed, 1e-9):.1f} frames/s, {transcriber.failed} failed) -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+In-process cache of per-user authorization state.
+
+Authenticated requests need the user's current role and active/blocked flags,
+not just what the JWT said at login. ``UserStateCache`` keeps ``id -> (role,
+active, blocked)`` for ``ttl_s`` seconds, so status checks rarely touch the
+database, and ``invalidate()`` drops an entry as soon as this process
+changes a user. Other processes pick up changes within the TTL.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, NamedTuple, Optional
+
+from models import db, User
+
+
+class UserState(NamedTuple):
+    id: int
+    role: str
+    active: bool
+    blocked: bool
+
+    @property
+    def allowed(self) -> bool:
+        return self.active and not self.blocked
+
+
+class UserStateCache:
+    """TTL cache of :class:`UserState` by user id (``None`` for unknown ids)."""
+
+    def __init__(self, app, ttl_s: float = 5.0, max_entries: int = 100_000):
+        self.app = app
+        self.ttl_s = max(0.0, float(ttl_s))
+        self.max_entries = max(1, int(max_entries))
+        self._entries: dict[int, tuple[float, Optional[UserState]]] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, user_id) -> Optional[UserState]:
+        uid = int(user_id)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(uid)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+        state = self._load(uid)
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                self._evict(now)
+            self._entries[uid] = (now + self.ttl_s, state)
+        return state
+
+    def invalidate(self, user_id) -> None:
+        with self._lock:
+            self._entries.pop(int(user_id), None)
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "ttl_s": self.ttl_s,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / lookups) if lookups else None,
+                "invalidations": self.invalidations,
+            }
+
+    def _evict(self, now: float) -> None:
+        expired = [uid for uid, (expires, _) in self._entries.items() if expires <= now]
+        for uid in expired:
+            del self._entries[uid]
+        if len(self._entries) >= self.max_entries:
+            self._entries.clear()
+
+    def _load(self, uid: int) -> Optional[UserState]:
+        with self.app.app_context():
+            row = (
+                db.session.query(User.id, User.role, User.active, User.blocked)
+                .filter(User.id == uid)
+                .first()
+            )
+            return UserState(row.id, row.role, bool(row.active), bool(row.blocked)) if row else None
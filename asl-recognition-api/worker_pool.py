@@ -0,0 +1,471 @@
+"""
+Prefork inference workers fed through shared memory.
+
+The HTTP process never loads the model. It copies each preprocessed batch
+into a slot of a shared-memory ring and hands the slot number to one of N
+worker processes, each pinned to its own core with a single-threaded
+runtime. The worker runs the forward pass directly on the shared buffer and
+writes probabilities into the matching output slot, so no tensor is pickled
+or sent through a pipe. Workers that die are restarted by the supervisor
+thread and any batch they held is failed. A worker that keeps failing to
+load the model is restarted with exponential backoff, and after
+``max_restart_failures`` attempts in a row it is given up on and the pool
+reports itself unhealthy. Input slots hold uint8 pixels
+(workers scale them per chunk in the backend), a quarter of the float32
+footprint; float batches are quantized back to pixels when copied in.
+
+The pool exposes the same ``predict`` / ``describe`` interface as
+``backends.InferenceBackend`` so it can sit behind the micro-batcher.
+"""
+
+from __future__ import annotations
+
+import logging
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from multiprocessing.connection import wait as wait_connections
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Optional
+
+import numpy as np
+
+from backends import shared_backend_kind
+
+logger = logging.getLogger(__name__)
+
+INPUT_SHAPE = (224, 224, 3)
+NUM_CLASSES = 29
+
+# Thread settings applied in each worker before the runtime is imported
+_SINGLE_THREAD_ENV = {
+    "INFERENCE_THREADS": "1",
+    "OMP_NUM_THREADS": "1",
+    "TF_NUM_INTRAOP_THREADS": "1",
+    "TF_NUM_INTEROP_THREADS": "1",
+}
+
+
+class WorkerError(RuntimeError):
+    """Raised when a worker fails a batch or dies while holding it."""
+
+
+class WorkerUnavailable(WorkerError):
+    """Raised when no worker is ready to take a batch (e.g. all are restarting)."""
+
+
+def available_cores() -> list[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def _worker_main(index, core, model_path, backend_kind, in_name, out_name, in_shape, out_shape, requests, results):
+    """Worker process: load the backend, then serve slots until told to stop.
+
+    ``results`` is this worker's own pipe to the supervisor. A shared queue
+    would be guarded by one lock, and a worker killed while holding it
+    would block every other writer.
+    """
+    if core is not None and hasattr(os, "sched_setaffinity"):
+        try:
+            os.sched_setaffinity(0, {core})
+        except OSError:
+            pass
+    for key, value in _SINGLE_THREAD_ENV.items():
+        os.environ.setdefault(key, value)
+
+    in_shm = SharedMemory(name=in_name)
+    out_shm = SharedMemory(name=out_name)
+    inputs = np.ndarray(in_shape, dtype=np.uint8, buffer=in_shm.buf)
+    outputs = np.ndarray(out_shape, dtype=np.float32, buffer=out_shm.buf)
+    try:
+        from backends import backend_from_env
+
+        try:
+            backend = backend_from_env(model_path, default=backend_kind)
+        except Exception as e:
+            results.send(("failed", index, str(e)))
+            return
+        results.send(("ready", index, backend.describe()))
+
+        while True:
+            msg = requests.get()
+            if msg is None:
+                break
+            slot, n = msg
+            try:
+                outputs[slot, :n] = backend.predict(inputs[slot, :n])
+                results.send(("done", index, slot, None))
+            except Exception as e:
+                results.send(("done", index, slot, str(e)))
+    finally:
+        del inputs, outputs
+        in_shm.close()
+        out_shm.close()
+        results.close()
+
+
+class _Worker:
+    __slots__ = ("index", "core", "process", "requests", "results", "inflight", "completed", "restarts", "ready",
+                 "failures", "retry_at", "given_up")
+
+    def __init__(self, index: int, core: Optional[int]):
+        self.index = index
+        self.core = core
+        self.process: Optional[mp.process.BaseProcess] = None
+        self.requests: Any = None
+        self.results: Any = None
+        self.inflight: set[int] = set()
+        self.completed = 0
+        self.restarts = 0
+        self.ready = False
+        # Consecutive exits before becoming ready, and when the next respawn is due
+        self.failures = 0
+        self.retry_at: Optional[float] = None
+        self.given_up = False
+
+
+class WorkerPool:
+    """Supervisor and client for N pinned inference worker processes.
+
+    Args:
+        model_path: Keras model path; workers resolve the serving artifact
+            with ``backend_from_env`` so ``INFERENCE_BACKEND`` etc. apply.
+            When no backend is configured, workers use the converted TFLite
+            model if there is one (see ``backends.shared_backend_kind``).
+        workers: Number of worker processes (default: one per available core).
+        max_batch_size: Largest batch a single slot holds; bigger inputs are
+            split across slots (and therefore across workers).
+        slots: Shared-memory slots, i.e. batches in flight (default ``2 * workers``).
+        pin: Pin worker ``i`` to the ``i``-th available core.
+        restart_backoff_s: Delay before respawning a worker that died before
+            loading the model; doubles on each further failure.
+        max_restart_backoff_s: Upper bound on that delay.
+        max_restart_failures: Consecutive load failures after which a worker
+            is no longer respawned and the pool is unhealthy.
+    """
+
+    name = "workers"
+
+    def __init__(
+        self,
+        model_path: str,
+        workers: Optional[int] = None,
+        max_batch_size: int = 16,
+        slots: Optional[int] = None,
+        pin: bool = True,
+        start_timeout_s: float = 600.0,
+        restart_backoff_s: float = 1.0,
+        max_restart_backoff_s: float = 60.0,
+        max_restart_failures: int = 5,
+    ):
+        cores = available_cores()
+        self.model_path = model_path
+        self.path = model_path
+        self.num_workers = max(1, int(workers or len(cores)))
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.num_slots = max(1, int(slots or 2 * self.num_workers))
+        self.start_timeout_s = start_timeout_s
+        self.restart_backoff_s = float(restart_backoff_s)
+        self.max_restart_backoff_s = float(max_restart_backoff_s)
+        self.max_restart_failures = max(1, int(max_restart_failures))
+        self.backend_info: Optional[dict] = None
+        self.backend_kind = shared_backend_kind(model_path)
+        if self.backend_kind != "tflite" and self.num_workers > 1:
+            logger.warning(f"Each of the {self.num_workers} inference workers loads its own copy of the "
+                           f"{self.backend_kind} model weights; convert it to TFLite "
+                           f"(python convert_model.py convert tflite) to share them via mmap")
+
+        self._ctx = mp.get_context("spawn")
+        self._in_shape = (self.num_slots, self.max_batch_size) + INPUT_SHAPE
+        self._out_shape = (self.num_slots, self.max_batch_size, NUM_CLASSES)
+        self._in_shm = SharedMemory(create=True, size=int(np.prod(self._in_shape)))
+        self._out_shm = SharedMemory(create=True, size=int(np.prod(self._out_shape)) * 4)
+        self._inputs = np.ndarray(self._in_shape, dtype=np.uint8, buffer=self._in_shm.buf)
+        self._outputs = np.ndarray(self._out_shape, dtype=np.float32, buffer=self._out_shm.buf)
+
+        self._free: "queue.Queue[int]" = queue.Queue()
+        for slot in range(self.num_slots):
+            self._free.put(slot)
+        self._pending: dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self._workers = [
+            _Worker(i, cores[i % len(cores)] if pin else None) for i in range(self.num_workers)
+        ]
+        self._stopping = threading.Event()
+        self._supervisor: Optional[threading.Thread] = None
+        self._all_ready = threading.Event()
+        self._start_error: Optional[str] = None
+
+    # ----- lifecycle -----
+
+    def start(self) -> None:
+        """Spawn the workers and block until every one has loaded the model."""
+        for worker in self._workers:
+            self._spawn(worker)
+        self._supervisor = threading.Thread(target=self._supervise, name="worker-pool", daemon=True)
+        self._supervisor.start()
+        if not self._all_ready.wait(self.start_timeout_s) or self._start_error:
+            error = self._start_error or "timed out waiting for inference workers"
+            self.stop()
+            raise WorkerError(error)
+        logger.info(f"✅ {self.num_workers} inference workers ready ({self.num_slots} shared-memory slots)")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        if self._stopping.is_set():
+            return
+        self._stopping.set()
+        for worker in self._workers:
+            if worker.process is not None and worker.process.is_alive():
+                worker.requests.put(None)
+        for worker in self._workers:
+            if worker.process is not None:
+                worker.process.join(timeout)
+                if worker.process.is_alive():
+                    worker.process.terminate()
+        if self._supervisor is not None:
+            self._supervisor.join(timeout)
+        with self._lock:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(WorkerError("Worker pool stopped"))
+            self._pending.clear()
+        for worker in self._workers:
+            if worker.results is not None:
+                worker.results.close()
+                worker.results = None
+        del self._inputs, self._outputs
+        for shm in (self._in_shm, self._out_shm):
+            shm.close()
+            shm.unlink()
+
+    @property
+    def healthy(self) -> bool:
+        """False once stopped or once any worker has been given up on."""
+        return not self._stopping.is_set() and not any(w.given_up for w in self._workers)
+
+    def _spawn(self, worker: _Worker) -> None:
+        if worker.results is not None:
+            worker.results.close()
+        worker.requests = self._ctx.Queue()
+        worker.results, sender = self._ctx.Pipe(duplex=False)
+        worker.ready = False
+        worker.process = self._ctx.Process(
+            target=_worker_main,
+            name=f"inference-worker-{worker.index}",
+            args=(worker.index, worker.core, self.model_path, self.backend_kind, self._in_shm.name, self._out_shm.name,
+                  self._in_shape, self._out_shape, worker.requests, sender),
+            daemon=True,
+        )
+        worker.process.start()
+        sender.close()
+
+    # ----- supervisor -----
+
+    def _supervise(self) -> None:
+        while not self._stopping.is_set():
+            pipes = {w.results: w for w in self._workers if w.results is not None}
+            if not pipes:
+                time.sleep(0.5)
+            for conn in wait_connections(list(pipes), timeout=0.5) if pipes else ():
+                try:
+                    msg = conn.recv()
+                except (EOFError, OSError):
+                    # Worker exited; _check_workers handles it
+                    conn.close()
+                    pipes[conn].results = None
+                    continue
+                self._handle(msg)
+            self._check_workers()
+
+    def _handle(self, msg: tuple) -> None:
+        kind, index = msg[0], msg[1]
+        worker = self._workers[index]
+        if kind == "ready":
+            worker.ready = True
+            worker.failures = 0
+            self.backend_info = msg[2]
+            self.path = msg[2].get("path", self.path)
+            if all(w.ready for w in self._workers):
+                self._all_ready.set()
+        elif kind == "failed":
+            if not self._all_ready.is_set():
+                self._start_error = f"worker {index} failed to load model: {msg[2]}"
+                self._all_ready.set()
+            else:
+                logger.error(f"❌ Inference worker {index} failed to load model: {msg[2]}")
+        elif kind == "done":
+            _, _, slot, error = msg
+            with self._lock:
+                worker.inflight.discard(slot)
+                worker.completed += 1
+                future = self._pending.pop(slot, None)
+            if future is not None:
+                if error is None:
+                    future.set_result(slot)
+                else:
+                    future.set_exception(WorkerError(error))
+
+    def _check_workers(self) -> None:
+        now = time.monotonic()
+        for worker in self._workers:
+            if worker.process is None or worker.process.is_alive() or self._stopping.is_set():
+                continue
+            if worker.retry_at is None:
+                self._worker_exited(worker, now)
+            if worker.retry_at is not None and now >= worker.retry_at:
+                worker.retry_at = None
+                worker.restarts += 1
+                self._spawn(worker)
+
+    def _worker_exited(self, worker: _Worker, now: float) -> None:
+        """Fail the batches a dead worker held and schedule its restart (or give up)."""
+        logger.error(f"❌ Inference worker {worker.index} exited with code {worker.process.exitcode}")
+        with self._lock:
+            # Not ready from here on, so _dispatch stops routing to it before the respawn
+            # replaces its request queue
+            was_ready, worker.ready = worker.ready, False
+            lost = [self._pending.pop(slot, None) for slot in worker.inflight]
+            worker.inflight.clear()
+        for future in lost:
+            if future is not None:
+                future.set_exception(WorkerError(f"Inference worker {worker.index} died"))
+        if not self._all_ready.is_set():
+            self._start_error = f"worker {worker.index} exited during startup"
+            self._all_ready.set()
+            worker.process = None
+            return
+        if not was_ready:
+            worker.failures += 1
+        if worker.failures >= self.max_restart_failures:
+            logger.error(f"❌ Inference worker {worker.index} failed {worker.failures} times in a row; "
+                         f"not restarting it, worker pool unhealthy")
+            worker.given_up = True
+            worker.process = None
+            return
+        # A worker that crashed while serving comes back at once; load failures back off
+        delay = 0.0 if not worker.failures else min(
+            self.max_restart_backoff_s, self.restart_backoff_s * 2 ** (worker.failures - 1))
+        if delay:
+            logger.info(f"Restarting inference worker {worker.index} in {delay:.0f}s")
+        worker.retry_at = now + delay
+
+    # ----- client -----
+
+    def _acquire(self, inflight: deque, out: np.ndarray, timeout: Optional[float]) -> int:
+        """A free slot; while none is free, finish this call's own oldest chunk first.
+
+        Waiting on the shared queue while still holding slots could otherwise
+        deadlock callers that each hold part of the ring.
+        """
+        while True:
+            try:
+                return self._free.get_nowait()
+            except queue.Empty:
+                if not inflight:
+                    break
+            self._collect(inflight.popleft(), out, timeout)
+        try:
+            return self._free.get(timeout=timeout)
+        except queue.Empty:
+            raise WorkerError("No free shared-memory slot")
+
+    def _release(self, slot: int, future: Future) -> None:
+        if future.done():
+            self._free.put(slot)
+        else:
+            # Slot is still owned by a worker; reclaim it when that finishes
+            future.add_done_callback(lambda _f, s=slot: self._free.put(s))
+
+    def _dispatch(self, slot: int, batch: np.ndarray) -> Future:
+        n = len(batch)
+        if batch.dtype == np.uint8:
+            self._inputs[slot, :n] = batch
+        else:
+            np.rint(np.multiply(batch, 255.0), out=self._inputs[slot, :n], casting="unsafe")
+        future: Future = Future()
+        with self._lock:
+            candidates = [w for w in self._workers if w.ready]
+            if not candidates:
+                raise WorkerUnavailable("No inference worker ready")
+            worker = min(candidates, key=lambda w: len(w.inflight))
+            worker.inflight.add(slot)
+            self._pending[slot] = future
+        worker.requests.put((slot, n))
+        return future
+
+    def _collect(self, entry: tuple, out: np.ndarray, timeout: Optional[float]) -> None:
+        start, n, slot, future = entry
+        try:
+            future.result(timeout=timeout)
+            out[start:start + n] = self._outputs[slot, :n]
+        finally:
+            self._release(slot, future)
+
+    def predict(self, batch: np.ndarray, batch_size: Optional[int] = None,
+                timeout: Optional[float] = 30.0) -> np.ndarray:
+        """Run ``batch`` on the workers; chunks go to different workers concurrently.
+
+        Batches with more chunks than free slots are streamed: a chunk's
+        result is copied out and its slot reused before the next is sent.
+        """
+        if self._stopping.is_set():
+            raise WorkerError("Worker pool stopped")
+        if all(w.given_up for w in self._workers):
+            raise WorkerError("No inference workers available")
+        chunk = min(batch_size or self.max_batch_size, self.max_batch_size)
+        out = np.empty((len(batch), NUM_CLASSES), dtype=np.float32)
+        inflight: deque = deque()
+        try:
+            for start in range(0, len(batch), chunk):
+                rows = batch[start:start + chunk]
+                slot = self._acquire(inflight, out, timeout)
+                try:
+                    future = self._dispatch(slot, rows)
+                except BaseException:
+                    self._free.put(slot)
+                    raise
+                inflight.append((start, len(rows), slot, future))
+            while inflight:
+                self._collect(inflight.popleft(), out, timeout)
+        finally:
+            for _, _, slot, future in inflight:
+                self._release(slot, future)
+        return out
+
+    def describe(self) -> dict:
+        return {
+            "backend": self.name,
+            "workers": self.num_workers,
+            "path": self.path,
+            "worker_backend": self.backend_info,
+        }
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            workers = [
+                {
+                    "index": w.index,
+                    "pid": w.process.pid if w.process is not None else None,
+                    "core": w.core,
+                    "alive": bool(w.process is not None and w.process.is_alive()),
+                    "inflight": len(w.inflight),
+                    "completed": w.completed,
+                    "restarts": w.restarts,
+                    "given_up": w.given_up,
+                }
+                for w in self._workers
+            ]
+        return {
+            "healthy": self.healthy,
+            "workers": workers,
+            "slots": self.num_slots,
+            "free_slots": self._free.qsize(),
+            "slot_batch_size": self.max_batch_size,
+            "shared_memory_bytes": self._in_shm.size + self._out_shm.size,
+        }